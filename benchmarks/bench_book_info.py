@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Микробенчмарк BookInfo: память на книгу и скорость нормализации
+
+Сравнивает прежний dataclass (производные формы пересчитываются регулярками
+при каждом обращении) со слотовым BookInfo с кэшем производных форм.
+
+Запуск: python benchmarks/bench_book_info.py [число_книг]
+"""
+
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo, prepare_books
+
+# Сколько раз загрузчик обращается к производным полям одной книги
+# (поиск, таблица, имя файла, прогресс)
+ACCESSES_PER_BOOK = 5
+
+
+@dataclass
+class LegacyBookInfo:
+    """Прежний BookInfo (обычный dataclass без кэша)"""
+    id: int
+    author: str
+    title: str
+    subtitle: str = ""
+    narrator: str = ""
+    year: str = ""
+    category: str = ""
+
+    @property
+    def full_title(self) -> str:
+        result = f"{self.author} - {self.title}"
+        if self.subtitle:
+            result += f": {self.subtitle}"
+        return result
+
+    @property
+    def search_query(self) -> str:
+        clean_author = re.sub(r'[«»""„"]', '', self.author)
+        clean_author = clean_author.replace('—', '').replace('–', '')
+        clean_author = re.sub(r'\s+', ' ', clean_author).strip()
+        clean_title = re.sub(r'[«»""„"]', '', self.title)
+        clean_title = clean_title.replace('—', '').replace('–', '')
+        clean_title = re.sub(r'\s+', ' ', clean_title).strip()
+        clean_author = re.sub(r'(\b[А-ЯЁA-Z])\.', r'\1', clean_author)
+        clean_title = re.sub(r'(\b[А-ЯЁA-Z])\.', r'\1', clean_title)
+        return f"{clean_author} {clean_title} аудиокнига"
+
+    @property
+    def alternative_search_queries(self) -> list:
+        queries = [self.search_query]
+        clean_author = re.sub(r'[«»""„"\.]', '', self.author)
+        clean_author = clean_author.replace('—', '').replace('–', '')
+        clean_author = re.sub(r'\s+', ' ', clean_author).strip()
+        queries.append(f"{clean_author} аудиокнига")
+        title_no_numbers = re.sub(r'\b\d+\b', '', self.title).strip()
+        if title_no_numbers and title_no_numbers != self.title:
+            clean_title = re.sub(r'[«»""„"\.]', '', title_no_numbers)
+            clean_title = clean_title.replace('—', '').replace('–', '')
+            clean_title = re.sub(r'\s+', ' ', clean_title).strip()
+            queries.append(f"{clean_author} {clean_title} аудиокнига")
+        clean_title_full = re.sub(r'[«»""„"\.]', '', self.title)
+        clean_title_full = clean_title_full.replace('—', '').replace('–', '')
+        queries.append(f"{clean_author} {clean_title_full} полная версия")
+        return list(dict.fromkeys(queries))
+
+    @property
+    def filename(self) -> str:
+        safe_name = re.sub(r'[^\w\s\-\.]', '', self.full_title)
+        safe_name = re.sub(r'[-\s]+', '-', safe_name)
+        return safe_name[:100]
+
+
+def make_books(cls, count: int) -> list:
+    """Синтетический список книг"""
+    return [
+        cls(id=n, author=f"Урсула К. Ле Гуин {n}", title=f"«Волшебник Земноморья» {n}",
+            subtitle="Волшебник Земноморья", category="ФАНТАСТИКА")
+        for n in range(count)
+    ]
+
+
+def memory_per_book(cls, count: int) -> float:
+    """Байт на книгу (сами записи, без строк полей - они общие в обоих вариантах)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    books = [cls(id=0, author="", title="") for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del books
+    return (after - before) / count
+
+
+def normalization_time(books: list, prepare=None) -> float:
+    """Время обращений к производным полям всего списка"""
+    start = time.perf_counter()
+    if prepare:
+        prepare(books)
+    for _ in range(ACCESSES_PER_BOOK):
+        for book in books:
+            book.alternative_search_queries
+            book.filename
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    legacy_mem = memory_per_book(LegacyBookInfo, count)
+    slotted_mem = memory_per_book(BookInfo, count)
+
+    legacy_time = normalization_time(make_books(LegacyBookInfo, count))
+    cached_time = normalization_time(make_books(BookInfo, count))
+
+    prepare_start = time.perf_counter()
+    prepare_books(make_books(BookInfo, count))
+    prepare_time = time.perf_counter() - prepare_start  # создание книг входит в замер
+
+    print(f"Книг: {count}, обращений к производным полям на книгу: {ACCESSES_PER_BOOK}")
+    print(f"Память на запись:  прежний {legacy_mem:6.0f} Б, слотовый {slotted_mem:6.0f} Б")
+    print(f"Нормализация:      прежний {legacy_time:6.2f} с, с кэшем {cached_time:6.2f} с "
+          f"({legacy_time / cached_time:.1f}x)")
+    print(f"prepare_books:     {count / prepare_time:,.0f} книг/с (с созданием записей)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: разбор большого books.txt
+
+Сравнивает прежний парсер (весь файл в память, шаблоны и import hashlib
+на каждой строке) с потоковым BookListParser по времени и пиковой памяти.
+
+Запуск: python benchmarks/bench_book_parser.py [число_строк]
+"""
+
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo, BookListParser
+
+LINES = (
+    "{n}. Роберт Хайнлайн - Звёздный десант {n} | Чтец: Иван Петров (2024)",
+    "Орсон Скотт Кард — Игра Эндера {n}, Игра Эндера",
+    "Дэн Симмонс - Гиперион {n}: Падение Гипериона",
+    "Михаил Март — «Настоящий детектив {n}»",
+)
+
+
+def legacy_parse(file_path: Path) -> list:
+    """Прежний AudiobookParser.parse (до общего потокового парсера)"""
+    books = []
+    current_category = ""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('##'):
+            current_category = line.replace('##', '').strip()
+            continue
+        normalized_line = line.replace('—', '-').replace('–', '-')
+        numbered_pattern = r'^(\d+)\.\s+([^-]+?)\s*-\s*([^|]+?)(?:\s*\|\s*Чтец:\s*([^(]+?)\s*\((\d{4})\))?$'
+        match = re.match(numbered_pattern, normalized_line.strip())
+        if match:
+            book_id = int(match.group(1))
+            author = match.group(2).strip()
+            title_part = match.group(3).strip()
+            narrator = match.group(4).strip() if match.group(4) else ""
+            year = match.group(5) if match.group(5) else ""
+        else:
+            simple_match = re.match(r'^([^-]+?)\s*-\s*(.+)$', normalized_line.strip())
+            if not simple_match:
+                continue
+            import hashlib
+            book_id = int(hashlib.md5(line.encode()).hexdigest()[:8], 16) % 100000
+            author = simple_match.group(1).strip()
+            title_part = simple_match.group(2).strip()
+            narrator = ""
+            year = ""
+        if ',' in title_part:
+            title, subtitle = [part.strip() for part in title_part.split(',', 1)]
+        elif ':' in title_part:
+            title, subtitle = [part.strip() for part in title_part.split(':', 1)]
+        else:
+            title, subtitle = title_part, ""
+        books.append(BookInfo(id=book_id, author=author, title=title, subtitle=subtitle,
+                              narrator=narrator, year=year, category=current_category))
+    return books
+
+
+def write_books(path: Path, count: int):
+    """Синтетический список книг с категориями"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for n in range(count):
+            if n % 1000 == 0:
+                f.write(f"## КАТЕГОРИЯ {n // 1000}\n")
+            f.write(LINES[n % len(LINES)].format(n=n) + "\n")
+
+
+def measure(func, *args):
+    """Время и пиковая память (tracemalloc замедляет код, поэтому отдельный прогон)"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def stream_count(path: Path) -> int:
+    """Потоковая обработка: книги не накапливаются в памяти"""
+    return sum(1 for _ in BookListParser(path).iter_books())
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "books.txt"
+        write_books(path, count)
+        size_mb = path.stat().st_size / 1024 / 1024
+
+        legacy, legacy_time, legacy_peak = measure(legacy_parse, path)
+        parsed, list_time, list_peak = measure(lambda p: BookListParser(p).parse(), path)
+        streamed, stream_time, stream_peak = measure(stream_count, path)
+
+    assert len(legacy) == len(parsed) == streamed
+
+    print(f"Строк: {count} ({size_mb:.1f} МБ), книг: {streamed}")
+    print(f"Прежний парсер:       {legacy_time:7.2f} с, пик памяти {legacy_peak / 1024 / 1024:8.1f} МБ")
+    print(f"BookListParser.parse: {list_time:7.2f} с, пик памяти {list_peak / 1024 / 1024:8.1f} МБ")
+    print(f"iter_books (поток):   {stream_time:7.2f} с, пик памяти {stream_peak / 1024 / 1024:8.1f} МБ")
+    print(f"Ускорение: {legacy_time / stream_time:.2f}x, память: {legacy_peak / max(stream_peak, 1):.0f}x меньше")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: классификация большого каталога по категориям
+
+Прежняя цепочка if с вложенными any() только по заголовку категории
+против CategoryClassifier (заголовок, автор и название за один проход).
+
+Запуск: python benchmarks/bench_classifier.py [число_книг]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.classifier import CategoryClassifier
+
+CATALOG = (
+    ("ЗАРУБЕЖНАЯ ФАНТАСТИКА", "Роберт Хайнлайн", "Звёздный десант"),
+    ("ЗАРУБЕЖНЫЕ ДЕТЕКТИВЫ", "Реймонд Чандлер", "Филип Марлоу 1"),
+    ("РОССИЙСКАЯ ФАНТАСТИКА", "Кир Булычёв", "Алиса Селезнёва 12"),
+    ("РОССИЙСКИЕ ДЕТЕКТИВЫ", "Чингиз Абдуллаев", "Дронго 25"),
+    ("СМЕШАННЫЕ ФОРМАТЫ (примеры сложных случаев)", "Джордж Мартин", "Песнь Льда и Пламени 05"),
+)
+
+FOREIGN = ["зарубежная", "зарубеж", "foreign"]
+RUSSIAN = ["российская", "русская", "russian"]
+FANTASY = ["фантастика", "фэнтези", "мистика", "ужасы", "фанфики", "fantasy"]
+DETECTIVE = ["детектив", "триллер", "боевик", "detective", "thriller"]
+
+
+def legacy_category(category: str) -> str:
+    """Прежний _get_category_dir (без обращения к диску)"""
+    category_lower = category.lower() if category else ""
+    if any(k in category_lower for k in FOREIGN) and any(k in category_lower for k in FANTASY):
+        return "foreign_fantasy"
+    elif any(k in category_lower for k in FOREIGN) and any(k in category_lower for k in DETECTIVE):
+        return "foreign_detective"
+    elif any(k in category_lower for k in RUSSIAN) and any(k in category_lower for k in FANTASY):
+        return "russian_fantasy"
+    elif any(k in category_lower for k in RUSSIAN) and any(k in category_lower for k in DETECTIVE):
+        return "russian_detective"
+    return "russian_fantasy"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    catalog = [CATALOG[n % len(CATALOG)] for n in range(count)]
+    classifier = CategoryClassifier()
+
+    start = time.perf_counter()
+    legacy = [legacy_category(category) for category, _, _ in catalog]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [classifier.classify(category, author, title) for category, author, title in catalog]
+    new_time = time.perf_counter() - start
+
+    # Книги с полным заголовком категории классифицируются как раньше
+    same = sum(1 for old, new in zip(legacy, results) if new.reason != 'category' or old == new.label)
+    by_author = sum(1 for result in results if result.reason == 'author')
+
+    print(f"Книг: {count}")
+    print(f"Цепочка if (только заголовок): {legacy_time:6.2f} с ({count / legacy_time:,.0f} книг/с)")
+    print(f"CategoryClassifier:            {new_time:6.2f} с ({count / new_time:,.0f} книг/с)")
+    print(f"Совпадает с прежними правилами: {same}/{count}, определено по автору: {by_author}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: поиск дубликатов в большом списке книг
+
+Попарное сравнение триграмм (как сделал бы наивный поиск) на небольшой
+выборке против deduplicate_books (ключи + MinHash/LSH) на всем списке.
+
+Запуск: python benchmarks/bench_dedup.py [число_книг]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.dedup import SIMILARITY_THRESHOLD, deduplicate_books, jaccard, normalize_key, trigrams
+
+SYLLABLES = ("ка", "ро", "ми", "на", "то", "ле", "ва", "ди", "су", "ре", "по",
+             "ла", "ба", "гу", "фе", "ше", "цо", "жи", "лю", "мэ", "зы", "хо")
+DUPLICATE_SHARE = 0.05
+PAIRWISE_SAMPLE = 1000
+
+
+def make_books(count: int, rng: random.Random):
+    """Случайный список книг, часть которых повторяется с опечаткой"""
+    def word(syllables: int) -> str:
+        return "".join(rng.choices(SYLLABLES, k=syllables)).capitalize()
+
+    books = [BookInfo(n, f"{word(3)} {word(4)}", f"{word(3)} {word(2)} {rng.randint(1, 30)}")
+             for n in range(count)]
+    copies = int(count * DUPLICATE_SHARE)
+    books += [BookInfo(count + n, book.author, book.title + "а") for n, book in enumerate(books[:copies])]
+    return books, copies
+
+
+def pairwise(books) -> int:
+    """Наивный поиск: каждая книга сравнивается с каждой"""
+    shingles = [trigrams(normalize_key(book)) for book in books]
+    found = 0
+    for i in range(len(shingles)):
+        for j in range(i + 1, len(shingles)):
+            if jaccard(shingles[i], shingles[j]) >= SIMILARITY_THRESHOLD:
+                found += 1
+    return found
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    books, copies = make_books(count, random.Random(1))
+
+    sample = books[:PAIRWISE_SAMPLE]
+    start = time.perf_counter()
+    pairwise(sample)
+    pairwise_time = time.perf_counter() - start
+    # Попарное сравнение растет квадратично
+    estimated = pairwise_time * (len(books) / len(sample)) ** 2
+
+    start = time.perf_counter()
+    result = deduplicate_books(books)
+    dedup_time = time.perf_counter() - start
+
+    print(f"Книг: {len(books)} (из них повторов: {copies})")
+    print(f"Попарно ({len(sample)} книг): {pairwise_time:6.2f} с, на весь список ~{estimated:,.0f} с")
+    print(f"deduplicate_books:           {dedup_time:6.2f} с")
+    print(f"Объединено строк: {result.removed}, групп: {len(result.groups)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: планирование путей для большой библиотеки
+
+Прежний способ - транслитерация 66 заменами, регулярки и mkdir на каждую
+книгу. Новый - таблица перевода, запомненные имена папок и никаких
+обращений к диску до записи файла.
+
+Запуск: python benchmarks/bench_path_planning.py [число_книг]
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.paths import CYRILLIC_TO_LATIN, author_dir_name, series_dir_name
+
+AUTHORS = ("Чингиз Абдуллаев", "Татьяна Полякова", "Кир Булычёв", "Урсула К. Ле Гуин", "Ник Перумов")
+SERIES = ("Дронго", "Частный детектив Татьяна Иванова", "Алиса Селезнёва", "Волшебник Земноморья", "Кольцо Тьмы")
+
+
+def legacy_plan(root: Path, author: str, title: str) -> Path:
+    """Прежний _create_organized_structure"""
+    author_safe = author
+    for cyr, lat in CYRILLIC_TO_LATIN.items():
+        author_safe = author_safe.replace(cyr, lat)
+    author_safe = re.sub(r'[^\w\s]', '', author_safe)
+    author_safe = re.sub(r'\s+', '_', author_safe.strip())
+    author_dir = root / author_safe
+    author_dir.mkdir(parents=True, exist_ok=True)
+    if re.search(r'\d+', title):
+        series_match = re.search(r'([^0-9]+)', title)
+        if series_match:
+            series_safe = re.sub(r'[^\w\s]', '', series_match.group(1).strip())
+            series_safe = re.sub(r'\s+', '_', series_safe)
+            if len(series_safe) > 3:
+                series_dir = author_dir / series_safe
+                series_dir.mkdir(parents=True, exist_ok=True)
+                return series_dir
+    return author_dir
+
+
+def planned(root: Path, author: str, title: str) -> Path:
+    """Новый путь: без обращений к диску"""
+    author_dir = root / author_dir_name(author)
+    series_name = series_dir_name(title)
+    return author_dir / series_name if series_name else author_dir
+
+
+def run(func, root: Path, count: int) -> float:
+    start = time.perf_counter()
+    for n in range(count):
+        i = n % len(AUTHORS)
+        func(root, AUTHORS[i], f"{SERIES[i]} {n % 40}")
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_time = run(legacy_plan, Path(tmp) / "legacy", count)
+        new_time = run(planned, Path(tmp) / "planned", count)
+        created = sum(len(dirs) for _, dirs, _ in os.walk(tmp))
+
+    print(f"Книг: {count}")
+    print(f"Прежний способ: {legacy_time:6.2f} с ({legacy_time / count * 1e6:6.1f} мкс/книга, mkdir на каждую книгу)")
+    print(f"Новый способ:   {new_time:6.2f} с ({new_time / count * 1e6:6.1f} мкс/книга, без обращений к диску)")
+    print(f"Папок создано заранее: {created - 1} (только прежним способом)")
+
+
+if __name__ == "__main__":
+    main()
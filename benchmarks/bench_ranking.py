@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: ранжирование больших пачек кандидатов поиска
+
+Запуск: python benchmarks/bench_ranking.py [кандидатов_в_пачке] [пачек]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.ranking import RelevanceRanker
+
+WORDS = ("мастер", "маргарита", "булгаков", "аудиокнига", "полностью", "фильм", "краткое",
+         "содержание", "глава", "часть", "читает", "спектакль", "трейлер", "отзыв", "обзор")
+QUERY = "Михаил Булгаков Мастер и Маргарита"
+
+
+def make_candidates(count: int, rng: random.Random) -> list:
+    """Синтетические результаты поиска"""
+    return [
+        {
+            'webpage_url': f"https://www.youtube.com/watch?v={n}",
+            'title': ' '.join(rng.choices(WORDS, k=8)),
+            'channel': ' '.join(rng.choices(WORDS, k=2)),
+            'description': ' '.join(rng.choices(WORDS, k=30)),
+            'duration': rng.choice((None, 300, 5400, 36000, 90000)),
+        }
+        for n in range(count)
+    ]
+
+
+def main():
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    batches = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    ranker = RelevanceRanker(exclude_terms=["краткое содержание", "трейлер"], hints=["полн", "часть 1"])
+    rng = random.Random(42)
+    data = [make_candidates(batch, rng) for _ in range(batches)]
+
+    start = time.perf_counter()
+    kept = sum(len(ranker.rank(QUERY, candidates)) for candidates in data)
+    elapsed = time.perf_counter() - start
+
+    total = batch * batches
+    print(f"Пачек: {batches} по {batch} кандидатов, после отбора: {kept}")
+    print(f"Время: {elapsed:.2f} с, {elapsed / batches * 1000:.1f} мс на пачку, "
+          f"{total / elapsed:,.0f} кандидатов/с")
+
+
+if __name__ == "__main__":
+    main()
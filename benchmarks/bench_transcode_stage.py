@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: скачивание и перекодирование - по очереди или одновременно
+
+Скачивание имитируется ожиданием (сеть не занимает процессор),
+перекодирование - счетом в процессе пула. Встроенная схема (как
+FFmpegExtractAudio в yt-dlp): рабочий поток ждет кодировщик, прежде чем
+взяться за следующую книгу. Стадия: поток сразу отдает файл в пул.
+
+Запуск: python benchmarks/bench_transcode_stage.py [число_книг]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.transcode import TranscodeJob, TranscodeResult, TranscodeStage
+
+DOWNLOAD_SECONDS = 1.0
+ENCODE_SECONDS = 0.3
+DOWNLOAD_WORKERS = 3
+
+
+def synthetic_encode(job: TranscodeJob) -> TranscodeResult:
+    """Нагрузка на процессор вместо ffmpeg"""
+    start = time.perf_counter()
+    deadline = time.process_time() + ENCODE_SECONDS
+    while time.process_time() < deadline:
+        sum(range(1000))
+    return TranscodeResult(job, True, time.perf_counter() - start)
+
+
+def run(count: int, inline: bool) -> float:
+    """Время обработки count книг"""
+    stage = TranscodeStage(runner=synthetic_encode)
+    # Прогрев: процессы пула запускаются до замера
+    stage.submit(TranscodeJob("warmup", "warmup.mp3")).result()
+
+    def book(number: int):
+        time.sleep(DOWNLOAD_SECONDS)  # Скачивание
+        future = stage.submit(TranscodeJob(f"{number}.webm", f"{number}.mp3"))
+        if inline:
+            future.result()  # Поток ждет кодировщик
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        list(executor.map(book, range(count)))
+    stage.drain()
+    elapsed = time.perf_counter() - start
+    stage.close()
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    cores = os.cpu_count() or 1
+
+    inline_time = run(count, inline=True)
+    staged_time = run(count, inline=False)
+
+    print(f"Книг: {count}, потоков скачивания: {DOWNLOAD_WORKERS}, ядер: {cores}")
+    print(f"Скачивание {DOWNLOAD_SECONDS}с + перекодирование {ENCODE_SECONDS}с процессора на книгу")
+    print(f"Перекодирование в потоке скачивания: {inline_time:6.2f} с ({count / inline_time:.2f} книг/с)")
+    print(f"Отдельная стадия:                    {staged_time:6.2f} с ({count / staged_time:.2f} книг/с)")
+
+
+if __name__ == "__main__":
+    main()
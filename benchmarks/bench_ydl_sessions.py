@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⏱️ Бенчмарк: накладные расходы на запрос yt-dlp с пулом сессий и без
+
+Запросы идут к локальному HTTP-серверу (generic-экстрактор, прямая ссылка
+на аудиофайл), поэтому в замер попадают только создание YoutubeDL,
+настройка сети и соединения - без задержек внешних сервисов.
+
+Запуск: python benchmarks/bench_ydl_sessions.py [число_запросов]
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import yt_dlp
+from audiobook_downloader.sessions import YDLSessionPool
+
+PAYLOAD = b"\0" * 4096
+OPTS = {'quiet': True, 'no_warnings': True}
+
+
+class AudioHandler(BaseHTTPRequestHandler):
+    """Отдает маленький «аудиофайл» с keep-alive"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    do_HEAD = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Сервер без трассировок при разрыве соединения клиентом"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def run_fresh(url: str, count: int) -> float:
+    """Новый YoutubeDL на каждый запрос (как было)"""
+    start = time.perf_counter()
+    for i in range(count):
+        with yt_dlp.YoutubeDL(dict(OPTS)) as ydl:
+            ydl.extract_info(f"{url}?q={i}", download=False)
+    return time.perf_counter() - start
+
+
+def run_pooled(url: str, count: int) -> float:
+    """Экземпляры из пула сессий"""
+    pool = YDLSessionPool()
+    start = time.perf_counter()
+    for i in range(count):
+        with pool.session(OPTS) as ydl:
+            ydl.extract_info(f"{url}?q={i}", download=False)
+    elapsed = time.perf_counter() - start
+    pool.close()
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    server = QuietServer(("127.0.0.1", 0), AudioHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/book.mp3"
+
+    # Прогрев: импорт экстракторов и т.п.
+    run_fresh(url, 2)
+
+    fresh = run_fresh(url, count)
+    pooled = run_pooled(url, count)
+    server.shutdown()
+
+    print(f"Запросов: {count}")
+    print(f"Без пула:  {fresh / count * 1000:8.2f} мс/запрос")
+    print(f"С пулом:   {pooled / count * 1000:8.2f} мс/запрос")
+    print(f"Ускорение: {fresh / pooled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
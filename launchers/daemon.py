@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🎧 Audiobook Downloader - Daemon Launcher
+Запуск фонового режима (очередь заданий и локальный HTTP API)
+"""
+
+import sys
+import subprocess
+from pathlib import Path
+
+def main():
+    """Запуск демона"""
+    # Путь к основному модулю запуска
+    launcher_path = Path(__file__).parent.parent / "src" / "launchers" / "daemon.py"
+    
+    try:
+        result = subprocess.run([sys.executable, str(launcher_path)], check=True)
+        return result.returncode
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Ошибка запуска: {e}")
+        return e.returncode
+    except KeyboardInterrupt:
+        return 0
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
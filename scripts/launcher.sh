@@ -31,11 +31,13 @@ show_menu() {
     echo -e "${GREEN}2.${NC} ${WHITE}GUI версия${NC} ${CYAN}(Графический интерфейс)${NC}"
     echo -e "${GREEN}3.${NC} ${WHITE}Простая версия v3${NC} ${CYAN}(Рекомендуемая для MP3)${NC}"
     echo -e "${GREEN}4.${NC} ${WHITE}Продвинутая версия${NC} ${CYAN}(Обход блокировок YouTube)${NC}"
+    echo -e "${GREEN}5.${NC} ${WHITE}Фоновый режим${NC} ${CYAN}(Демон с постоянной очередью)${NC}"
+    echo -e "${GREEN}6.${NC} ${WHITE}Клиент демона${NC} ${CYAN}(Очередь, приоритеты, отмена)${NC}"
     echo ""
-    echo -e "${YELLOW}5.${NC} ${WHITE}Помощь${NC} ${CYAN}(Документация)${NC}"
-    echo -e "${RED}6.${NC} ${WHITE}Выход${NC}"
+    echo -e "${YELLOW}7.${NC} ${WHITE}Помощь${NC} ${CYAN}(Документация)${NC}"
+    echo -e "${RED}8.${NC} ${WHITE}Выход${NC}"
     echo ""
-    echo -ne "${YELLOW}Ваш выбор [1-6]: ${NC}"
+    echo -ne "${YELLOW}Ваш выбор [1-8]: ${NC}"
 }
 
 # Функция для активации виртуального окружения
@@ -100,6 +102,12 @@ while true; do
             run_command "python src/utils/robust_downloader.py" "Продвинутая версия (Обход блокировок YouTube)"
             ;;
         5)
+            run_command "python launchers/daemon.py" "Фоновый режим (Ctrl+C - остановка)"
+            ;;
+        6)
+            run_command "python launchers/client.py" "Клиент демона"
+            ;;
+        7)
             show_header
             echo -e "${CYAN}📖 Документация:${NC}"
             echo ""
@@ -111,16 +119,17 @@ while true; do
             echo -e "${GREEN}source .venv/bin/activate${NC} - активация окружения"
             echo -e "${GREEN}python src/utils/simple_downloader_v3.py${NC} - самая надежная версия (MP3)"
             echo -e "${GREEN}python src/utils/robust_downloader.py${NC} - продвинутая с обходом блокировок"
+            echo -e "${GREEN}python launchers/daemon.py${NC} - фоновый режим с очередью (API на 127.0.0.1:8765)"
             echo ""
             echo -e "${YELLOW}Нажмите Enter для продолжения...${NC}"
             read
             ;;
-        6)
+        8)
             echo -e "${GREEN}👋 До свидания!${NC}"
             exit 0
             ;;
         *)
-            echo -e "${RED}❌ Неверный выбор. Пожалуйста, введите число от 1 до 6.${NC}"
+            echo -e "${RED}❌ Неверный выбор. Пожалуйста, введите число от 1 до 8.${NC}"
             echo -e "${YELLOW}Нажмите Enter для продолжения...${NC}"
             read
             ;;
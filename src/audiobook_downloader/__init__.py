@@ -6,7 +6,9 @@
 Пакет для загрузки аудиокниг из различных источников
 """
 
+from .books import BookListParser, prepare_books
 from .core import AudiobookParser, AudiobookDownloader, BookInfo
+from .async_engine import AsyncAudiobookDownloader, ProgressEvent
 
 __version__ = "2.0.0"
 __author__ = "Audiobook Downloader Team"
@@ -15,5 +17,9 @@ __description__ = "Автоматический загрузчик аудиок
 __all__ = [
     'AudiobookParser',
     'AudiobookDownloader', 
-    'BookInfo'
+    'AsyncAudiobookDownloader',
+    'ProgressEvent',
+    'BookInfo',
+    'BookListParser',
+    'prepare_books'
 ]
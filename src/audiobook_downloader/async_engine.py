@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⚡ Асинхронный движок для встраивания в asyncio-сервисы
+Корутины поиска, выбора источников и скачивания поверх AudiobookDownloader
+(тот же парсер, классификатор и база прогресса) и асинхронный поток событий
+прогресса. Блокирующая работа yt-dlp идет в ограниченных пулах потоков,
+ffmpeg - в пуле процессов стадии перекодирования; книга в очереди - это
+легкая задача asyncio, а не поток, и ожидание перекодирования потока не
+занимает
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Set
+
+from .books import BookInfo, prepare_books
+from .core import AudiobookDownloader, AudiobookParser
+from .dedup import deduplicate_books
+
+# Этапы книги в событиях прогресса
+QUEUED = 'queued'
+SEARCHING = 'searching'
+RESOLVED = 'resolved'
+DOWNLOADING = 'downloading'
+TRANSCODING = 'transcoding'  # Медиафайл скачан, результат еще перекодируется
+DOWNLOADED = 'downloaded'    # Итоговый файл на месте
+FAILED = 'failed'
+
+# Байтовый прогресс публикуется не чаще, чем раз в столько байт на книгу
+PROGRESS_STEP = 1024 * 1024
+
+DEFAULT_SEARCH_WORKERS = 4
+# Потоков для поисковых запросов всех книг (запросы одной книги идут параллельно)
+DEFAULT_QUERY_WORKERS = 6
+
+
+@dataclass
+class ProgressEvent:
+    """Событие прогресса одной книги"""
+    book_id: int
+    title: str
+    stage: str
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    urls: List[str] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+
+class AsyncAudiobookDownloader:
+    """Асинхронная обертка над AudiobookDownloader
+
+    Поиск, его запросы и скачивание выполняются в отдельных пулах потоков
+    фиксированного размера; сколько бы книг ни было в очереди, потоков не
+    больше search_workers + query_workers + max_workers. События прогресса
+    читаются через ``async for event in engine.events()``.
+    """
+
+    def __init__(self, download_dir: str = "downloads", max_workers: int = 3,
+                 search_workers: int = DEFAULT_SEARCH_WORKERS, lookahead: int = 3,
+                 query_workers: int = DEFAULT_QUERY_WORKERS,
+                 downloader: Optional[AudiobookDownloader] = None):
+        self.downloader = downloader or AudiobookDownloader(download_dir, max_workers=max_workers,
+                                                            lookahead=lookahead)
+        self.max_workers = max_workers
+        self.lookahead = lookahead
+        self._search_pool = ThreadPoolExecutor(max_workers=search_workers,
+                                               thread_name_prefix='async-search')
+        self._download_pool = ThreadPoolExecutor(max_workers=max_workers,
+                                                 thread_name_prefix='async-download')
+        # Запросы поиска всех книг - в одном пуле, а не в своем на каждую книгу
+        self._query_pool = ThreadPoolExecutor(max_workers=query_workers,
+                                              thread_name_prefix='async-query')
+        self.downloader.search_executor = self._query_pool
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._reported: Dict[int, int] = {}
+        self._completions: Dict[int, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.downloader.progress_listeners.append(self._on_download_progress)
+        self.downloader.completion_listeners.append(self._on_completed)
+
+    async def __aenter__(self) -> 'AsyncAudiobookDownloader':
+        self._bind_loop()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _bind_loop(self) -> asyncio.AbstractEventLoop:
+        """Цикл событий, в который публикуются события из рабочих потоков"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    async def _run(self, pool: ThreadPoolExecutor, func: Callable, *args, **kwargs):
+        """Блокирующий вызов в пуле потоков"""
+        loop = self._bind_loop()
+        return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+
+    # События прогресса
+
+    def _publish(self, event: ProgressEvent):
+        """Раздача события подписчикам (в потоке цикла событий)"""
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def _emit(self, book: BookInfo, stage: str, **details):
+        """Событие из корутины (в потоке цикла событий)"""
+        self._publish(ProgressEvent(book.id, book.full_title, stage, **details))
+
+    def _emit_threadsafe(self, book: BookInfo, stage: str, **details):
+        """Событие из рабочего потока: публикуется через цикл событий"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            event = ProgressEvent(book.id, book.full_title, stage, **details)
+            loop.call_soon_threadsafe(self._publish, event)
+
+    def _on_download_progress(self, book: BookInfo, d: dict):
+        """Слушатель хуков yt-dlp (вызывается в потоке скачивания)"""
+        if d.get('status') != 'downloading':
+            return
+        received = d.get('downloaded_bytes') or 0
+        if received - self._reported.get(book.id, -PROGRESS_STEP) < PROGRESS_STEP:
+            return
+        self._reported[book.id] = received
+        total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+        self._emit_threadsafe(book, DOWNLOADING, downloaded_bytes=received, total_bytes=int(total))
+
+    def _on_completed(self, book: BookInfo, ok: bool):
+        """Слушатель готовности результата (поток скачивания или перекодирования)"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._resolve_completion, book.id, ok)
+
+    def _resolve_completion(self, book_id: int, ok: bool):
+        future = self._completions.get(book_id)
+        if future is not None and not future.done():
+            future.set_result(ok)
+
+    async def events(self) -> AsyncIterator[ProgressEvent]:
+        """События прогресса всех книг с момента подписки (до aclose())"""
+        self._bind_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._subscribers.discard(queue)
+
+    # Корутины движка
+
+    async def parse(self, books_file: str) -> List[BookInfo]:
+        """Разбор файла со списком книг тем же парсером, что и в консольной версии"""
+        return await self._run(self._search_pool, AudiobookParser(books_file).parse)
+
+    async def search(self, book: BookInfo) -> List[str]:
+        """Поиск источников на YouTube (без учета прогресса и прерванных скачиваний)"""
+        self._emit(book, SEARCHING)
+        urls = await self._run(self._search_pool, self.downloader.search_youtube, book)
+        self._emit(book, RESOLVED, urls=list(urls))
+        return urls
+
+    async def resolve(self, book: BookInfo) -> List[str]:
+        """Источники для книги с учетом базы прогресса (стадия поиска конвейера)"""
+        self._emit(book, SEARCHING)
+        urls = await self._run(self._search_pool, self.downloader.resolve_book, book)
+        self._emit(book, RESOLVED, urls=list(urls))
+        return urls
+
+    async def download(self, book: BookInfo, urls: Optional[List[str]] = None) -> bool:
+        """Скачивание книги (urls=None - источники ищутся заново)
+
+        True и событие DOWNLOADED - когда итоговый файл на месте, то есть
+        после перекодирования; пока оно идет, приходит событие TRANSCODING.
+        """
+        completed = await self.download_media(book, urls)
+        if completed is None:
+            return False
+        return await self._await_completion(book, completed)
+
+    async def download_media(self, book: BookInfo,
+                             urls: Optional[List[str]] = None) -> Optional[asyncio.Future]:
+        """Скачивание медиафайла без ожидания перекодирования
+
+        Возвращает future готовности итогового файла (None - скачать не удалось).
+        """
+        if urls is None:
+            urls = await self.resolve(book)
+        completed = self._bind_loop().create_future()
+        self._completions[book.id] = completed
+        self._emit(book, DOWNLOADING)
+        try:
+            ok = await self._run(self._download_pool, self.downloader.download_resolved, book, urls)
+        except Exception:
+            ok = False
+        self._reported.pop(book.id, None)
+        if not ok:
+            self._completions.pop(book.id, None)
+            self._emit(book, FAILED)
+            return None
+        return completed
+
+    async def _await_completion(self, book: BookInfo, completed: asyncio.Future) -> bool:
+        """Дождаться итогового файла книги (без потока: future из колбэка перекодирования)"""
+        if not completed.done():
+            self._emit(book, TRANSCODING)
+        try:
+            ok = await completed
+        finally:
+            self._completions.pop(book.id, None)
+        self._emit(book, DOWNLOADED if ok else FAILED)
+        return ok
+
+    async def download_books(self, books: Iterable[BookInfo],
+                             priority_ids: Optional[Set[int]] = None) -> Dict[int, bool]:
+        """Скачивание списка книг; результат - {номер книги: успех}
+
+        Поиск опережает скачивание не больше чем на lookahead книг: остальные
+        книги ждут своей очереди в семафоре, не занимая потоков.
+        """
+        self._bind_loop()
+        dedup = deduplicate_books(list(books))
+        prepared = prepare_books(dedup.books)
+        if priority_ids is not None:
+            self.downloader.priority_ids = set(priority_ids)
+
+        in_flight = asyncio.Semaphore(self.max_workers + max(1, self.lookahead))
+
+        async def one(book: BookInfo) -> bool:
+            # Место в очереди освобождается после скачивания: перекодирование
+            # идет в своем пуле, пока качаются следующие книги
+            async with in_flight:
+                completed = await self.download_media(book)
+            if completed is None:
+                return False
+            return await self._await_completion(book, completed)
+
+        for book in prepared:
+            self._emit(book, QUEUED)
+        results = await asyncio.gather(*(one(book) for book in prepared))
+        return {book.id: ok for book, ok in zip(prepared, results)}
+
+    async def drain(self):
+        """Дождаться перекодирования скачанных книг"""
+        await self._run(self._download_pool, self.downloader.transcoder.drain)
+
+    async def aclose(self):
+        """Дождаться перекодирования, завершить подписки и остановить пулы"""
+        await self.drain()
+        for queue in self._subscribers:
+            queue.put_nowait(None)
+        self.downloader.progress_listeners.remove(self._on_download_progress)
+        self.downloader.completion_listeners.remove(self._on_completed)
+        if self.downloader.search_executor is self._query_pool:
+            self.downloader.search_executor = None
+        self._search_pool.shutdown(wait=False)
+        self._query_pool.shutdown(wait=False)
+        self._download_pool.shutdown(wait=False)
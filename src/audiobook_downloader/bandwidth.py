@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🚦 Общий лимит скорости скачивания
+Бюджет (байт/с, с расписанием по времени суток) делится между активными
+загрузками по весам: приоритетные книги получают большую долю, а доля
+загрузок, которые не выбирают свою полосу, отдается остальным
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from .settings import get_setting
+
+MB = 1024 * 1024
+
+# Как часто пересчитываются доли (секунды)
+REALLOCATE_INTERVAL = 0.5
+
+# Загрузка может опередить свою долю не больше чем на столько секунд
+BURST_SECONDS = 0.5
+
+# Загрузка «голодна», если выбирает не меньше этой части своей доли
+SATURATION = 0.9
+
+# Запас сверху для загрузок, ограниченных не нами (могут ускориться)
+HEADROOM = 1.25
+
+# Доля простаивающей загрузки: с нее она разгоняется, когда снова начинает качать
+MIN_SHARE = 64 * 1024
+
+# Сглаживание измеренной скорости
+RATE_SMOOTHING = 0.5
+
+PRIORITY_WEIGHT = 3.0
+
+
+def parse_time(value: str) -> int:
+    """Минуты от полуночи для 'ЧЧ:ММ'"""
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def budget_at(default: float, schedule: Sequence[dict], moment: datetime) -> float:
+    """Бюджет на момент времени: первое подходящее окно расписания, иначе default
+
+    Окно {'from': '22:00', 'to': '07:00', 'bytes_per_sec': ...} может
+    переходить через полночь.
+    """
+    minute = moment.hour * 60 + moment.minute
+    for window in schedule:
+        start, end = parse_time(window['from']), parse_time(window['to'])
+        inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+        if inside:
+            return float(window['bytes_per_sec'])
+    return float(default)
+
+
+def format_rate(bytes_per_sec: float) -> str:
+    """Скорость для отображения"""
+    return f"{bytes_per_sec / MB:.1f} МБ/с"
+
+
+def allocate(budget: float, weights: Sequence[float], demands: Sequence[Optional[float]]) -> List[float]:
+    """Взвешенное справедливое деление бюджета (max-min fairness)
+
+    demands[i] - сколько загрузка способна выбрать (None - сколько дадут).
+    Загрузки с меньшей потребностью получают ее, остаток делится по весам
+    между остальными.
+    """
+    allocation = [0.0] * len(weights)
+    hungry = set(range(len(weights)))
+    remaining = budget
+    while hungry:
+        fair = remaining / sum(weights[i] for i in hungry)
+        modest = [i for i in hungry if demands[i] is not None and demands[i] < fair * weights[i]]
+        if not modest:
+            for i in hungry:
+                allocation[i] = fair * weights[i]
+            break
+        for i in modest:
+            allocation[i] = demands[i]
+            remaining -= demands[i]
+            hungry.discard(i)
+    return allocation
+
+
+class BandwidthStream:
+    """Одна активная загрузка под управлением BandwidthGovernor"""
+
+    def __init__(self, governor: 'BandwidthGovernor', name: str, weight: float):
+        self.governor = governor
+        self.name = name
+        self.weight = weight
+        self.allocated = 0.0  # 0 - без ограничения
+        self.rate = 0.0
+        self.fresh = True  # Еще не измерена - считается голодной
+        self.started = governor._clock()
+        self._bytes = 0
+        self._available_at = 0.0
+        self._reported: Dict[str, int] = {}
+
+    def consume(self, count: int):
+        """Учесть полученные байты (ждет, если загрузка обгоняет свою долю)"""
+        if count > 0:
+            self.governor._consume(self, count)
+
+    def hook(self, d: dict):
+        """Хук прогресса yt-dlp: вызывается в потоке скачивания, поэтому пауза в нем
+        замедляет саму загрузку"""
+        if d.get('status') != 'downloading':
+            return
+        key = d.get('tmpfilename') or d.get('filename') or ''
+        received = d.get('downloaded_bytes') or 0
+        with self.governor._lock:
+            # Сегментный движок сообщает растущий итог из нескольких потоков
+            delta = received - self._reported.get(key, 0)
+            if delta > 0:
+                self._reported[key] = received
+        self.consume(delta)
+
+
+class BandwidthGovernor:
+    """Общий для процесса распределитель полосы между загрузками"""
+
+    def __init__(self, bytes_per_sec: float = 0, schedule: Sequence[dict] = (),
+                 priority_weight: float = PRIORITY_WEIGHT,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep,
+                 now: Callable[[], datetime] = datetime.now):
+        self.default_budget = bytes_per_sec
+        self.schedule = list(schedule)
+        self.priority_weight = priority_weight
+        self._clock = clock
+        self._sleep = sleep
+        self._now = now
+        self._lock = threading.Lock()
+        self._streams: List[BandwidthStream] = []
+        self._last_allocation = clock()
+        self.budget = self._current_budget()
+
+    @classmethod
+    def from_settings(cls) -> 'BandwidthGovernor':
+        """Распределитель с настройками BANDWIDTH из конфига"""
+        settings = get_setting('BANDWIDTH', {})
+        return cls(bytes_per_sec=settings.get('bytes_per_sec', 0),
+                   schedule=settings.get('schedule', ()),
+                   priority_weight=settings.get('priority_weight', PRIORITY_WEIGHT))
+
+    def _current_budget(self) -> float:
+        return budget_at(self.default_budget, self.schedule, self._now())
+
+    @contextmanager
+    def stream(self, name: str, priority: bool = False) -> Iterator[BandwidthStream]:
+        """Загрузка на время блока with (приоритетная - с большим весом)"""
+        stream = BandwidthStream(self, name, self.priority_weight if priority else 1.0)
+        with self._lock:
+            self._streams.append(stream)
+            self._share()
+        try:
+            yield stream
+        finally:
+            with self._lock:
+                self._streams.remove(stream)
+                self._share()
+
+    def _measure(self, now: float):
+        """Скорости загрузок за прошедший интервал (вызывается под блокировкой)"""
+        elapsed = now - self._last_allocation
+        for stream in self._streams:
+            measured = stream._bytes / elapsed
+            stream.rate = measured if stream.fresh else (
+                RATE_SMOOTHING * measured + (1 - RATE_SMOOTHING) * stream.rate)
+            stream._bytes = 0
+            stream.fresh = now - stream.started < REALLOCATE_INTERVAL
+        self._last_allocation = now
+
+    def _share(self):
+        """Доли загрузок по бюджету, весам и измеренным скоростям (под блокировкой)"""
+        self.budget = self._current_budget()
+        if not self.budget or not self._streams:
+            for stream in self._streams:
+                stream.allocated = 0.0
+            return
+
+        demands = [
+            None if stream.fresh or stream.rate >= SATURATION * stream.allocated
+            else max(stream.rate * HEADROOM, MIN_SHARE)  # Не выбирает свою долю - остаток другим
+            for stream in self._streams
+        ]
+        shares = allocate(self.budget, [stream.weight for stream in self._streams], demands)
+        for stream, share in zip(self._streams, shares):
+            stream.allocated = share
+
+    def _consume(self, stream: BandwidthStream, count: int):
+        """Учет байтов и пауза, если загрузка обгоняет свою долю"""
+        with self._lock:
+            now = self._clock()
+            stream._bytes += count
+            if now - self._last_allocation >= REALLOCATE_INTERVAL:
+                self._measure(now)
+                self._share()
+            if not stream.allocated:
+                return
+            stream._available_at = max(stream._available_at, now - BURST_SECONDS) + count / stream.allocated
+            delay = stream._available_at - now
+        if delay > 0:
+            self._sleep(delay)
+
+    def summary(self) -> str:
+        """Текущая и выделенная скорость для строки прогресса"""
+        with self._lock:
+            current = sum(stream.rate for stream in self._streams)
+            active = len(self._streams)
+            budget = self.budget
+        if not budget:
+            return f"↓ {format_rate(current)} (без лимита), загрузок: {active}"
+        return f"↓ {format_rate(current)} из {format_rate(budget)}, загрузок: {active}"
+
+    def allocations(self) -> Dict[str, float]:
+        """Выделенная скорость каждой загрузки"""
+        with self._lock:
+            return {stream.name: stream.allocated for stream in self._streams}
+
+
+_default_governor: Optional[BandwidthGovernor] = None
+_default_governor_lock = threading.Lock()
+
+
+def get_bandwidth_governor() -> BandwidthGovernor:
+    """Общий распределитель полосы процесса"""
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = BandwidthGovernor.from_settings()
+        return _default_governor
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📚 Книги и потоковый парсер списка книг
+Общий для всех загрузчиков разбор books.txt: строки читаются по одной,
+шаблоны скомпилированы заранее, нераспознанные строки собираются в отчет
+"""
+
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Поддерживаемые форматы строк:
+# 1. Номерованный: "1. Автор - Название | Чтец: Имя (2024)"
+# 2. Простой с обычным тире: "Автор - Название"
+# 3. Простой с длинным тире: "Автор — Название"
+# 4. С запятой и подзаголовком: "Автор — Название серии N, Подзаголовок"
+NUMBERED_PATTERN = re.compile(
+    r'^(\d+)\.\s+([^-]+)-\s*([^|]+)(?:\|\s*Чтец:\s*([^(]+?)\s*\((\d{4})\))?$'
+)
+
+# Тире в окружении пробелов: автор может содержать дефис ("Жан-Кристоф Гранже - ...")
+SPACED_DASH_PATTERN = re.compile(r'^(.+?)\s+-\s+(.+)$')
+SIMPLE_PATTERN = re.compile(r'^([^-]+?)\s*-\s*(.+)$')
+
+# Сколько нераспознанных строк показывать в отчете
+MAX_REPORTED_ERRORS = 10
+
+
+# Шаблоны очистки для поисковых запросов и имен файлов
+QUOTES_PATTERN = re.compile(r'[«»""„"]')
+QUOTES_DOTS_PATTERN = re.compile(r'[«»""„"\.]')
+SPACES_PATTERN = re.compile(r'\s+')
+INITIALS_PATTERN = re.compile(r'(\b[А-ЯЁA-Z])\.')
+NUMBERS_PATTERN = re.compile(r'\b\d+\b')
+UNSAFE_FILENAME_PATTERN = re.compile(r'[^\w\s\-\.]')
+FILENAME_SEPARATOR_PATTERN = re.compile(r'[-\s]+')
+
+
+def _strip_dashes(text: str) -> str:
+    """Убираем длинное и среднее тире"""
+    return text.replace('—', '').replace('–', '')
+
+
+def _clean_for_query(text: str) -> str:
+    """Очистка автора или названия для основного запроса"""
+    text = QUOTES_PATTERN.sub('', text)  # Убираем кавычки
+    text = SPACES_PATTERN.sub(' ', _strip_dashes(text)).strip()  # Убираем тире, нормализуем пробелы
+    return INITIALS_PATTERN.sub(r'\1', text)  # Убираем точки из сокращений (А. -> А)
+
+
+class DerivedForms(NamedTuple):
+    """Производные формы книги, вычисляемые один раз"""
+    full_title: str
+    clean_author: str
+    clean_title: str
+    search_queries: Tuple[str, ...]
+    filename: str
+
+
+@dataclass(slots=True)
+class BookInfo:
+    """Класс для хранения информации о книге
+    
+    Компактная запись со __slots__. Производные формы (полное название,
+    очищенные автор и название, поисковые запросы, имя файла) вычисляются
+    один раз - при первом обращении или в prepare_books - и запоминаются.
+    Поля книги после создания не меняются.
+    """
+    id: int
+    author: str
+    title: str
+    subtitle: str = ""
+    narrator: str = ""
+    year: str = ""
+    category: str = ""
+    _derived: Optional[DerivedForms] = field(default=None, init=False, repr=False, compare=False)
+    
+    def prepare(self) -> DerivedForms:
+        """Вычислить все производные формы за один проход"""
+        if self._derived is not None:
+            return self._derived
+        
+        full_title = f"{self.author} - {self.title}"
+        if self.subtitle:
+            full_title += f": {self.subtitle}"
+        
+        clean_author = _clean_for_query(self.author)
+        clean_title = _clean_for_query(self.title)
+        
+        # Основной запрос
+        queries = [f"{clean_author} {clean_title} аудиокнига"]
+        
+        # Запрос только по автору
+        author = SPACES_PATTERN.sub(' ', _strip_dashes(QUOTES_DOTS_PATTERN.sub('', self.author))).strip()
+        queries.append(f"{author} аудиокнига")
+        
+        # Запрос без номеров серий
+        title_no_numbers = NUMBERS_PATTERN.sub('', self.title).strip()
+        if title_no_numbers and title_no_numbers != self.title:
+            title = SPACES_PATTERN.sub(' ', _strip_dashes(QUOTES_DOTS_PATTERN.sub('', title_no_numbers))).strip()
+            queries.append(f"{author} {title} аудиокнига")
+        
+        # Запрос с "полная версия"
+        title_full = _strip_dashes(QUOTES_DOTS_PATTERN.sub('', self.title))
+        queries.append(f"{author} {title_full} полная версия")
+        
+        safe_name = UNSAFE_FILENAME_PATTERN.sub('', full_title)
+        safe_name = FILENAME_SEPARATOR_PATTERN.sub('-', safe_name)[:100]  # Ограничиваем длину
+        
+        self._derived = DerivedForms(
+            full_title=full_title,
+            clean_author=clean_author,
+            clean_title=clean_title,
+            search_queries=tuple(dict.fromkeys(queries)),  # Убираем дубликаты, сохраняя приоритет
+            filename=safe_name
+        )
+        return self._derived
+    
+    @property
+    def full_title(self) -> str:
+        """Полное название книги"""
+        return self.prepare().full_title
+    
+    @property
+    def clean_author(self) -> str:
+        """Автор без кавычек, тире и точек в сокращениях"""
+        return self.prepare().clean_author
+    
+    @property
+    def clean_title(self) -> str:
+        """Название без кавычек, тире и точек в сокращениях"""
+        return self.prepare().clean_title
+    
+    @property
+    def search_query(self) -> str:
+        """Умный запрос для поиска с очисткой проблематичных символов"""
+        return self.prepare().search_queries[0]
+    
+    @property 
+    def alternative_search_queries(self) -> list[str]:
+        """Альтернативные поисковые запросы для сложных случаев"""
+        return list(self.prepare().search_queries)
+    
+    @property
+    def filename(self) -> str:
+        """Безопасное имя файла"""
+        return self.prepare().filename
+
+
+def prepare_books(books: Iterable[BookInfo]) -> List[BookInfo]:
+    """Подготовить производные формы для всего списка книг за один проход"""
+    books = list(books)
+    for book in books:
+        book.prepare()
+    return books
+
+
+def _split_title(title_part: str) -> Tuple[str, str]:
+    """Название и подзаголовок: по первой запятой ("Серия N, Подзаголовок") или двоеточию"""
+    for separator in (',', ':'):
+        if separator in title_part:
+            title, subtitle = title_part.split(separator, 1)
+            return title.strip(), subtitle.strip()
+    return title_part, ""
+
+
+def parse_book_line(line: str, category: str = "") -> Optional[BookInfo]:
+    """Разбор одной строки с книгой (строка уже без пробелов по краям)"""
+    # Длинное и среднее тире приводятся к обычному
+    normalized_line = line.replace('—', '-').replace('–', '-')
+    
+    # Номерованный формат пробуем только для строк, начинающихся с цифры
+    match = NUMBERED_PATTERN.match(normalized_line) if line[0].isdigit() else None
+    if match:
+        book_id, author, title_part, narrator, year = match.groups()
+        title, subtitle = _split_title(title_part.strip())
+        return BookInfo(
+            id=int(book_id),
+            author=author.strip(),
+            title=title,
+            subtitle=subtitle,
+            narrator=narrator.strip() if narrator else "",
+            year=year or "",
+            category=category
+        )
+    
+    match = SPACED_DASH_PATTERN.match(normalized_line) or SIMPLE_PATTERN.match(normalized_line)
+    if not match:
+        return None
+    
+    # Простой формат - стабильный ID из текста строки
+    book_id = int(hashlib.md5(line.encode()).hexdigest()[:8], 16) % 100000
+    title, subtitle = _split_title(match.group(2).strip())
+    return BookInfo(
+        id=book_id,
+        author=match.group(1).strip(),
+        title=title,
+        subtitle=subtitle,
+        category=category
+    )
+
+
+class BookListParser:
+    """Потоковый парсер файла со списком книг
+    
+    ``iter_books`` читает файл построчно и отдает книги по одной, поэтому
+    память не зависит от размера списка. Нераспознанные строки не пишутся
+    в лог по одной, а собираются в ``errors`` и выводятся одним отчетом.
+    """
+    
+    def __init__(self, file_path):
+        self.file_path = Path(file_path)
+        self.errors: List[Tuple[int, str]] = []
+        self.error_count = 0
+    
+    def iter_books(self) -> Iterator[BookInfo]:
+        """Книги из файла по мере чтения"""
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"Файл {self.file_path} не найден!")
+        
+        self.errors = []
+        self.error_count = 0
+        current_category = ""
+        
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                
+                # Категория: "## Название"
+                if line.startswith('##'):
+                    current_category = line.lstrip('#').strip()
+                    continue
+                
+                # Комментарий
+                if line.startswith('#'):
+                    continue
+                
+                book = parse_book_line(line, current_category)
+                if book is None:
+                    self.error_count += 1
+                    if len(self.errors) < MAX_REPORTED_ERRORS:
+                        self.errors.append((line_no, line))
+                    continue
+                
+                yield book
+        
+        self.report_errors()
+    
+    def parse(self) -> List[BookInfo]:
+        """Все книги файла списком"""
+        return list(self.iter_books())
+    
+    def report_errors(self):
+        """Один отчет о всех нераспознанных строках"""
+        if not self.error_count:
+            return
+        examples = "; ".join(f"{line_no}: {line}" for line_no, line in self.errors)
+        more = self.error_count - len(self.errors)
+        suffix = f" (и еще {more})" if more > 0 else ""
+        logger.warning(
+            f"Не удалось распарсить {self.error_count} строк в {self.file_path.name}: {examples}{suffix}"
+        )
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🔌 Автоматический выключатель (circuit breaker) для хостов
+Общий для всех рабочих потоков: при блокировке хоста работа с ним
+приостанавливается, вместо того чтобы тратить попытки впустую
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+# Признаки блокировки всего хоста (кормят выключатель)
+HOST_BLOCK_INDICATORS = (
+    'http error 403',
+    'http error 429',
+    'sign in to confirm',
+    'sabr streaming',
+)
+
+# Признаки недоступности конкретного ролика (хост при этом работает)
+VIDEO_BLOCK_INDICATORS = (
+    'video unavailable',
+    'private video',
+    'age-restricted',
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def is_host_block_error(error_msg: str) -> bool:
+    """Ошибка означает блокировку хоста (а не одного ролика)"""
+    message = error_msg.lower()
+    return any(indicator in message for indicator in HOST_BLOCK_INDICATORS)
+
+
+def decorrelated_jitter(previous: float, base: float, cap: float) -> float:
+    """Следующая задержка по схеме «decorrelated jitter»: случайная в [base, previous*3]"""
+    return min(cap, random.uniform(base, max(base, previous) * 3))
+
+
+class CircuitBreaker:
+    """Выключатель одного хоста: closed -> open -> half-open -> closed"""
+
+    def __init__(self, failure_threshold: int = 3, base_cooldown: float = 30.0,
+                 max_cooldown: float = 900.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._cooldown = 0.0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+
+    def allow(self, now: float) -> bool:
+        """Можно ли сейчас обращаться к хосту (в half-open - только одной пробе)"""
+        if self.state == OPEN and now >= self._open_until:
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def retry_after(self, now: float) -> float:
+        """Сколько секунд осталось до пробного запроса"""
+        if self.state == OPEN:
+            return max(0.0, self._open_until - now)
+        return 0.0
+
+    def record_success(self):
+        """Хост ответил нормально - выключатель замыкается"""
+        self.state = CLOSED
+        self.failures = 0
+        self._cooldown = 0.0
+        self._probe_in_flight = False
+
+    def release(self):
+        """Исход пробы неизвестен - разрешаем следующую пробу"""
+        self._probe_in_flight = False
+
+    def record_failure(self, now: float):
+        """Обнаружена блокировка хоста"""
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            # Каждое новое размыкание - более длинная пауза со случайным разбросом
+            self._cooldown = decorrelated_jitter(self._cooldown, self.base_cooldown, self.max_cooldown)
+            self._open_until = now + self._cooldown
+            self.state = OPEN
+            self.trips += 1
+            self._probe_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Выключатели всех хостов процесса"""
+
+    def __init__(self, failure_threshold: int = 3, base_cooldown: float = 30.0,
+                 max_cooldown: float = 900.0):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._condition = threading.Condition()
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        """Выключатель хоста (вызывается под блокировкой)"""
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.base_cooldown, self.max_cooldown)
+            self._breakers[host] = breaker
+        return breaker
+
+    def state(self, host: str) -> str:
+        """Текущее состояние выключателя хоста"""
+        with self._condition:
+            return self._breaker(host).state
+
+    def allow(self, host: str) -> bool:
+        """Разрешен ли запрос к хосту прямо сейчас"""
+        with self._condition:
+            return self._breaker(host).allow(time.monotonic())
+
+    def is_open(self, host: str) -> bool:
+        """Хост заблокирован и пробный период еще не наступил"""
+        with self._condition:
+            breaker = self._breaker(host)
+            return breaker.state == OPEN and breaker.retry_after(time.monotonic()) > 0
+
+    def retry_after(self, host: str) -> float:
+        """Секунд до пробного запроса к хосту"""
+        with self._condition:
+            return self._breaker(host).retry_after(time.monotonic())
+
+    def wait_until_allowed(self, host: str, timeout: Optional[float] = None) -> bool:
+        """Дождаться разрешения на запрос к хосту (пауза вместо сгоревших попыток)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                breaker = self._breaker(host)
+                if breaker.allow(now):
+                    return True
+                if deadline is not None and now >= deadline:
+                    return False
+
+                wait = breaker.retry_after(now) or 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                self._condition.wait(wait)
+
+    def record_success(self, host: str):
+        """Успешный (или не связанный с блокировкой) ответ хоста"""
+        with self._condition:
+            self._breaker(host).record_success()
+            self._condition.notify_all()
+
+    def release(self, host: str):
+        """Запрос завершился ошибкой, не говорящей о состоянии хоста"""
+        with self._condition:
+            self._breaker(host).release()
+            self._condition.notify_all()
+
+    def record_failure(self, host: str):
+        """Блокировка, обнаруженная любым рабочим потоком"""
+        with self._condition:
+            self._breaker(host).record_failure(time.monotonic())
+            self._condition.notify_all()
+
+
+_default_registry: Optional[CircuitBreakerRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Общий реестр выключателей процесса"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = CircuitBreakerRegistry()
+        return _default_registry
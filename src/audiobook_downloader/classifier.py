@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🏷️ Классификатор категорий книг
+Правила из конфига компилируются один раз в общее регулярное выражение,
+которое за один проход находит регионы, жанры и известных авторов
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from .settings import get_setting
+
+# Правила на случай, если в конфиге нет CATEGORY_RULES
+DEFAULT_CATEGORY_RULES = {
+    'regions': {
+        'foreign': ['зарубежная', 'зарубеж', 'foreign'],
+        'russian': ['российская', 'русская', 'russian'],
+    },
+    'genres': {
+        'fantasy': ['фантастика', 'фэнтези', 'мистика', 'ужасы', 'фанфики', 'fantasy'],
+        'detective': ['детектив', 'триллер', 'боевик', 'detective', 'thriller'],
+    },
+    'authors': {},
+    'default_region': 'russian',
+    'default_genre': 'fantasy',
+}
+
+# Уверенность классификации по источнику признаков
+CONFIDENCE_HEADER = 1.0         # Регион и жанр из заголовка категории
+CONFIDENCE_AUTHOR = 0.8         # Известный автор
+CONFIDENCE_HEADER_PARTIAL = 0.6 # Только регион или только жанр из заголовка
+CONFIDENCE_TITLE = 0.4          # Жанр из названия книги
+CONFIDENCE_DEFAULT = 0.1        # Ничего не найдено
+
+# Сколько разных заголовков категорий и авторов запоминать
+SCAN_CACHE_SIZE = 65536
+
+
+class Classification(NamedTuple):
+    """Результат классификации: папка категории и уверенность 0..1"""
+    label: str
+    confidence: float
+    reason: str
+
+
+class CategoryClassifier:
+    """Классификатор книг по папкам "<регион>_<жанр>"
+    
+    Ключевые слова регионов и жанров ищутся как подстроки (как и раньше),
+    имена авторов - как отдельные слова, чтобы "дик" не находился в "Дикий".
+    """
+    
+    def __init__(self, rules: Optional[Dict] = None):
+        self.rules = rules or get_setting('CATEGORY_RULES', DEFAULT_CATEGORY_RULES)
+        self.default_region = self.rules.get('default_region', 'russian')
+        self.default_genre = self.rules.get('default_genre', 'fantasy')
+        
+        # Приоритет: порядок ключей в конфиге
+        self._region_rank = {name: rank for rank, name in enumerate(self.rules.get('regions', {}))}
+        self._genre_rank = {name: rank for rank, name in enumerate(self.rules.get('genres', {}))}
+        self._author_rank = {name: rank for rank, name in enumerate(self.rules.get('authors', {}))}
+        
+        # Совпавший текст -> (тип признака, значение)
+        self._keywords: Dict[str, tuple] = {}
+        for kind in ('regions', 'genres'):
+            for name, keywords in self.rules.get(kind, {}).items():
+                for keyword in keywords:
+                    self._keywords.setdefault(keyword.lower(), (kind, name))
+        self._authors: Dict[str, str] = {}
+        for label, authors in self.rules.get('authors', {}).items():
+            for author in authors:
+                self._authors.setdefault(author.lower(), label)
+        
+        self.pattern = self._compile()
+        self._scan_cached = lru_cache(maxsize=SCAN_CACHE_SIZE)(self._scan)
+        self._classify_cached = lru_cache(maxsize=SCAN_CACHE_SIZE)(self._classify_without_title)
+    
+    def _compile(self) -> re.Pattern:
+        """Одно выражение для всех ключевых слов и авторов (длинные - первыми)"""
+        alternatives = [re.escape(keyword) for keyword in sorted(self._keywords, key=len, reverse=True)]
+        authors = [re.escape(author) for author in sorted(self._authors, key=len, reverse=True)]
+        if authors:
+            alternatives.append(r'(?<!\w)(?P<author>' + '|'.join(authors) + r')(?!\w)')
+        if not alternatives:
+            return re.compile(r'(?!x)x')  # Ничего не совпадает
+        return re.compile('|'.join(alternatives))
+    
+    def _best(self, found: set, rank: Dict[str, int]) -> Optional[str]:
+        """Самое приоритетное из найденных значений"""
+        return min(found, key=rank.__getitem__) if found else None
+    
+    def _scan(self, text: str) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
+        """Регионы, жанры и авторы, найденные в тексте (один проход выражения)"""
+        regions, genres, authors = set(), set(), set()
+        for match in self.pattern.finditer(text.lower()):
+            if match.lastgroup == 'author':
+                authors.add(self._authors[match.group()])
+                continue
+            kind, name = self._keywords[match.group()]
+            (regions if kind == 'regions' else genres).add(name)
+        return frozenset(regions), frozenset(genres), frozenset(authors)
+    
+    def _classify_without_title(self, category: str, author: str) -> Optional[Classification]:
+        """Классификация по заголовку и автору (None - нужно название)"""
+        header_regions, header_genres, _ = self._scan_cached(category)
+        region = self._best(header_regions, self._region_rank)
+        genre = self._best(header_genres, self._genre_rank)
+        
+        if region and genre:
+            return Classification(f"{region}_{genre}", CONFIDENCE_HEADER, 'category')
+        
+        authors = self._scan_cached(author)[2]
+        if authors:
+            return Classification(self._best(authors, self._author_rank), CONFIDENCE_AUTHOR, 'author')
+        
+        if genre:
+            return Classification(f"{self.default_region}_{genre}", CONFIDENCE_HEADER_PARTIAL, 'category')
+        return None
+    
+    def classify(self, category: str = "", author: str = "", title: str = "") -> Classification:
+        """Папка категории для книги
+        
+        Заголовков категорий и авторов в каталоге немного, поэтому решение по
+        ним запоминается; название разбирается, только если без него не решить.
+        """
+        result = self._classify_cached(category, author)
+        if result is not None:
+            return result
+        
+        title_genre = self._best(self._scan(title)[1], self._genre_rank) if title else None
+        region = self._best(self._scan_cached(category)[0], self._region_rank)
+        
+        if region:
+            return Classification(
+                f"{region}_{title_genre or self.default_genre}", CONFIDENCE_HEADER_PARTIAL, 'category'
+            )
+        
+        if title_genre:
+            return Classification(f"{self.default_region}_{title_genre}", CONFIDENCE_TITLE, 'title')
+        
+        return Classification(
+            f"{self.default_region}_{self.default_genre}", CONFIDENCE_DEFAULT, 'default'
+        )
+    
+    def classify_many(self, books) -> List[Classification]:
+        """Классификация списка книг (BookInfo)"""
+        classify = self.classify
+        return [classify(book.category, book.author, book.title) for book in books]
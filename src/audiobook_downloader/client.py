@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📡 Клиент фонового режима
+Тонкий клиент HTTP API демона: постановка книг и файлов списка в очередь,
+состояние, приоритеты и отмена. Сам ничего не скачивает - очередь и
+загрузка живут в демоне
+"""
+
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from .books import BookInfo
+from .jobqueue import BOOK_FIELDS
+from .settings import get_setting
+
+console = Console()
+
+# Адрес API по умолчанию (DAEMON в конфиге): только локальный
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+STATUS_LABELS = {
+    'queued': "⏳ В очереди",
+    'running': "📥 В работе",
+    'done': "✅ Готово",
+    'failed': "❌ Ошибка",
+    'cancelled': "🚫 Отменено",
+}
+
+
+class DaemonError(Exception):
+    """Демон недоступен или отклонил команду"""
+
+
+class DaemonClient:
+    """Команды демону по HTTP"""
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 10.0):
+        if base_url is None:
+            settings = get_setting('DAEMON', {})
+            base_url = f"http://{settings.get('host', DEFAULT_HOST)}:{settings.get('port', DEFAULT_PORT)}"
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def _request(self, method: str, path: str, **kwargs) -> dict:
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise DaemonError(f"Демон недоступен ({self.base_url}): {e}") from e
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        if not response.ok:
+            raise DaemonError(payload.get('error') or f"HTTP {response.status_code}")
+        return payload
+
+    def is_running(self) -> bool:
+        """Отвечает ли демон"""
+        try:
+            self.status()
+            return True
+        except DaemonError:
+            return False
+
+    def status(self) -> dict:
+        """Состояние очереди, скорость, диск и перекодирование"""
+        return self._request('GET', '/status')
+
+    def jobs(self, status: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[dict]:
+        """Задания в порядке очереди"""
+        params = {'limit': limit, 'offset': offset}
+        if status:
+            params['status'] = status
+        return self._request('GET', '/jobs', params=params)['jobs']
+
+    def job(self, job_id: int) -> dict:
+        """Одно задание"""
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def enqueue_books(self, books: Iterable[BookInfo], priority: int = 0) -> List[int]:
+        """Поставить книги в очередь, вернуть номера новых заданий"""
+        payload = {
+            'books': [{key: getattr(book, key) for key in BOOK_FIELDS} for book in books],
+            'priority': priority,
+        }
+        return self._request('POST', '/jobs', json=payload)['added']
+
+    def enqueue_lines(self, lines: Iterable[str], priority: int = 0, category: str = "") -> dict:
+        """Поставить книги из строк формата списка («Автор - Название»)"""
+        payload = {'lines': list(lines), 'priority': priority, 'category': category}
+        return self._request('POST', '/jobs', json=payload)
+
+    def enqueue_file(self, path, priority: int = 0) -> dict:
+        """Поставить в очередь файл списка (демон читает его сам и в фоне - путь абсолютный)"""
+        payload = {'path': str(Path(path).resolve()), 'priority': priority}
+        return self._request('POST', '/jobs/file', json=payload)
+
+    def set_priority(self, job_id: int, priority: int) -> dict:
+        """Изменить приоритет задания"""
+        return self._request('POST', f'/jobs/{job_id}/priority', json={'priority': priority})
+
+    def cancel(self, job_id: int) -> dict:
+        """Отменить задание"""
+        return self._request('POST', f'/jobs/{job_id}/cancel')
+
+    def shutdown(self) -> dict:
+        """Остановить демон (начатые книги доскачиваются)"""
+        return self._request('POST', '/shutdown')
+
+
+def show_status(client: DaemonClient, limit: int = 20):
+    """Сводка очереди и ближайшие задания"""
+    status = client.status()
+    summary = Table(title="🛰️ Демон")
+    summary.add_column("Состояние", style="bold")
+    summary.add_column("Значение")
+    for name, count in status['jobs'].items():
+        summary.add_row(STATUS_LABELS.get(name, name), str(count))
+    summary.add_row("🚦 Скорость", status['bandwidth'], style="dim")
+    summary.add_row("💽 Диск", status['disk'], style="dim")
+    summary.add_row("🎛️ Перекодирование", status['transcode'], style="dim")
+    console.print(summary)
+
+    jobs = client.jobs(limit=limit)
+    if not jobs:
+        return
+    table = Table(title="📋 Задания")
+    table.add_column("№", style="cyan")
+    table.add_column("Книга")
+    table.add_column("Приоритет", justify="right")
+    table.add_column("Состояние")
+    for job in jobs:
+        title = f"{job['author']} - {job['title']}" + (f": {job['subtitle']}" if job['subtitle'] else "")
+        table.add_row(str(job['job_id']), title, str(job['priority']),
+                      STATUS_LABELS.get(job['status'], job['status']))
+    console.print(table)
+
+
+def main():
+    """Консольный клиент демона"""
+    client = DaemonClient()
+    if not client.is_running():
+        console.print(f"[red]❌ Демон не отвечает по адресу {client.base_url}[/red]")
+        console.print("[dim]💡 Запустите: python launchers/daemon.py[/dim]")
+        return 1
+
+    actions = {
+        "1": "Поставить файл списка в очередь",
+        "2": "Поставить книгу («Автор - Название»)",
+        "3": "Состояние очереди",
+        "4": "Изменить приоритет",
+        "5": "Отменить задание",
+        "6": "Остановить демон",
+        "7": "Выход",
+    }
+    while True:
+        console.print("\n[bold]🛰️ Команды демону:[/bold]")
+        for key, label in actions.items():
+            console.print(f"{key}. {label}")
+        choice = console.input("\n[bold]Выберите опцию (1-7): [/bold]").strip()
+
+        try:
+            if choice == "1":
+                default = Path(__file__).parent.parent.parent / "data" / "books.txt"
+                path = console.input(f"Файл списка (Enter для {default}): ").strip() or default
+                priority = console.input("Приоритет (Enter для 0): ").strip()
+                client.enqueue_file(path, priority=int(priority or 0))
+                console.print("[green]✅ Файл принят: книги появятся в очереди по мере разбора[/green]")
+            elif choice == "2":
+                line = console.input("Книга: ").strip()
+                result = client.enqueue_lines([line])
+                if result['rejected']:
+                    console.print("[yellow]⚠️ Строка не распознана[/yellow]")
+                else:
+                    console.print(f"[green]✅ Новых заданий: {len(result['added'])}[/green]")
+            elif choice == "3":
+                show_status(client)
+            elif choice == "4":
+                job_id = int(console.input("Номер задания: "))
+                client.set_priority(job_id, int(console.input("Новый приоритет: ")))
+                console.print("[green]✅ Приоритет изменен[/green]")
+            elif choice == "5":
+                client.cancel(int(console.input("Номер задания: ")))
+                console.print("[green]✅ Задание отменено[/green]")
+            elif choice == "6":
+                client.shutdown()
+                console.print("[yellow]⏹️ Демон останавливается (начатые книги доскачиваются)[/yellow]")
+                return 0
+            elif choice == "7":
+                return 0
+        except ValueError:
+            console.print("[red]❌ Нужно число[/red]")
+        except DaemonError as e:
+            console.print(f"[red]❌ {e}[/red]")
+
+
+if __name__ == "__main__":
+    main()
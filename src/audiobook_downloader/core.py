@@ -9,14 +9,18 @@
 Дата: 10 августа 2025
 """
 
+import functools
 import os
 import re
 import json
 import time
 import logging
 import sys
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Set, Tuple
 import requests
 from urllib.parse import quote, unquote
 
@@ -55,14 +59,32 @@ check_environment()
 
 import yt_dlp
 from googlesearch import search
-from dataclasses import dataclass
 from rich.console import Console
-from rich.progress import Progress, TaskID
+from rich.progress import Progress, ProgressColumn, TaskID
 from rich.table import Table
 from rich.panel import Panel
 from rich.text import Text
 from rich import print as rprint
 
+from .bandwidth import BandwidthGovernor, format_rate, get_bandwidth_governor
+from .books import BookInfo, BookListParser, prepare_books
+from .breaker import get_circuit_breakers, is_host_block_error
+from .classifier import CategoryClassifier
+from .dedup import DedupResult, deduplicate_books
+from .diskspace import DiskAdmission, Reservation, estimate_download_size, estimate_output_size
+from .metadata_cache import MetadataCache
+from .paths import author_dir_name, series_dir_name
+from .pipeline import ResolveDownloadPipeline
+from .progress_store import PartialDownload, ProgressRecord, ProgressStore
+from .ranking import RankedCandidate, get_ranker
+from .resolved import ResolvedInfoCache
+from .scheduler import HostPoliteness, SchedulerResult, host_of
+from .search_cache import SearchCache
+from .segmented import backend_options
+from .settings import get_setting
+from .transcode import DEFAULT_PROFILE, OutputProfile, TranscodeResult, TranscodeStage
+from .sessions import get_session_pool
+
 # Настройка логирования
 def setup_logging():
     """Настройка красивого логирования"""
@@ -84,187 +106,84 @@ def setup_logging():
 logger = setup_logging()
 console = Console()
 
-@dataclass
-class BookInfo:
-    """Класс для хранения информации о книге"""
-    id: int
-    author: str
-    title: str
-    subtitle: str = ""
-    narrator: str = ""
-    year: str = ""
-    category: str = ""
-    
-    @property
-    def full_title(self) -> str:
-        """Полное название книги"""
-        result = f"{self.author} - {self.title}"
-        if self.subtitle:
-            result += f": {self.subtitle}"
-        return result
-    
-    @property
-    def search_query(self) -> str:
-        """Умный запрос для поиска с очисткой проблематичных символов"""
-        # Очищаем автора и название от проблематичных символов
-        clean_author = re.sub(r'[«»""„"]', '', self.author)  # Убираем кавычки
-        clean_author = clean_author.replace('—', '').replace('–', '')  # Убираем тире
-        clean_author = re.sub(r'\s+', ' ', clean_author).strip()  # Нормализуем пробелы
-        
-        clean_title = re.sub(r'[«»""„"]', '', self.title)  # Убираем кавычки
-        clean_title = clean_title.replace('—', '').replace('–', '')  # Убираем тире
-        clean_title = re.sub(r'\s+', ' ', clean_title).strip()  # Нормализуем пробелы
-        
-        # Убираем точки из сокращений (А. -> А)
-        clean_author = re.sub(r'(\b[А-ЯЁA-Z])\.', r'\1', clean_author)
-        clean_title = re.sub(r'(\b[А-ЯЁA-Z])\.', r'\1', clean_title)
-        
-        return f"{clean_author} {clean_title} аудиокнига"
-    
-    @property 
-    def alternative_search_queries(self) -> list[str]:
-        """Альтернативные поисковые запросы для сложных случаев"""
-        queries = []
-        
-        # Основной запрос
-        queries.append(self.search_query)
-        
-        # Запрос только по автору
-        clean_author = re.sub(r'[«»""„"\.]', '', self.author)
-        clean_author = clean_author.replace('—', '').replace('–', '')
-        clean_author = re.sub(r'\s+', ' ', clean_author).strip()
-        queries.append(f"{clean_author} аудиокнига")
-        
-        # Запрос без номеров серий
-        title_no_numbers = re.sub(r'\b\d+\b', '', self.title).strip()
-        if title_no_numbers and title_no_numbers != self.title:
-            clean_title = re.sub(r'[«»""„"\.]', '', title_no_numbers)
-            clean_title = clean_title.replace('—', '').replace('–', '')
-            clean_title = re.sub(r'\s+', ' ', clean_title).strip()
-            queries.append(f"{clean_author} {clean_title} аудиокнига")
-        
-        # Запрос с "полная версия"
-        clean_title_full = re.sub(r'[«»""„"\.]', '', self.title)
-        clean_title_full = clean_title_full.replace('—', '').replace('–', '')
-        queries.append(f"{clean_author} {clean_title_full} полная версия")
-        
-        return list(set(queries))  # Убираем дубликаты
-    
-    @property
-    def filename(self) -> str:
-        """Безопасное имя файла"""
-        safe_name = re.sub(r'[^\w\s\-\.]', '', self.full_title)
-        safe_name = re.sub(r'[-\s]+', '-', safe_name)
-        return safe_name[:100]  # Ограничиваем длину
+# Профиль yt-dlp для поисковых запросов: плоское извлечение, без форматов
+# и полных метаданных каждого ролика (нужны только URL, название и длительность)
+SEARCH_YDL_OPTS = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'}
+
+# Профиль yt-dlp для полного извлечения метаданных одного ролика
+DETAILS_YDL_OPTS = {'quiet': True, 'no_warnings': True, 'noplaylist': True}
+
+# Минимальная длительность аудиокниги (секунды)
+MIN_BOOK_DURATION = 1800
+
+# Как часто сохранять состояние незавершенного скачивания (байты)
+PARTIAL_SAVE_STEP = 8 * 1024 * 1024
+
+# Сколько длительностей из выдачи поиска помнить для оценки места на диске
+SEARCH_DURATIONS_LIMIT = 4096
 
-class AudiobookParser:
+class AudiobookParser(BookListParser):
     """Парсер файла с аудиокнигами"""
     
-    def __init__(self, file_path: str):
-        self.file_path = Path(file_path)
-        
     def parse(self) -> List[BookInfo]:
         """Парсинг файла с книгами"""
-        if not self.file_path.exists():
-            raise FileNotFoundError(f"Файл {self.file_path} не найден!")
-        
-        books = []
-        current_category = ""
-        
-        with open(self.file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        lines = content.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Пропускаем пустые строки и комментарии
-            if not line or line.startswith('#'):
-                continue
-            
-            # Обнаружение категории
-            if line.startswith('##'):
-                current_category = line.replace('##', '').strip()
-                continue
-            
-            # Парсинг книги
-            book = self._parse_book_line(line, current_category)
-            if book:
-                books.append(book)
-        
+        books = super().parse()
         console.print(f"[green]✅ Найдено {len(books)} книг в файле[/green]")
+        if self.error_count:
+            console.print(f"[yellow]⚠️ Пропущено нераспознанных строк: {self.error_count}[/yellow]")
         return books
+
+class BandwidthColumn(ProgressColumn):
+    """Колонка прогресса: в общей строке - скорость всех загрузок и общий лимит,
+    в строке скачивания - выделенная ему доля полосы"""
     
-    def _parse_book_line(self, line: str, category: str) -> Optional[BookInfo]:
-        """Парсинг одной строки с книгой"""
-        # Поддержка нескольких форматов:
-        # 1. Номерованный: "1. Автор - Название | Чтец: Имя (2024)"
-        # 2. Простой с обычным тире: "Автор - Название"
-        # 3. Простой с длинным тире: "Автор — Название"
-        # 4. С запятой и подзаголовком: "Автор — Название серии N, Подзаголовок"
-        
-        # Сначала нормализуем тире (заменяем длинное тире на обычное)
-        normalized_line = line.replace('—', '-').replace('–', '-')
-        
-        # Пробуем номерованный формат
-        numbered_pattern = r'^(\d+)\.\s+([^-]+?)\s*-\s*([^|]+?)(?:\s*\|\s*Чтец:\s*([^(]+?)\s*\((\d{4})\))?$'
-        match = re.match(numbered_pattern, normalized_line.strip())
-        
-        if match:
-            # Номерованный формат
-            book_id = int(match.group(1))
-            author = match.group(2).strip()
-            title_part = match.group(3).strip()
-            narrator = match.group(4).strip() if match.group(4) else ""
-            year = match.group(5) if match.group(5) else ""
-        else:
-            # Пробуем простой формат "Автор - Название"
-            simple_pattern = r'^([^-]+?)\s*-\s*(.+)$'
-            simple_match = re.match(simple_pattern, normalized_line.strip())
-            
-            if not simple_match:
-                logger.warning(f"Не удалось распарсить строку: {line}")
-                return None
-            
-            # Простой формат - генерируем ID
-            import hashlib
-            book_id = int(hashlib.md5(line.encode()).hexdigest()[:8], 16) % 100000
-            author = simple_match.group(1).strip()
-            title_part = simple_match.group(2).strip()
-            narrator = ""
-            year = ""
-        
-        # Разделяем название и подзаголовок
-        # Если есть запятая, то разделяем по ней (для формата "Серия N, Подзаголовок")
-        if ',' in title_part:
-            # Разделяем по первой запятой
-            parts = title_part.split(',', 1)
-            title = parts[0].strip()
-            subtitle = parts[1].strip()
-        elif ':' in title_part:
-            # Разделяем по двоеточию
-            title, subtitle = title_part.split(':', 1)
-            title = title.strip()
-            subtitle = subtitle.strip()
-        else:
-            title = title_part
-            subtitle = ""
-        
-        return BookInfo(
-            id=book_id,
-            author=author,
-            title=title,
-            subtitle=subtitle,
-            narrator=narrator,
-            year=year,
-            category=category
-        )
+    def __init__(self, governor: BandwidthGovernor):
+        super().__init__()
+        self.governor = governor
+    
+    def render(self, task) -> Text:
+        stream = task.fields.get('stream')
+        if stream is None:
+            return Text(self.governor.summary(), style="cyan")
+        allocated = self.governor.allocations().get(stream)
+        if allocated is None:
+            return Text("")
+        return Text(f"доля {format_rate(allocated)}" if allocated else "без лимита", style="cyan")
+
+class DownloadRows:
+    """Строки прогресса активных скачиваний: байты книги и ее доля полосы"""
+    
+    def __init__(self, progress: Progress):
+        self.progress = progress
+        self._rows: Dict[int, TaskID] = {}
+        self._lock = threading.Lock()
+    
+    def hook(self, book: BookInfo, d: dict):
+        """Слушатель прогресса загрузчика (вызывается в потоке скачивания)"""
+        if d.get('status') != 'downloading':
+            return
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        with self._lock:
+            row = self._rows.get(book.id)
+            if row is None:
+                # Имя полосы - как у bandwidth.stream в download_from_url
+                row = self._rows[book.id] = self.progress.add_task(
+                    f"[blue]📥 {book.title[:40]}", total=total, stream=book.full_title
+                )
+        self.progress.update(row, completed=d.get('downloaded_bytes') or 0, total=total)
+    
+    def remove(self, book: BookInfo):
+        """Скачивание книги закончено - ее строка больше не нужна"""
+        with self._lock:
+            row = self._rows.pop(book.id, None)
+        if row is not None:
+            self.progress.remove_task(row)
 
 class AudiobookDownloader:
     """Основной класс для скачивания аудиокниг"""
     
-    def __init__(self, download_dir: str = "downloads"):
+    def __init__(self, download_dir: str = "downloads", max_workers: int = 3, lookahead: int = 3,
+                 output_profile: Optional[str] = None):
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
         
@@ -272,126 +191,220 @@ class AudiobookDownloader:
         self.mp3_dir = self.download_dir / "mp3_audiobooks"
         self.mp3_dir.mkdir(exist_ok=True)
         
-        # Настройки для yt-dlp с MP3 конвертацией
+        # Перекодирование (или перепаковка) в пуле процессов: скачивание не ждет
+        # процессора. Профиль результата - OUTPUT_PROFILES из конфига
+        self.transcoder = TranscodeStage.from_settings(output_profile)
+        
+        # Настройки для yt-dlp: сохраняется исходный аудиопоток,
+        # формат результата определяет профиль стадии перекодирования
         self.ydl_opts = {
-            'format': 'bestaudio/best',
+            'format': self.transcoder.profile.format,
             'ignoreerrors': True,
             'no_warnings': True,
             'outtmpl': str(self.mp3_dir / '%(title)s.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
             'writeinfojson': True,
             'writethumbnail': True,
+            # Движок скачивания медиафайлов (MEDIA_BACKEND: native или segmented)
+            **backend_options(),
         }
         
-        # Файл для отслеживания скачанных книг
-        self.progress_file = self.download_dir / 'download_progress.json'
-        self.downloaded_books = self._load_progress()
-    
-    def _load_progress(self) -> Dict[int, str]:
-        """Загрузка прогресса скачивания"""
-        if self.progress_file.exists():
-            with open(self.progress_file, 'r', encoding='utf-8') as f:
-                return {int(k): v for k, v in json.load(f).items()}
-        return {}
-    
-    def _save_progress(self):
-        """Сохранение прогресса"""
-        with open(self.progress_file, 'w', encoding='utf-8') as f:
-            json.dump(self.downloaded_books, f, ensure_ascii=False, indent=2)
-    
-    def _get_category_dir(self, category: str) -> Path:
-        """Получение директории для категории с улучшенной сортировкой"""
-        # Нормализуем категорию для поиска
-        category_lower = category.lower() if category else ""
-        
-        # Точное сопоставление категорий
-        if any(keyword in category_lower for keyword in ["зарубежная", "зарубеж", "foreign"]) and \
-           any(keyword in category_lower for keyword in ["фантастика", "фэнтези", "мистика", "ужасы", "фанфики", "fantasy"]):
-            return self.download_dir / "foreign_fantasy"
-        
-        elif any(keyword in category_lower for keyword in ["зарубежная", "зарубеж", "foreign"]) and \
-             any(keyword in category_lower for keyword in ["детектив", "триллер", "боевик", "detective", "thriller"]):
-            return self.download_dir / "foreign_detective"
-        
-        elif any(keyword in category_lower for keyword in ["российская", "русская", "russian"]) and \
-             any(keyword in category_lower for keyword in ["фантастика", "фэнтези", "мистика", "ужасы", "фанфики", "fantasy"]):
-            return self.download_dir / "russian_fantasy"
-        
-        elif any(keyword in category_lower for keyword in ["российская", "русская", "russian"]) and \
-             any(keyword in category_lower for keyword in ["детектив", "триллер", "боевик", "detective", "thriller"]):
-            return self.download_dir / "russian_detective"
-        
-        # Если категория не определена, анализируем автора
-        return self._guess_category_by_content(category)
-    
-    def _guess_category_by_content(self, category: str) -> Path:
-        """Угадывание категории по содержимому"""
-        # Список известных зарубежных авторов фантастики
-        foreign_fantasy_authors = [
-            "герберт", "толкин", "мартин", "роулинг", "кинг", "лавкрафт",
-            "азимов", "кларк", "хайнлайн", "дик", "брэдбери", "ле гуин"
-        ]
+        # Параллельная обработка: число рабочих потоков и вежливость к хостам
+        self.max_workers = max_workers
+        self.politeness = HostPoliteness()
         
-        # Список известных зарубежных авторов детективов
-        foreign_detective_authors = [
-            "кристи", "дойль", "стаут", "чандлер", "макдональд", "леонард",
-            "коннелли", "чайлд", "харрис", "гришэм", "фолетт"
-        ]
+        # Общие для процесса выключатели хостов: при блокировке работа ждет
+        self.breakers = get_circuit_breakers()
+        
+        # На сколько книг поиск опережает скачивание
+        self.lookahead = lookahead
+        
+        # Ранжирование кандидатов поиска (EXCLUDE_TERMS и SEARCH_FILTERS из конфига)
+        self.ranker = get_ranker()
+        
+        # Сортировка по папкам категорий (правила CATEGORY_RULES из конфига)
+        self.classifier = CategoryClassifier()
+        
+        # Общий пул сессий yt-dlp (экземпляры переиспользуются между книгами)
+        self.sessions = get_session_pool()
+        
+        # Допуск книг по свободному месту (DISK_SPACE из конфига)
+        self.disk = DiskAdmission.from_settings(self.download_dir)
+        
+        # Общий лимит скорости (BANDWIDTH из конфига); номера приоритетных книг
+        self.bandwidth = get_bandwidth_governor()
+        self.priority_ids: Set[int] = set()
         
-        # Анализируем по умолчанию как российскую фантастику
-        return self.download_dir / "russian_fantasy"
+        # Внешние слушатели прогресса: listener(книга, словарь хука yt-dlp)
+        self.progress_listeners: List[Callable[[BookInfo, dict], None]] = []
+        # Слушатели готовности результата: listener(книга, успех) - когда файл
+        # на месте (после перекодирования, если оно нужно). Вызываются для
+        # каждой книги, по которой download_resolved вернул True
+        self.completion_listeners: List[Callable[[BookInfo, bool], None]] = []
+        
+        # Общий пул поисковых запросов; None - свой пул на каждый поиск
+        self.search_executor: Optional[Executor] = None
+        
+        # Метаданные роликов из поиска: скачивание без повторного извлечения страницы
+        self.resolved = ResolvedInfoCache()
+        # Длительности из выдачи поиска: после плоского поиска полных метаданных
+        # нет, а оценке места на диске хватает длительности
+        self._search_durations: Dict[str, float] = {}
+        self._search_durations_lock = threading.Lock()
+        
+        # Постоянный кэш результатов поиска (повторные запуски не ищут заново)
+        self.search_cache = SearchCache(self.download_dir / 'search_cache.db')
+        
+        # Постоянный кэш метаданных роликов (ключ - экстрактор и id ролика)
+        self.metadata = MetadataCache(self.download_dir / 'metadata_cache.db')
+        
+        # База прогресса (старый download_progress.json импортируется автоматически)
+        self.progress_file = self.download_dir / 'download_progress.db'
+        self.downloaded_books = ProgressStore(
+            self.progress_file,
+            legacy_json=self.download_dir / 'download_progress.json'
+        )
+    
+    def set_output_profile(self, name: str):
+        """Выбор профиля результата на этот запуск (OUTPUT_PROFILES из конфига)"""
+        self.transcoder.profile = OutputProfile.from_settings(name)
+        self.ydl_opts['format'] = self.transcoder.profile.format
+    
+    def _record_download(self, record: ProgressRecord):
+        """Запись о скачанной книге (сразу попадает на диск)"""
+        self.downloaded_books.add(record)
+    
+    def _get_category_dir(self, category: str, author: str = "", title: str = "") -> Path:
+        """Директория категории: заголовок категории, затем известные авторы и название"""
+        return self.download_dir / self.classifier.classify(category, author, title).label
     
     def _create_organized_structure(self, book: BookInfo, file_path: Path) -> Path:
-        """Создание организованной структуры файлов"""
-        category_dir = self._get_category_dir(book.category)
-        
-        # Создаем подпапки по авторам (исправляем русские символы)
-        author_safe = book.author
-        # Заменяем русские символы на латинские
-        cyrillic_to_latin = {
-            'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-            'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-            'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-            'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-            'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-            'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
-            'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
-            'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
-            'Ф': 'F', 'Х': 'H', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
-            'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya'
-        }
+        """Путь для книги: категория / автор / серия
+        
+        Папки здесь не создаются: yt-dlp создает их при записи файла, поэтому
+        неудачные скачивания не оставляют пустых папок. Имена папок авторов и
+        серий запоминаются (paths.author_dir_name / series_dir_name).
+        """
+        category_dir = self._get_category_dir(book.category, book.author, book.title)
+        
+        # Подпапка автора (латиницей), для серий - подпапка серии
+        author_dir = category_dir / author_dir_name(book.author)
+        series_name = series_dir_name(book.title)
+        return author_dir / series_name if series_name else author_dir
+    
+    @contextmanager
+    def _breaker_outcome(self, host: str):
+        """Сообщить выключателю хоста об исходе запроса внутри блока"""
+        try:
+            yield
+        except yt_dlp.utils.DownloadError as e:
+            if is_host_block_error(str(e)):
+                self.breakers.record_failure(host)
+            else:
+                self.breakers.record_success(host)  # Хост ответил, ошибка в ролике
+            raise
+        except BaseException:
+            # Исход неизвестен (в т.ч. прерывание) - проба half-open освобождается
+            self.breakers.release(host)
+            raise
+        else:
+            self.breakers.record_success(host)
+    
+    def _run_search_query(self, query: str, book: BookInfo, cancelled: threading.Event) -> List[dict]:
+        """Выполнение одного поискового запроса, возвращает всех кандидатов (отбор - в ранжировании)"""
+        entries = self.search_cache.get('youtube', query)
+        
+        if entries is None:
+            if cancelled.is_set():
+                return []
+            
+            with self.politeness.slot('youtube.com', 'search'):
+                # Результат уже не нужен - не тратим запрос
+                if cancelled.is_set():
+                    return []
+                # Пока YouTube блокирует нас, поиск ждет вместо бесполезных запросов.
+                # Разрешение берется в слоте, прямо перед запросом: проба half-open
+                # не должна стоять в очереди за слотом
+                self.breakers.wait_until_allowed('youtube.com')
+                with self._breaker_outcome('youtube.com'), \
+                     self.sessions.session(SEARCH_YDL_OPTS) as ydl:
+                    search_results = ydl.extract_info(query, download=False)
+            
+            entries = []
+            for entry in (search_results or {}).get('entries') or []:
+                if not entry:
+                    continue
+                # Плоские результаты содержат ссылку в 'url' вместо 'webpage_url'
+                url = entry.get('webpage_url') or entry.get('url')
+                if url:
+                    entries.append(dict(entry, webpage_url=url))
+            self.search_cache.put('youtube', query, entries)
         
-        # Транслитерация
-        for cyr, lat in cyrillic_to_latin.items():
-            author_safe = author_safe.replace(cyr, lat)
-        
-        # Удаляем небезопасные символы и нормализуем
-        author_safe = re.sub(r'[^\w\s]', '', author_safe)
-        author_safe = re.sub(r'\s+', '_', author_safe.strip())
-        
-        author_dir = category_dir / author_safe
-        author_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Создаем папку для серии (если есть цифры в названии)
-        if re.search(r'\d+', book.title):
-            series_match = re.search(r'([^0-9]+)', book.title)
-            if series_match:
-                series_name = series_match.group(1).strip()
-                series_safe = re.sub(r'[^\w\s]', '', series_name)
-                series_safe = re.sub(r'\s+', '_', series_safe)
-                if len(series_safe) > 3:  # Только если название серии осмысленное
-                    series_dir = author_dir / series_safe
-                    series_dir.mkdir(parents=True, exist_ok=True)
-                    return series_dir
-        
-        return author_dir
-    
-    def search_youtube(self, book: BookInfo) -> List[str]:
-        """Улучшенный поиск на YouTube с альтернативными запросами"""
+        return entries
+    
+    def _stored_info(self, url: str) -> Optional[dict]:
+        """Метаданные для скачивания без извлечения: из памяти, затем с диска"""
+        return self.resolved.get(url) or self.metadata.get(url, streams=True)
+    
+    def _remember_duration(self, url: str, duration: Optional[float]):
+        """Запомнить длительность ролика из выдачи поиска (старые записи вытесняются)"""
+        if not duration:
+            return
+        with self._search_durations_lock:
+            self._search_durations.pop(url, None)
+            self._search_durations[url] = duration
+            while len(self._search_durations) > SEARCH_DURATIONS_LIMIT:
+                del self._search_durations[next(iter(self._search_durations))]
+    
+    def _size_info(self, url: str, info: Optional[dict]) -> Optional[dict]:
+        """Метаданные для оценки размера: сохраненные для скачивания, иначе
+        постоянные поля из кэша (размеры форматов), иначе длительность из поиска"""
+        if info is not None:
+            return info
+        info = self.metadata.get(url)
+        if info is not None:
+            return info
+        with self._search_durations_lock:
+            duration = self._search_durations.get(url)
+        return {'duration': duration} if duration else None
+    
+    def _remember_info(self, url: str, info: Optional[dict]):
+        """Запомнить извлеченные метаданные для скачивания и следующих запусков"""
+        self.resolved.put(url, info)
+        self.metadata.put(info, url)
+    
+    def fetch_video_details(self, url: str) -> Optional[dict]:
+        """Полное извлечение метаданных одного ролика (второй, «ленивый» уровень поиска)"""
+        # Для отбора хватает постоянных полей - ссылки на потоки могут устареть
+        info = self.metadata.get(url)
+        if info is not None:
+            return info
+        
+        host = host_of(url)
+        try:
+            with self.politeness.slot(host, 'metadata'):
+                self.breakers.wait_until_allowed(host)
+                with self._breaker_outcome(host), \
+                     self.sessions.session(DETAILS_YDL_OPTS) as ydl:
+                    info = ydl.extract_info(url, download=False)
+            # Те же метаданные пригодятся при скачивании
+            self._remember_info(url, info)
+            return info
+        except Exception as e:
+            logger.debug(f"Не удалось получить метаданные {url}: {e}")
+            return None
+    
+    @staticmethod
+    def _enough_candidates(ranked: List[RankedCandidate], max_results: int) -> bool:
+        """Набралось ли max_results надежных кандидатов: известная длительность
+        (детали не понадобятся) и без штрафа за EXCLUDE_TERMS"""
+        reliable = sum(1 for candidate in ranked
+                       if not candidate.excluded and candidate.entry.get('duration') is not None)
+        return reliable >= max_results
+    
+    def search_youtube(self, book: BookInfo, max_results: int = 5) -> List[str]:
+        """Улучшенный поиск на YouTube: альтернативные запросы выполняются параллельно,
+        кандидаты ранжируются вместе; оставшиеся запросы отменяются, как только
+        набралось max_results подходящих кандидатов"""
         try:
             # Используем альтернативные поисковые запросы
             alternative_queries = book.alternative_search_queries
@@ -405,52 +418,74 @@ class AudiobookDownloader:
                 ])
             
             console.print(f"[dim]🔍 Используется {len(search_queries)} поисковых запросов[/dim]")
+            for i, query in enumerate(search_queries):
+                console.print(f"[dim]   Запрос {i+1}: {query.split(':')[1][:60]}...[/dim]")
             
-            urls = []
+            book_query = f"{book.author} {book.title} {book.subtitle}"
+            candidates = []
+            ranked = []
             seen_urls = set()  # Для избежания дубликатов
+            cancelled = threading.Event()
             
-            for i, query in enumerate(search_queries):
-                try:
-                    console.print(f"[dim]   Запрос {i+1}: {query.split(':')[1][:60]}...[/dim]")
+            owned = self.search_executor is None
+            executor = self.search_executor or ThreadPoolExecutor(max_workers=max(1, len(search_queries)))
+            futures = []
+            try:
+                futures = [
+                    executor.submit(self._run_search_query, query, book, cancelled)
+                    for query in search_queries
+                ]
+                
+                # Результаты в порядке приоритета запросов (при равном балле выше -
+                # из более приоритетного); ждем только нужные запросы
+                for future in futures:
+                    try:
+                        entries = future.result()
+                    except Exception as e:
+                        console.print(f"[dim]   ⚠️ Ошибка запроса: {str(e)[:50]}...[/dim]")
+                        continue
                     
-                    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
-                        search_results = ydl.extract_info(query, download=False)
-                        
-                        if 'entries' in search_results:
-                            for entry in search_results['entries']:
-                                if entry and 'webpage_url' in entry:
-                                    url = entry['webpage_url']
-                                    
-                                    # Избегаем дубликатов
-                                    if url in seen_urls:
-                                        continue
-                                    seen_urls.add(url)
-                                    
-                                    duration = entry.get('duration', 0)
-                                    title = entry.get('title', '').lower()
-                                    
-                                    # Фильтрация по длительности (больше 30 минут)
-                                    if duration > 1800:
-                                        # Дополнительная проверка релевантности
-                                        author_words = book.author.lower().split()
-                                        title_words = book.title.lower().split()
-                                        
-                                        # Проверяем, есть ли слова автора или названия в заголовке видео
-                                        relevant_words = 0
-                                        for word in author_words + title_words:
-                                            if len(word) > 3 and word in title:
-                                                relevant_words += 1
-                                        
-                                        if relevant_words >= 1 or 'аудиокнига' in title:
-                                            urls.append(url)
-                                            console.print(f"[green]   ✅ Найдено: {entry.get('title', '')[:50]}... ({duration//60}мин)[/green]")
-                                            
-                                            # Ограничиваем количество результатов
-                                            if len(urls) >= 5:
-                                                return urls
-                except Exception as e:
-                    console.print(f"[dim]   ⚠️ Ошибка запроса: {str(e)[:50]}...[/dim]")
-                    continue
+                    for entry in entries:
+                        if entry['webpage_url'] not in seen_urls:
+                            seen_urls.add(entry['webpage_url'])
+                            candidates.append(entry)
+                    
+                    # Неверный выбор стоит многочасового скачивания - сначала лучшие по баллу
+                    ranked = self.ranker.rank(book_query, candidates)
+                    if self._enough_candidates(ranked, max_results):
+                        break
+            finally:
+                # Остальные запросы больше не нужны: не начатые пропускают запрос
+                cancelled.set()
+                if owned:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                else:
+                    for future in futures:
+                        future.cancel()
+            
+            urls = []
+            for candidate in ranked:
+                entry = candidate.entry
+                url = candidate.url
+                
+                # Полные метаданные запрашиваем только для попавших в выдачу
+                if entry.get('duration') is None:
+                    details = self.fetch_video_details(url)
+                    if not details or (details.get('duration') or 0) <= MIN_BOOK_DURATION:
+                        continue
+                    entry = details
+                
+                urls.append(url)
+                duration = entry.get('duration') or 0
+                self._remember_duration(url, duration)
+                console.print(
+                    f"[green]   ✅ Найдено: {entry.get('title', '')[:50]}... "
+                    f"({duration//60}мин, балл {candidate.score:.1f})[/green]"
+                )
+                
+                # Ограничиваем количество результатов
+                if len(urls) >= max_results:
+                    break
             
             return urls
             
@@ -458,8 +493,80 @@ class AudiobookDownloader:
             logger.error(f"Ошибка поиска на YouTube: {e}")
             return []
     
-    def download_from_url(self, url: str, book: BookInfo) -> bool:
-        """Скачивание с URL с красивой организацией файлов"""
+    def _partial_tracker(self, book: BookInfo, url: str):
+        """Хук прогресса yt-dlp: запоминает незавершенное скачивание и проверяет размер"""
+        state = {'saved': None, 'expected': 0}
+        
+        def hook(d: dict):
+            status = d.get('status')
+            
+            if status == 'downloading':
+                received = d.get('downloaded_bytes') or 0
+                if d.get('total_bytes'):
+                    state['expected'] = d['total_bytes']
+                if state['saved'] is not None and received - state['saved'] < PARTIAL_SAVE_STEP:
+                    return
+                state['saved'] = received
+                info = d.get('info_dict') or {}
+                self.downloaded_books.set_partial(PartialDownload(
+                    book_id=book.id,
+                    url=url,
+                    format_id=str(info.get('format_id') or ''),
+                    temp_path=d.get('tmpfilename') or '',
+                    bytes_received=received,
+                    total_bytes=state['expected'] or int(d.get('total_bytes_estimate') or 0)
+                ))
+            
+            elif status == 'finished':
+                # Сверяем итоговый размер с заявленным сервером
+                filename = d.get('filename')
+                if state['expected'] and filename and os.path.exists(filename):
+                    size = os.path.getsize(filename)
+                    if size != state['expected']:
+                        raise yt_dlp.utils.DownloadError(
+                            f"Размер файла {size} не совпадает с ожидаемым {state['expected']}"
+                        )
+        
+        return hook
+    
+    def _listener_hooks(self, book: BookInfo) -> List[Callable[[dict], None]]:
+        """Хуки прогресса yt-dlp для внешних слушателей"""
+        return [functools.partial(listener, book) for listener in self.progress_listeners]
+    
+    def _download_info(self, ydl, url: str, info: Optional[dict]):
+        """Скачивание по уже извлеченному info dict, без повторного запроса страницы
+        
+        Если сохраненные метаданные не подошли (устаревшие ссылки, в урезанном
+        словаре не хватает поля), они забываются и ролик скачивается обычным
+        способом - с новым извлечением. Блокировка хоста (403/429) и отмена
+        задания не повод сразу идти на хост снова: они доходят до вызывающего,
+        чтобы их учли выключатель и ограничитель.
+        """
+        if info is None:
+            ydl.download([url])
+            return
+        try:
+            # process_ie_result дополняет словарь - работаем с копией
+            ydl.process_ie_result(ydl.sanitize_info(info), download=True)
+        except yt_dlp.utils.DownloadCancelled:
+            raise
+        except Exception as e:
+            # Следующая попытка в любом случае извлечет метаданные заново
+            self.resolved.discard(url)
+            self.metadata.expire_streams(url)
+            if is_host_block_error(str(e)):
+                raise
+            logger.debug(f"Сохраненные метаданные не подошли для {url}: {e!r}")
+            ydl.download([url])
+    
+    def download_from_url(self, url: str, book: BookInfo, format_id: Optional[str] = None,
+                          info: Optional[dict] = None) -> bool:
+        """Скачивание с URL с красивой организацией файлов
+        
+        format_id закрепляет поток (при продолжении прерванного скачивания
+        yt-dlp докачивает .part-файл запросами с Range). info - метаданные
+        ролика, уже полученные при поиске; без них берутся свежие из кэша.
+        """
         try:
             # Получаем организованную структуру папок
             target_dir = self._create_organized_structure(book, None)
@@ -467,32 +574,124 @@ class AudiobookDownloader:
             # Создаем красивое имя файла
             filename = self._create_beautiful_filename(book)
             
-            opts = self.ydl_opts.copy()
-            opts['outtmpl'] = str(target_dir / f"{filename}.%(ext)s")
+            outtmpl = str(target_dir / f"{filename}.%(ext)s")
+            host = host_of(url)
+            downloaded: List[str] = []
+            
+            # ignoreerrors=False: ошибка должна дойти до нас, чтобы распознать блокировку
+            overrides = {
+                'outtmpl': outtmpl,
+                'ignoreerrors': False,
+                'continuedl': True,
+                # Итоговый путь файла - для стадии перекодирования
+                'post_hooks': [downloaded.append],
+            }
+            if format_id:
+                overrides['format'] = format_id
             
-            with yt_dlp.YoutubeDL(opts) as ydl:
-                console.print(f"[blue]📥 Скачивание: {book.full_title}[/blue]")
-                console.print(f"[dim]📁 Сохранение в: {target_dir.relative_to(self.download_dir)}[/dim]")
+            # Одно извлечение метаданных на книгу: скачиваем по сохраненному info dict
+            if info is None:
+                info = self._stored_info(url)
+            
+            # Место под файл и результат перекодирования - до начала скачивания
+            reservation = self._reserve_space(book, self._size_info(url, info), format_id)
+            try:
+                # Хук доли полосы в потоке скачивания придерживает загрузку, обгоняющую свою долю
+                with self.bandwidth.stream(book.full_title, priority=book.id in self.priority_ids) as stream, \
+                     self.sessions.session(self.ydl_opts, **overrides,
+                                           progress_hooks=[self._partial_tracker(book, url),
+                                                           stream.hook, reservation.hook,
+                                                           *self._listener_hooks(book)]) as ydl:
+                    console.print(f"[blue]📥 Скачивание: {book.full_title}[/blue]")
+                    console.print(f"[dim]📁 Сохранение в: {target_dir.relative_to(self.download_dir)}[/dim]")
                 
-                ydl.download([url])
+                    with self.politeness.slot(host, 'download'):
+                        # Заблокированный хост - пауза до пробного запроса. Разрешение
+                        # берется прямо перед запросом: проба в half-open не должна
+                        # висеть на ожидании места на диске или на ошибке подготовки
+                        if self.breakers.is_open(host):
+                            console.print(f"[yellow]🔌 {host} временно заблокирован, "
+                                          f"ждем {self.breakers.retry_after(host):.0f}с[/yellow]")
+                        self.breakers.wait_until_allowed(host)
+                        with self._breaker_outcome(host):
+                            self._download_info(ydl, url, info)
+                    self.resolved.discard(url)
                 
-                # Сохраняем прогресс
-                self.downloaded_books[book.id] = {
-                    'title': book.full_title,
-                    'url': url,
-                    'category': book.category,
-                    'file_path': str(target_dir / f"{filename}.mp3"),
-                    'downloaded_at': time.strftime('%Y-%m-%d %H:%M:%S')
-                }
-                self._save_progress()
+                    # Сохраняем прогресс (после перекодирования, если оно нужно)
+                    self._finish_download(book, url, downloaded[-1] if downloaded else None,
+                                          target_dir / filename, reservation)
                 
-                console.print(f"[green]✅ Успешно скачано: {book.full_title}[/green]")
-                return True
+                    console.print(f"[green]✅ Успешно скачано: {book.full_title}[/green]")
+                    return True
+            except BaseException:
+                reservation.release()
+                raise
                 
         except Exception as e:
             console.print(f"[red]❌ Ошибка скачивания {book.full_title}: {e}[/red]")
             return False
     
+    def _reserve_space(self, book: BookInfo, info: Optional[dict], format_id: Optional[str]) -> Reservation:
+        """Резерв места на диске под книгу (при нехватке очередь ждет, а не падает)"""
+        download_size = estimate_download_size(info, format_id)
+        transcode_size = estimate_output_size(info, download_size or self.disk.unknown_size,
+                                              self.transcoder.profile, format_id)
+        
+        def waiting(free: int, need: int):
+            console.print(
+                f"[yellow]💽 Мало места на диске: свободно {free // (1024 * 1024)} МБ, "
+                f"книге нужно {need // (1024 * 1024)} МБ - ждем: {book.full_title}[/yellow]"
+            )
+        
+        return self.disk.admit(book.full_title, download_size, transcode_size, on_wait=waiting)
+    
+    def _finish_download(self, book: BookInfo, url: str, source: Optional[str], target_stem: Path,
+                         reservation: Optional[Reservation] = None):
+        """Запись о скачанной книге; исходный поток сначала уходит на перекодирование
+        или перепаковку, если их требует профиль результата
+        
+        Рабочий поток не ждет кодировщик: книга записывается в прогресс, когда
+        процесс пула закончит. Если очередь перекодирования заполнена, поток
+        ждет здесь - скачивание притормаживает вместе с процессором.
+        """
+        job = self.transcoder.plan(source, str(target_stem)) if source else None
+        record = ProgressRecord(
+            book_id=book.id,
+            title=book.full_title,
+            url=url,
+            category=book.category,
+            file_path=source or f"{target_stem}.{self.transcoder.profile.codec}"
+        )
+        if job is None:
+            self._record_download(record)
+            if reservation is not None:
+                reservation.release()
+            self._notify_completed(book, True)
+            return
+        
+        record.file_path = job.target
+        if reservation is not None:
+            reservation.downloaded()
+        
+        def transcoded(result: TranscodeResult):
+            if reservation is not None:
+                reservation.release()
+            if result.ok:
+                self._record_download(record)
+                action = "Перепаковано" if job.copy else "Перекодировано"
+                console.print(f"[green]🎛️ {action} за {result.seconds:.0f}с: {book.full_title}[/green]")
+            else:
+                console.print(f"[red]❌ Ошибка перекодирования {book.full_title}: {result.error[:100]}[/red]")
+                logger.error(f"Ошибка перекодирования {source}: {result.error}")
+            self._notify_completed(book, result.ok)
+        
+        self.transcoder.submit(job, on_done=transcoded)
+    
+    def _notify_completed(self, book: BookInfo, ok: bool):
+        """Сообщить слушателям, что результат книги готов (или перекодирование не удалось)"""
+        for listener in self.completion_listeners:
+            listener(book, ok)
+    
     def _create_beautiful_filename(self, book: BookInfo) -> str:
         """Создание красивого имени файла"""
         # Формат: "Автор - Книга 01 - Подзаголовок (Чтец, Год)"
@@ -529,78 +728,181 @@ class AudiobookDownloader:
         filename = re.sub(r'[-\s]+', '-', filename)
         return filename[:150]  # Ограничиваем длину
     
-    def download_book(self, book: BookInfo) -> bool:
-        """Скачивание одной книги"""
+    def resolve_book(self, book: BookInfo) -> List[str]:
+        """Поиск источников для книги (стадия поиска конвейера)"""
         if book.id in self.downloaded_books:
-            console.print(f"[yellow]⏭️ Книга уже скачана: {book.full_title}[/yellow]")
-            return True
+            return []
+        
+        # Прерванное скачивание продолжаем с того же источника без нового поиска
+        partial = self.downloaded_books.get_partial(book.id)
+        if partial:
+            return [partial.url]
         
         console.print(f"[cyan]🔍 Поиск: {book.full_title}[/cyan]")
         
         # Поиск на YouTube
-        urls = self.search_youtube(book)
+        return self.search_youtube(book)
+    
+    def download_resolved(self, book: BookInfo, urls: List[str]) -> bool:
+        """Скачивание книги по уже найденным URL (стадия скачивания конвейера)"""
+        if book.id in self.downloaded_books:
+            console.print(f"[yellow]⏭️ Книга уже скачана: {book.full_title}[/yellow]")
+            self._notify_completed(book, True)
+            return True
+        
+        # Продолжаем прерванное скачивание тем же потоком
+        partial = self.downloaded_books.get_partial(book.id)
+        if partial:
+            mb = partial.bytes_received // (1024 * 1024)
+            console.print(f"[blue]⏯️ Продолжаем скачивание с {mb} МБ: {book.full_title}[/blue]")
+            if self.download_from_url(partial.url, book, format_id=partial.format_id or None):
+                return True
+            
+            # Поток больше недоступен - начинаем заново с обычного поиска
+            self.downloaded_books.clear_partial(book.id)
+            urls = [url for url in urls if url != partial.url] or self.search_youtube(book)
         
         if not urls:
             console.print(f"[red]❌ Не найдено результатов для: {book.full_title}[/red]")
             return False
         
+        # Источники на заблокированных хостах пробуем в последнюю очередь
+        urls = sorted(urls, key=lambda url: self.breakers.is_open(host_of(url)))
+        
         # Пробуем скачать с первых найденных URL
         for i, url in enumerate(urls[:3], 1):
             console.print(f"[blue]🔗 Попытка {i}/3: {url}[/blue]")
+            # Темп повторных попыток задает ограничитель (операция download)
             if self.download_from_url(url, book):
                 return True
-            time.sleep(2)
         
         console.print(f"[red]❌ Не удалось скачать: {book.full_title}[/red]")
         return False
     
-    def download_books(self, books: List[BookInfo], start_from: int = 1, limit: Optional[int] = None):
-        """Скачивание списка книг"""
+    def download_book(self, book: BookInfo) -> bool:
+        """Скачивание одной книги"""
+        return self.download_resolved(book, self.resolve_book(book))
+    
+    def _show_book_table(self, book: BookInfo):
+        """Показ информации о книге"""
+        table = Table(title=f"📖 Книга #{book.id}")
+        table.add_column("Поле", style="cyan")
+        table.add_column("Значение", style="white")
+        
+        table.add_row("Автор", book.author)
+        table.add_row("Название", book.title)
+        if book.subtitle:
+            table.add_row("Подзаголовок", book.subtitle)
+        if book.narrator:
+            table.add_row("Чтец", book.narrator)
+        if book.year:
+            table.add_row("Год", book.year)
+        table.add_row("Категория", book.category)
+        
+        console.print(table)
+    
+    def _show_duplicates(self, dedup: DedupResult, max_rows: int = 10):
+        """Отчет о строках списка, объединенных в одно задание"""
+        if not dedup.groups:
+            return
+        
+        table = Table(title=f"♻️ Дубликаты: объединено строк - {dedup.removed}")
+        table.add_column("Остается", style="green")
+        table.add_column("Объединены", style="dim")
+        table.add_column("Совпадение", style="cyan")
+        
+        for group in dedup.groups[:max_rows]:
+            table.add_row(
+                group.kept.full_title,
+                "\n".join(book.full_title for book in group.duplicates),
+                "точное" if group.exact else "похожее"
+            )
+        
+        console.print(table)
+        if len(dedup.groups) > max_rows:
+            console.print(f"[dim]   ... и еще групп: {len(dedup.groups) - max_rows}[/dim]")
+        
+        for group in dedup.groups:
+            logger.info(
+                f"Дубликаты: {group.kept.full_title} <- "
+                + "; ".join(book.full_title for book in group.duplicates)
+            )
+    
+    def download_books(self, books: List[BookInfo], start_from: int = 1, limit: Optional[int] = None,
+                       max_workers: Optional[int] = None, lookahead: Optional[int] = None,
+                       priority_ids: Optional[Set[int]] = None) -> SchedulerResult:
+        """Скачивание списка книг: поиск опережает скачивание, скачивание идет пулом потоков
+        
+        priority_ids - номера книг, которые получают большую долю общего лимита скорости.
+        Возвращает итоги: успешна книга, итоговый файл которой на месте.
+        """
+        if priority_ids is not None:
+            self.priority_ids = set(priority_ids)
+        
+        # Дубликаты списка (разное написание одной книги) - одно задание на группу
+        dedup = deduplicate_books(books)
+        self._show_duplicates(dedup)
+        
         # Фильтрация
-        filtered_books = [book for book in books if book.id >= start_from]
+        filtered_books = [book for book in dedup.books if book.id >= start_from]
         if limit:
             filtered_books = filtered_books[:limit]
         
+        # Запросы и имена файлов считаются один раз до запуска потоков
+        filtered_books = prepare_books(filtered_books)
+        
+        workers = max_workers or self.max_workers
+        
         console.print(Panel(
-            f"[bold green]📚 Начинаем скачивание {len(filtered_books)} книг[/bold green]",
+            f"[bold green]📚 Начинаем скачивание {len(filtered_books)} книг[/bold green]\n"
+            f"[dim]⚡ Параллельных потоков: {workers}, поиск наперед: {lookahead or self.lookahead}[/dim]",
             title="🎧 Audiobook Downloader",
             border_style="green"
         ))
         
-        successful = 0
-        failed = 0
+        # Успех книги - итоговый файл на месте (после перекодирования), а не
+        # законченное скачивание: итоги считаются по слушателю готовности
+        completed: Dict[int, bool] = {}
         
-        with Progress() as progress:
-            task = progress.add_task("[green]Скачивание...", total=len(filtered_books))
-            
-            for book in filtered_books:
-                # Показываем информацию о книге
-                table = Table(title=f"📖 Книга #{book.id}")
-                table.add_column("Поле", style="cyan")
-                table.add_column("Значение", style="white")
-                
-                table.add_row("Автор", book.author)
-                table.add_row("Название", book.title)
-                if book.subtitle:
-                    table.add_row("Подзаголовок", book.subtitle)
-                if book.narrator:
-                    table.add_row("Чтец", book.narrator)
-                if book.year:
-                    table.add_row("Год", book.year)
-                table.add_row("Категория", book.category)
-                
-                console.print(table)
-                
-                # Скачиваем
-                if self.download_book(book):
-                    successful += 1
-                else:
-                    failed += 1
+        def book_completed(book: BookInfo, ok: bool):
+            completed[book.id] = ok
+        
+        self.completion_listeners.append(book_completed)
+        try:
+            with Progress(*Progress.get_default_columns(), BandwidthColumn(self.bandwidth),
+                          console=console) as progress:
+                task = progress.add_task("[green]Скачивание...", total=len(filtered_books))
+                # Под общей строкой - строка каждого идущего скачивания с его долей полосы
+                rows = DownloadRows(progress)
                 
-                progress.update(task, advance=1)
+                def book_done(book: BookInfo, ok: bool):
+                    rows.remove(book)
+                    progress.update(task, advance=1)
                 
-                # Пауза между книгами
-                time.sleep(3)
+                # Паузы между книгами заменены лимитами хостов (self.politeness, RATE_LIMITS)
+                pipeline = ResolveDownloadPipeline(
+                    self.resolve_book,
+                    self.download_resolved,
+                    lookahead=lookahead or self.lookahead,
+                    max_workers=workers,
+                    on_start=self._show_book_table,
+                    on_done=book_done
+                )
+                self.progress_listeners.append(rows.hook)
+                try:
+                    pipeline.run(filtered_books)
+                finally:
+                    self.progress_listeners.remove(rows.hook)
+            
+            # Книга готова, когда перекодирована - дожидаемся очереди
+            if self.transcoder.queued:
+                console.print(f"[dim]🎛️ Завершаем перекодирование: {self.transcoder.queued} файлов[/dim]")
+            self.transcoder.drain()
+        finally:
+            self.completion_listeners.remove(book_completed)
+        
+        successful = sum(1 for book in filtered_books if completed.get(book.id))
+        failed = len(filtered_books) - successful
         
         # Итоги
         result_table = Table(title="📊 Результаты скачивания")
@@ -609,9 +911,14 @@ class AudiobookDownloader:
         
         result_table.add_row("✅ Успешно", str(successful), style="green")
         result_table.add_row("❌ Неудачно", str(failed), style="red")
+        result_table.add_row("🗄️ Кэш поиска", self.search_cache.stats_line(), style="dim")
+        result_table.add_row("🗃️ Кэш метаданных", self.metadata.stats_line(), style="dim")
+        result_table.add_row("🎛️ Перекодирование", self.transcoder.stats_line(), style="dim")
+        result_table.add_row("💽 Диск", self.disk.stats_line(), style="dim")
         result_table.add_row("📁 Папка", str(self.download_dir.absolute()), style="blue")
         
         console.print(result_table)
+        return SchedulerResult(successful=successful, failed=failed)
 
 def show_welcome():
     """Показать приветствие"""
@@ -669,8 +976,26 @@ def main():
             if start_input:
                 start_from = int(start_input)
         
+        workers_input = console.input(
+            f"Параллельных потоков (Enter для {downloader.max_workers}): "
+        ).strip()
+        max_workers = int(workers_input) if workers_input else None
+        
+        # Профиль результата на этот запуск (mp3 - перекодирование, native - без него)
+        profiles = ", ".join(get_setting('OUTPUT_PROFILES', {})) or DEFAULT_PROFILE
+        profile_input = console.input(
+            f"Формат файлов ({profiles}; Enter для {downloader.transcoder.profile.name}): "
+        ).strip()
+        if profile_input:
+            downloader.set_output_profile(profile_input)
+        
+        # Приоритетные книги получают большую долю общего лимита скорости (BANDWIDTH)
+        priority_input = console.input("Приоритетные книги (номера через запятую, Enter - нет): ").strip()
+        priority_ids = {int(part) for part in priority_input.split(',') if part.strip().isdigit()}
+        
         # Запуск скачивания
-        downloader.download_books(books, start_from, limit)
+        downloader.download_books(books, start_from, limit, max_workers=max_workers,
+                                  priority_ids=priority_ids)
         
     except Exception as e:
         console.print(f"[red]❌ Ошибка: {e}[/red]")
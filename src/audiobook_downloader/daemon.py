@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🛰️ Фоновый режим: постоянная очередь и локальный HTTP API
+Демон владеет очередью заданий (SQLite), непрерывно прогоняет ее через
+конвейер поиска и скачивания и принимает команды по HTTP: поставить книги
+или файл списка, узнать состояние, изменить приоритет, отменить. Консоль и
+GUI становятся тонкими клиентами (client.DaemonClient); после перезапуска
+очередь продолжается с того же места
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from yt_dlp.utils import DownloadCancelled
+
+from .books import BookInfo, BookListParser, parse_book_line
+from .core import AudiobookDownloader, console
+from .client import DEFAULT_HOST, DEFAULT_PORT
+from .jobqueue import BOOK_FIELDS, CANCELLED, STATUSES, JobQueue
+from .pipeline import ResolveDownloadPipeline
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = 'downloads/daemon'
+
+# Как часто проверять очередь, если о новых заданиях никто не сообщил (секунды)
+IDLE_POLL_SECONDS = 5.0
+
+# Книг файла списка на одну транзакцию очереди: поиск и API не ждут весь файл
+IMPORT_BATCH = 500
+
+
+class DownloadDaemon:
+    """Долгоживущий загрузчик с очередью на диске и HTTP API
+
+    Номер книги в загрузчике - номер задания, поэтому у демона своя папка
+    данных (база прогресса, кэши и скачанные книги), отдельная от консольных
+    запусков с номерами строк списка.
+    """
+
+    def __init__(self, data_dir, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 max_workers: int = 3, lookahead: int = 3,
+                 downloader: Optional[AudiobookDownloader] = None):
+        self.data_dir = Path(data_dir)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self.lookahead = lookahead
+
+        self.queue = JobQueue(self.data_dir / 'jobs.db')
+        self.downloader = downloader or AudiobookDownloader(str(self.data_dir), max_workers=max_workers,
+                                                            lookahead=lookahead)
+        # Отмена задания в работе прерывает скачивание из хука прогресса
+        self.downloader.progress_listeners.append(self._check_cancelled)
+        # Задание готово, когда на месте итоговый файл, то есть после перекодирования
+        self.downloader.completion_listeners.append(self._completed)
+        # Пишут потоки API, читают потоки скачивания - только под блокировкой
+        self._cancelled: Set[int] = set()
+        self._cancelled_lock = threading.Lock()
+        # Файлы списков разбираются вне потоков API, по одному
+        self._imports = ThreadPoolExecutor(max_workers=1, thread_name_prefix='daemon-import')
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._threads: List[threading.Thread] = []
+
+    @classmethod
+    def from_settings(cls, data_dir=None) -> 'DownloadDaemon':
+        """Демон с настройками DAEMON из конфига"""
+        settings = get_setting('DAEMON', {})
+        return cls(data_dir or settings.get('data_dir', DEFAULT_DATA_DIR),
+                   host=settings.get('host', DEFAULT_HOST),
+                   port=settings.get('port', DEFAULT_PORT),
+                   max_workers=settings.get('workers', 3),
+                   lookahead=settings.get('lookahead', 3))
+
+    @property
+    def url(self) -> str:
+        """Адрес API (после запуска - с фактическим портом)"""
+        port = self._server.server_address[1] if self._server else self.port
+        return f"http://{self.host}:{port}"
+
+    # Команды API
+
+    def enqueue_books(self, books: Iterable[BookInfo], priority: int = 0, source: str = 'api') -> List[int]:
+        """Поставить книги в очередь, вернуть номера новых заданий"""
+        added = self.queue.enqueue(books, priority=priority, source=source)
+        if added:
+            # Отмененная раньше книга поставлена заново - отмена больше не действует
+            with self._cancelled_lock:
+                self._cancelled.difference_update(added)
+            self._wakeup.set()
+        return added
+
+    def enqueue_file(self, path: str, priority: int = 0) -> List[int]:
+        """Поставить в очередь книги из файла списка (разбирается один раз, пачками)"""
+        parser = BookListParser(path)
+        books = parser.iter_books()
+        added = []
+        while True:
+            batch = list(islice(books, IMPORT_BATCH))
+            if not batch:
+                return added
+            added += self.enqueue_books(batch, priority=priority, source=parser.file_path.name)
+
+    def submit_file(self, path: str, priority: int = 0) -> Future:
+        """Разобрать файл списка в фоне (для API: ответ не ждет разбора)"""
+        if not Path(path).is_file():
+            raise FileNotFoundError(f"Файл {path} не найден!")
+
+        def run() -> List[int]:
+            try:
+                added = self.enqueue_file(path, priority=priority)
+            except (OSError, UnicodeDecodeError) as e:
+                console.print(f"[red]❌ Не удалось поставить в очередь {path}: {e}[/red]")
+                raise
+            console.print(f"[green]📋 {Path(path).name}: новых заданий {len(added)}[/green]")
+            return added
+
+        return self._imports.submit(run)
+
+    def enqueue_lines(self, lines: Iterable[str], priority: int = 0,
+                      category: str = "") -> Tuple[List[int], List[str]]:
+        """Поставить книги из строк формата списка; вернуть номера и нераспознанные строки"""
+        books, rejected = [], []
+        for line in lines:
+            book = parse_book_line(line.strip(), category)
+            if book is None:
+                rejected.append(line)
+            else:
+                books.append(book)
+        return self.enqueue_books(books, priority=priority), rejected
+
+    def cancel(self, job_id: int) -> bool:
+        """Отменить задание (в работе - скачивание прервется на ближайшем хуке)"""
+        if not self.queue.cancel(job_id):
+            return False
+        with self._cancelled_lock:
+            self._cancelled.add(job_id)
+        return True
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """Изменить приоритет задания в очереди (False - задание уже взято в работу,
+        завершено или не найдено)"""
+        return self.queue.set_priority(job_id, priority)
+
+    def status(self) -> dict:
+        """Состояние очереди и загрузчика"""
+        return {
+            'jobs': self.queue.counts(),
+            'running': [job.to_dict() for job in self.queue.jobs('running', limit=self.max_workers + self.lookahead)],
+            'bandwidth': self.downloader.bandwidth.summary(),
+            'disk': self.downloader.disk.stats_line(),
+            'transcode': self.downloader.transcoder.stats_line(),
+        }
+
+    # Конвейер
+
+    def _claimed_books(self) -> Iterator[BookInfo]:
+        """Книги из очереди по одной; пустая очередь ждет новых заданий до остановки демона"""
+        while not self._stop.is_set():
+            # Сброс до claim: задание, поставленное после пустого claim, разбудит ожидание
+            self._wakeup.clear()
+            job = self.queue.claim()
+            if job is None:
+                self._wakeup.wait(IDLE_POLL_SECONDS)
+                continue
+            if job.priority > 0:
+                self.downloader.priority_ids.add(job.job_id)
+            yield job.to_book()
+
+    def _download(self, book: BookInfo, urls: List[str]) -> bool:
+        """Стадия скачивания: задание могли отменить, пока для него искали источники"""
+        if self.queue.status_of(book.id) == CANCELLED:
+            return False
+        return self.downloader.download_resolved(book, urls)
+
+    def _done(self, book: BookInfo, ok: bool):
+        """Скачивание закончено: неудача - сразу в базу, успех ждет итогового файла
+
+        Пока книга перекодируется, задание остается в работе: после остановки
+        или сбоя процесса recover() вернет его в очередь.
+        """
+        if not ok:
+            self.queue.finish(book.id, False, "Не удалось скачать")
+        self.downloader.priority_ids.discard(book.id)
+        with self._cancelled_lock:
+            self._cancelled.discard(book.id)
+
+    def _completed(self, book: BookInfo, ok: bool):
+        """Слушатель готовности результата (поток скачивания или перекодирования)"""
+        self.queue.finish(book.id, ok, "" if ok else "Не удалось перекодировать")
+
+    def _check_cancelled(self, book: BookInfo, d: dict):
+        """Слушатель прогресса: прерывает скачивание отмененного задания"""
+        with self._cancelled_lock:
+            cancelled = book.id in self._cancelled
+        if cancelled:
+            raise DownloadCancelled(f"Задание {book.id} отменено")
+
+    def run_pipeline(self):
+        """Непрерывная обработка очереди до остановки демона"""
+        recovered = self.queue.recover()
+        if recovered:
+            console.print(f"[yellow]🛰️ Возвращено в очередь после перезапуска: {recovered}[/yellow]")
+        # Один конвейер на все время работы: новые задания попадают в поиск,
+        # пока скачиваются начатые, а не после их завершения
+        pipeline = ResolveDownloadPipeline(
+            self.downloader.resolve_book,
+            self._download,
+            lookahead=self.lookahead,
+            max_workers=self.max_workers,
+            on_done=self._done
+        )
+        pipeline.run(self._claimed_books())
+        self.downloader.transcoder.drain()
+
+    # Запуск и остановка
+
+    def start(self):
+        """Запуск API и конвейера в фоновых потоках"""
+        self._server = ThreadingHTTPServer((self.host, self.port), DaemonRequestHandler)
+        self._server.daemon_threads = True
+        self._server.download_daemon = self
+        self._threads = [
+            threading.Thread(target=self.run_pipeline, name='daemon-pipeline', daemon=True),
+            threading.Thread(target=self._server.serve_forever, name='daemon-api', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Дождаться остановки (True - демон остановлен)"""
+        return self._stop.wait(timeout)
+
+    def stop(self):
+        """Остановка: новые задания не берутся, начатые книги доскачиваются"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._server is not None:
+            self._server.shutdown()
+        # Начатый разбор файла дописывается в очередь до закрытия базы
+        self._imports.shutdown(wait=True, cancel_futures=True)
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join()
+        if self._server is not None:
+            self._server.server_close()
+        self.queue.close()
+
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    """JSON API демона
+
+    GET  /status                   - очередь, скорость, диск, перекодирование
+    GET  /jobs?status=&limit=&offset= - задания
+    GET  /jobs/<id>                - одно задание
+    POST /jobs                     - {"books": [{...}], "lines": ["Автор - Название"], "priority": 0}
+    POST /jobs/file                - {"path": "/путь/books.txt", "priority": 0} (разбор в фоне, 202)
+    POST /jobs/<id>/priority       - {"priority": 5}
+    POST /jobs/<id>/cancel         - отмена (то же - DELETE /jobs/<id>)
+    POST /shutdown                 - остановка демона
+    """
+
+    server_version = 'AudiobookDaemon/1.0'
+
+    @property
+    def daemon(self) -> DownloadDaemon:
+        return self.server.download_daemon
+
+    def log_message(self, format, *args):
+        logger.debug("API %s - " + format, self.address_string(), *args)
+
+    def _send(self, status: HTTPStatus, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: HTTPStatus, message: str):
+        self._send(status, {'error': message})
+
+    def _body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        data = json.loads(self.rfile.read(length).decode('utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError("ожидается JSON-объект")
+        return data
+
+    def _parts(self) -> Tuple[List[str], dict]:
+        parsed = urlparse(self.path)
+        return [part for part in parsed.path.split('/') if part], parse_qs(parsed.query)
+
+    def _job_id(self, value: str) -> Optional[int]:
+        return int(value) if value.isdigit() else None
+
+    def do_GET(self):
+        parts, query = self._parts()
+        if parts == ['status']:
+            return self._send(HTTPStatus.OK, self.daemon.status())
+        if parts == ['jobs']:
+            status = query.get('status', [None])[0]
+            if status is not None and status not in STATUSES:
+                return self._error(HTTPStatus.BAD_REQUEST, f"неизвестное состояние: {status}")
+            try:
+                limit = int(query.get('limit', ['100'])[0])
+                offset = int(query.get('offset', ['0'])[0])
+            except ValueError:
+                return self._error(HTTPStatus.BAD_REQUEST, "limit и offset - числа")
+            jobs = self.daemon.queue.jobs(status, limit=limit, offset=offset)
+            return self._send(HTTPStatus.OK, {'jobs': [job.to_dict() for job in jobs]})
+        if len(parts) == 2 and parts[0] == 'jobs' and self._job_id(parts[1]) is not None:
+            job = self.daemon.queue.get(self._job_id(parts[1]))
+            if job is None:
+                return self._error(HTTPStatus.NOT_FOUND, "нет такого задания")
+            return self._send(HTTPStatus.OK, job.to_dict())
+        self._error(HTTPStatus.NOT_FOUND, "неизвестный адрес")
+
+    def do_POST(self):
+        parts, _ = self._parts()
+        try:
+            body = self._body()
+            priority = int(body.get('priority', 0))
+        except (ValueError, TypeError) as e:
+            return self._error(HTTPStatus.BAD_REQUEST, f"неверный запрос: {e}")
+
+        if parts == ['jobs']:
+            return self._enqueue(body, priority)
+        if parts == ['jobs', 'file']:
+            path = body.get('path')
+            if not path:
+                return self._error(HTTPStatus.BAD_REQUEST, "нужен path")
+            try:
+                self.daemon.submit_file(path, priority=priority)
+            except FileNotFoundError as e:
+                return self._error(HTTPStatus.BAD_REQUEST, str(e))
+            except RuntimeError:
+                return self._error(HTTPStatus.SERVICE_UNAVAILABLE, "демон останавливается")
+            return self._send(HTTPStatus.ACCEPTED, {'path': path, 'accepted': True})
+        if len(parts) == 3 and parts[0] == 'jobs' and self._job_id(parts[1]) is not None:
+            job_id = self._job_id(parts[1])
+            if parts[2] == 'priority':
+                if not self.daemon.set_priority(job_id, priority):
+                    return self._rejected(job_id, "задание уже в работе или завершено")
+                return self._send(HTTPStatus.OK, {'job_id': job_id, 'priority': priority})
+            if parts[2] == 'cancel':
+                return self._cancel(job_id)
+        if parts == ['shutdown']:
+            self._send(HTTPStatus.OK, {'stopping': True})
+            threading.Thread(target=self.daemon.stop, name='daemon-stop', daemon=True).start()
+            return
+        self._error(HTTPStatus.NOT_FOUND, "неизвестный адрес")
+
+    def do_DELETE(self):
+        parts, _ = self._parts()
+        if len(parts) == 2 and parts[0] == 'jobs' and self._job_id(parts[1]) is not None:
+            return self._cancel(self._job_id(parts[1]))
+        self._error(HTTPStatus.NOT_FOUND, "неизвестный адрес")
+
+    def _enqueue(self, body: dict, priority: int):
+        books = []
+        for item in body.get('books') or []:
+            if not isinstance(item, dict) or not item.get('author') or not item.get('title'):
+                return self._error(HTTPStatus.BAD_REQUEST, "у книги нужны author и title")
+            books.append(BookInfo(id=0, **{key: str(item.get(key) or '') for key in BOOK_FIELDS}))
+        added = self.daemon.enqueue_books(books, priority=priority)
+        lines_added, rejected = self.daemon.enqueue_lines(body.get('lines') or [], priority=priority,
+                                                          category=str(body.get('category') or ''))
+        self._send(HTTPStatus.OK, {'added': added + lines_added, 'rejected': rejected})
+
+    def _rejected(self, job_id: int, message: str):
+        """Команда не применена: 404 - нет задания, 409 - не то состояние"""
+        if self.daemon.queue.get(job_id) is None:
+            return self._error(HTTPStatus.NOT_FOUND, "нет такого задания")
+        self._error(HTTPStatus.CONFLICT, message)
+
+    def _cancel(self, job_id: int):
+        if not self.daemon.cancel(job_id):
+            return self._rejected(job_id, "задание уже завершено")
+        self._send(HTTPStatus.OK, {'job_id': job_id, 'status': CANCELLED})
+
+
+def main():
+    """Запуск демона с настройками DAEMON (папка данных - относительно корня проекта)"""
+    project_dir = Path(__file__).parent.parent.parent
+    settings = get_setting('DAEMON', {})
+    daemon = DownloadDaemon.from_settings(project_dir / settings.get('data_dir', DEFAULT_DATA_DIR))
+    daemon.start()
+    counts = daemon.queue.counts()
+    console.print(f"[bold green]🛰️ Демон запущен: {daemon.url}[/bold green]")
+    console.print(f"[dim]📋 В очереди: {counts['queued'] + counts['running']}, "
+                  f"готово: {counts['done']}, папка: {daemon.data_dir}[/dim]")
+    try:
+        while not daemon.wait(1):
+            pass
+    except KeyboardInterrupt:
+        console.print("[yellow]⏹️ Остановка: доскачиваем начатые книги...[/yellow]")
+        daemon.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+♻️ Поиск дубликатов в списке книг
+Одна и та же книга, записанная по-разному (тире, «кавычки», «Часть 1» и «1»,
+автор латиницей), превращается в одно задание: нормализованный ключ
+находит точные совпадения, MinHash по триграммам - почти совпадения
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+from .books import BookInfo
+from .paths import transliterate
+
+# "часть 1", "том 2", "книга 3" (уже латиницей) -> просто номер
+PART_PATTERN = re.compile(r'\b(?:chast|tom|kniga|part|book|vol)\s*(\d+)')
+LEADING_ZEROS_PATTERN = re.compile(r'\b0+(\d)')
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+NUMBER_PATTERN = re.compile(r'\d+')
+
+# Параметры MinHash: NUM_BANDS полос по ROWS_PER_BAND значений.
+# Одна хэш-функция, разбитая на SIGNATURE_SIZE корзин (one permutation hashing):
+# каждая триграмма хэшируется один раз вместо одного раза на каждую функцию.
+# Узкие полосы: пара на пороге 0.8 попадает в общую корзину с вероятностью
+# 1 - (1 - 0.8²)^8 ≈ 0.9997, лишних кандидатов отсекает точный Жаккар
+NUM_BANDS = 8
+ROWS_PER_BAND = 2
+SIGNATURE_SIZE = NUM_BANDS * ROWS_PER_BAND  # Степень двойки: номер корзины - младшие биты
+_EMPTY_BIN = 1 << 64
+
+# Порог схожести триграмм для почти совпадений
+SIMILARITY_THRESHOLD = 0.8
+
+
+def normalize_key(book: BookInfo) -> str:
+    """Ключ книги: латиница, без знаков, номера частей без слов, слова по алфавиту"""
+    text = transliterate(f"{book.author} {book.title} {book.subtitle}".lower().replace('ё', 'е'))
+    text = NON_WORD_PATTERN.sub(' ', text)
+    text = PART_PATTERN.sub(r'\1', text)
+    text = LEADING_ZEROS_PATTERN.sub(r'\1', text)
+    return ' '.join(sorted(text.split()))
+
+
+def trigrams(key: str) -> frozenset:
+    """Множество символьных триграмм ключа"""
+    padded = f"  {key} "
+    return frozenset(map(''.join, zip(padded, padded[1:], padded[2:])))
+
+
+def shingle_hash(shingle: str) -> int:
+    """Стабильный 64-битный хэш триграммы
+
+    Встроенный hash() солится в каждом процессе (PYTHONHASHSEED), и корзины
+    LSH - а с ними и найденные дубликаты - менялись бы от запуска к запуску
+    """
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def minhash(shingles: frozenset) -> Tuple[int, ...]:
+    """Сигнатура MinHash множества триграмм"""
+    signature = [_EMPTY_BIN] * SIGNATURE_SIZE
+    mask = SIGNATURE_SIZE - 1
+    for value in map(shingle_hash, shingles):
+        slot = value & mask
+        if value < signature[slot]:
+            signature[slot] = value
+    return tuple(signature)
+
+
+def jaccard(first: frozenset, second: frozenset) -> float:
+    """Доля общих триграмм"""
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+@dataclass
+class DuplicateGroup:
+    """Строки списка, объединенные в одно задание"""
+    kept: BookInfo
+    duplicates: List[BookInfo] = field(default_factory=list)
+    exact: bool = True  # Только точные совпадения ключей
+
+
+@dataclass
+class DedupResult:
+    """Книги без дубликатов и отчет об объединенных строках"""
+    books: List[BookInfo]
+    groups: List[DuplicateGroup]
+
+    @property
+    def removed(self) -> int:
+        return sum(len(group.duplicates) for group in self.groups)
+
+
+def deduplicate_books(books: Sequence[BookInfo],
+                      threshold: float = SIMILARITY_THRESHOLD) -> DedupResult:
+    """Объединение дубликатов: остается первая по порядку запись группы
+
+    Точные совпадения ключей группируются словарем, почти совпадения ищутся
+    через полосы MinHash (LSH) - сравниваются только книги из общей корзины,
+    поэтому время растет почти линейно. Книги с разными номерами (тома
+    серии) никогда не объединяются.
+    """
+    # 1. Точные совпадения нормализованных ключей
+    by_key: Dict[str, List[int]] = {}
+    for index, book in enumerate(books):
+        by_key.setdefault(normalize_key(book), []).append(index)
+
+    keys = list(by_key)
+    parent = list(range(len(keys)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 2. Почти совпадения: кандидаты из общих корзин LSH, проверка по Жаккару
+    shingles = [trigrams(key) for key in keys]
+    numbers = [tuple(NUMBER_PATTERN.findall(key)) for key in keys]
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    for i, key_shingles in enumerate(shingles):
+        signature = minhash(key_shingles)
+        for band in range(NUM_BANDS):
+            start = band * ROWS_PER_BAND
+            buckets.setdefault((band, signature[start:start + ROWS_PER_BAND]), []).append(i)
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if numbers[i] != numbers[j]:
+                    continue
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j:
+                    continue
+                if jaccard(shingles[i], shingles[j]) >= threshold:
+                    # Ключи пронумерованы по первому появлению: корнем остается более ранний
+                    parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # 3. Группы в порядке первого появления (корень - самый ранний ключ группы)
+    grouped: Dict[int, List[int]] = {}
+    key_counts: Dict[int, int] = {}
+    for i, key in enumerate(keys):
+        root = find(i)
+        grouped.setdefault(root, []).extend(by_key[key])
+        key_counts[root] = key_counts.get(root, 0) + 1
+
+    unique, groups = [], []
+    for root, indexes in grouped.items():
+        indexes.sort()
+        kept = books[indexes[0]]
+        unique.append(kept)
+        if len(indexes) > 1:
+            groups.append(DuplicateGroup(
+                kept=kept,
+                duplicates=[books[i] for i in indexes[1:]],
+                exact=key_counts[root] == 1
+            ))
+
+    return DedupResult(books=unique, groups=groups)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+💽 Допуск скачиваний по свободному месту на диске
+Перед скачиванием книга резервирует оценку своего размера (по filesize,
+filesize_approx или длительности и битрейту) вместе с местом под результат
+перекодирования. Новые книги допускаются, только пока свободного места
+остается больше порога, иначе очередь ждет, а не падает на каждой книге
+"""
+
+import shutil
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .settings import get_setting
+from .transcode import OutputProfile, plan_output
+
+MB = 1024 * 1024
+
+DEFAULT_MIN_FREE_MB = 1024
+DEFAULT_UNKNOWN_SIZE_MB = 300  # Книга без метаданных
+DEFAULT_POLL_SECONDS = 30.0  # Как часто перепроверять диск во время паузы
+
+# Битрейт аудио, если формат его не сообщает (кбит/с)
+FALLBACK_BITRATE = 128
+
+
+def _bitrate_size(duration: Optional[float], bitrate: Optional[float]) -> Optional[int]:
+    """Размер по длительности (с) и битрейту (кбит/с)"""
+    if not duration or not bitrate:
+        return None
+    return int(duration * bitrate * 1000 / 8)
+
+
+def pick_format(info: dict, format_id: Optional[str] = None) -> Optional[dict]:
+    """Формат, который, скорее всего, будет скачан: закрепленный или лучший аудиопоток"""
+    formats = info.get('formats') or []
+    if format_id:
+        for fmt in formats:
+            if fmt.get('format_id') == format_id:
+                return fmt
+    audio = [fmt for fmt in formats if fmt.get('vcodec') == 'none' and fmt.get('acodec') != 'none']
+    if not audio:
+        return formats[-1] if formats else None  # yt-dlp сортирует форматы от худшего к лучшему
+    return max(audio, key=lambda fmt: fmt.get('abr') or fmt.get('tbr') or 0)
+
+
+def estimate_download_size(info: Optional[dict], format_id: Optional[str] = None) -> Optional[int]:
+    """Оценка размера скачиваемого файла в байтах (None - оценить не по чему)"""
+    if not info:
+        return None
+    fmt = pick_format(info, format_id) or {}
+    size = fmt.get('filesize') or fmt.get('filesize_approx') or info.get('filesize') or info.get('filesize_approx')
+    if size:
+        return int(size)
+    bitrate = fmt.get('abr') or fmt.get('tbr') or FALLBACK_BITRATE
+    return _bitrate_size(info.get('duration'), bitrate)
+
+
+def estimate_output_size(info: Optional[dict], download_size: int, profile: OutputProfile,
+                         format_id: Optional[str] = None) -> int:
+    """Место под результат перекодирования или перепаковки (0 - файл останется как есть)
+
+    Пока кодировщик работает, на диске лежат и исходный файл, и результат.
+    """
+    fmt = pick_format(info, format_id) if info else None
+    ext = (fmt or {}).get('ext')
+    if ext is None:
+        # Расширение неизвестно - рассчитываем на перекодирование
+        return _bitrate_size((info or {}).get('duration'), float(profile.quality)) or download_size
+    job = plan_output(f"source.{ext}", 'target', profile)
+    if job is None:
+        return 0
+    if job.copy:
+        return download_size
+    return _bitrate_size(info.get('duration'), float(job.quality)) or download_size
+
+
+class Reservation:
+    """Зарезервированное место одной книги
+
+    Скачанные байты уже видны в свободном месте диска, поэтому резерв
+    скачивания уменьшается по мере записи (хук прогресса yt-dlp).
+    """
+
+    def __init__(self, admission: 'DiskAdmission', name: str, download: int, transcode: int):
+        self.admission = admission
+        self.name = name
+        self.download = download
+        self.transcode = transcode
+        self.written = 0
+        self.released = False
+
+    @property
+    def outstanding(self) -> int:
+        """Сколько места книге еще понадобится"""
+        if self.released:
+            return 0
+        return max(0, self.download - self.written) + self.transcode
+
+    def hook(self, d: dict):
+        """Хук прогресса yt-dlp: записанные байты уже заняли диск"""
+        if d.get('status') == 'downloading':
+            self.written = max(self.written, d.get('downloaded_bytes') or 0)
+
+    def downloaded(self):
+        """Скачивание закончено: остается только место под перекодирование"""
+        self.written = max(self.written, self.download)
+        self.admission._changed()
+
+    def release(self):
+        """Книга готова (или не удалась) - резерв больше не нужен"""
+        self.admission._release(self)
+
+
+class DiskAdmission:
+    """Допуск книг к скачиванию, пока на диске хватает места"""
+
+    def __init__(self, path, min_free: int = DEFAULT_MIN_FREE_MB * MB,
+                 unknown_size: int = DEFAULT_UNKNOWN_SIZE_MB * MB,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS,
+                 usage: Callable = shutil.disk_usage):
+        self.path = str(path)
+        self.min_free = min_free
+        self.unknown_size = unknown_size
+        self.poll_seconds = poll_seconds
+        self._usage = usage
+        self.pauses = 0
+
+        self._lock = threading.Lock()
+        self._changed_cond = threading.Condition(self._lock)
+        self._reservations: List[Reservation] = []
+
+    @classmethod
+    def from_settings(cls, path) -> 'DiskAdmission':
+        """Допуск с настройками DISK_SPACE из конфига"""
+        settings = get_setting('DISK_SPACE', {})
+        return cls(path,
+                   min_free=int(settings.get('min_free_mb', DEFAULT_MIN_FREE_MB) * MB),
+                   unknown_size=int(settings.get('unknown_size_mb', DEFAULT_UNKNOWN_SIZE_MB) * MB),
+                   poll_seconds=settings.get('poll_seconds', DEFAULT_POLL_SECONDS))
+
+    def free(self) -> int:
+        """Свободное место на диске папки скачивания"""
+        return self._usage(self.path).free
+
+    def reserved(self) -> int:
+        """Место, обещанное книгам в работе"""
+        with self._lock:
+            return sum(reservation.outstanding for reservation in self._reservations)
+
+    def _fits(self, need: int) -> bool:
+        """Хватит ли места еще на need байт (вызывается под блокировкой)"""
+        reserved = sum(reservation.outstanding for reservation in self._reservations)
+        return self.free() - reserved - need >= self.min_free
+
+    def admit(self, name: str, download: Optional[int], transcode: int = 0,
+              on_wait: Optional[Callable[[int, int], None]] = None) -> Reservation:
+        """Зарезервировать место под книгу, дождавшись его при нехватке
+
+        download=None - размер неизвестен, резервируется unknown_size.
+        on_wait(свободно, нужно) вызывается один раз, если книга встала в паузу.
+        Место освобождают завершившиеся книги; пока их нет, диск перепроверяется
+        каждые poll_seconds (пользователь мог освободить место сам).
+        """
+        reservation = Reservation(self, name, download or self.unknown_size, transcode)
+        need = reservation.outstanding
+        with self._changed_cond:
+            if not self._fits(need):
+                self.pauses += 1
+                if on_wait is not None:
+                    on_wait(self.free(), need)
+                while not self._fits(need):
+                    self._changed_cond.wait(self.poll_seconds)
+            self._reservations.append(reservation)
+        return reservation
+
+    def _changed(self):
+        with self._changed_cond:
+            self._changed_cond.notify_all()
+
+    def _release(self, reservation: Reservation):
+        with self._changed_cond:
+            if not reservation.released:
+                reservation.released = True
+                self._reservations.remove(reservation)
+            self._changed_cond.notify_all()
+
+    def reservations(self) -> Dict[str, int]:
+        """Оставшийся резерв каждой книги в работе"""
+        with self._lock:
+            return {reservation.name: reservation.outstanding for reservation in self._reservations}
+
+    def stats_line(self) -> str:
+        """Краткая статистика для таблиц и логов"""
+        return (f"свободно {self.free() / MB / 1024:.1f} ГБ, в резерве {self.reserved() / MB:.0f} МБ "
+                f"(порог {self.min_free / MB:.0f} МБ, пауз: {self.pauses})")
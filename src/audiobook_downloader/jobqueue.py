@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📋 Постоянная очередь заданий фонового режима
+SQLite в режиме WAL: очередь переживает перезапуск без повторного разбора
+и проверки списков. Задание - одна книга; порядок - по приоритету, затем
+по времени постановки
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .books import BookInfo
+
+# Состояния задания
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+STATUSES = (QUEUED, RUNNING, DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    """Задание очереди: книга, ее приоритет и состояние"""
+    job_id: int
+    author: str
+    title: str
+    subtitle: str = ""
+    narrator: str = ""
+    year: str = ""
+    category: str = ""
+    priority: int = 0
+    status: str = QUEUED
+    error: str = ""
+    source: str = ""  # Откуда поставлена (имя файла списка или 'api')
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    def to_book(self) -> BookInfo:
+        """Книга для загрузчика (номер книги - номер задания)"""
+        return BookInfo(id=self.job_id, author=self.author, title=self.title, subtitle=self.subtitle,
+                        narrator=self.narrator, year=self.year, category=self.category)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+_COLUMNS = tuple(f.name for f in fields(Job))
+# Поля книги в задании (и в API демона)
+BOOK_FIELDS = ('author', 'title', 'subtitle', 'narrator', 'year', 'category')
+
+
+class JobQueue:
+    """Очередь заданий на диске, общая для рабочих потоков и HTTP API"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " author TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " subtitle TEXT NOT NULL DEFAULT '',"
+            " narrator TEXT NOT NULL DEFAULT '',"
+            " year TEXT NOT NULL DEFAULT '',"
+            " category TEXT NOT NULL DEFAULT '',"
+            " priority INTEGER NOT NULL DEFAULT 0,"
+            " status TEXT NOT NULL DEFAULT 'queued',"
+            " error TEXT NOT NULL DEFAULT '',"
+            " source TEXT NOT NULL DEFAULT '',"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            # Одна книга - одно задание, сколько бы раз ее ни ставили
+            " UNIQUE (author, title, subtitle, narrator, year))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_next ON jobs (status, priority DESC, job_id)"
+        )
+        self._conn.commit()
+
+    def enqueue(self, books: Iterable[BookInfo], priority: int = 0, source: str = "") -> List[int]:
+        """Поставить книги в очередь, вернуть номера новых заданий
+
+        Уже стоящие в очереди и скачанные книги не дублируются; неудавшиеся
+        и отмененные ставятся заново.
+        """
+        now = time.time()
+        added = []
+        with self._lock, self._conn:
+            for book in books:
+                values = (book.author, book.title, book.subtitle, book.narrator, book.year, book.category)
+                row = self._conn.execute(
+                    "SELECT job_id, status FROM jobs WHERE author = ? AND title = ? AND subtitle = ?"
+                    " AND narrator = ? AND year = ?", values[:5]
+                ).fetchone()
+                if row is None:
+                    cursor = self._conn.execute(
+                        f"INSERT INTO jobs ({', '.join(BOOK_FIELDS)}, priority, source, created_at, updated_at)"
+                        f" VALUES ({', '.join('?' * len(BOOK_FIELDS))}, ?, ?, ?, ?)",
+                        (*values, priority, source, now, now)
+                    )
+                    added.append(cursor.lastrowid)
+                elif row[1] in (FAILED, CANCELLED):
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = '', priority = ?, updated_at = ? WHERE job_id = ?",
+                        (QUEUED, priority, now, row[0])
+                    )
+                    added.append(row[0])
+        return added
+
+    def claim(self) -> Optional[Job]:
+        """Следующее задание (самый высокий приоритет, затем самое раннее) - в работу"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE status = ?"
+                " ORDER BY priority DESC, job_id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job(*row)
+            job.status, job.updated_at = RUNNING, time.time()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (RUNNING, job.updated_at, job.job_id)
+            )
+        return job
+
+    def finish(self, job_id: int, ok: bool, error: str = ""):
+        """Итог задания (отмененное во время работы остается отмененным)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (DONE if ok else FAILED, error, time.time(), job_id, RUNNING)
+            )
+
+    def cancel(self, job_id: int) -> bool:
+        """Отменить задание в очереди или в работе (False - уже завершено или нет такого)"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING)
+            )
+            return cursor.rowcount > 0
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """Изменить приоритет задания в очереди (False - уже в работе, завершено или нет такого)"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET priority = ?, updated_at = ? WHERE job_id = ? AND status = ?",
+                (priority, time.time(), job_id, QUEUED)
+            )
+            return cursor.rowcount > 0
+
+    def recover(self) -> int:
+        """Задания, прерванные остановкой процесса, - обратно в очередь"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[Job]:
+        """Задание по номеру"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return Job(*row) if row else None
+
+    def status_of(self, job_id: int) -> Optional[str]:
+        """Состояние задания (None - нет такого)"""
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def jobs(self, status: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Job]:
+        """Задания в порядке очереди (status - только в этом состоянии)"""
+        where, params = ("WHERE status = ?", [status]) if status else ("", [])
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs {where}"
+                " ORDER BY status = 'running' DESC, status = 'queued' DESC, priority DESC, job_id"
+                " LIMIT ? OFFSET ?", (*params, limit, offset)
+            ).fetchall()
+        return [Job(*row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        """Число заданий в каждом состоянии"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def close(self):
+        """Закрытие базы"""
+        with self._lock:
+            self._conn.close()
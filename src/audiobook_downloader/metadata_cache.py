@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🗃️ Постоянный кэш метаданных роликов
+SQLite-кэш урезанных info dict с ключом «экстрактор:id ролика»: разные
+ссылки на один ролик находят одну запись. Постоянные поля (название,
+длительность, канал, список форматов и размеры) живут долго, подписанные
+ссылки на потоки - только до своего срока истечения
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from yt_dlp.extractor.youtube import YoutubeIE
+
+from .resolved import EXPIRY_MARGIN, RESOLVED_TTL, stream_expiry
+from .search_cache import DESCRIPTION_LIMIT
+
+# Поля ролика, которые сохраняются в кэше
+CACHED_INFO_FIELDS = (
+    'id', 'title', 'extractor', 'extractor_key', 'webpage_url', 'original_url',
+    'duration', 'uploader', 'channel', 'channel_id', 'upload_date', 'description',
+    'thumbnail', 'http_headers',
+)
+
+# Поля формата: выбор потока, оценка размера и само скачивание
+CACHED_FORMAT_FIELDS = (
+    'format_id', 'format_note', 'ext', 'container', 'protocol', 'acodec', 'vcodec',
+    'abr', 'tbr', 'asr', 'audio_channels', 'language', 'quality', 'source_preference',
+    'filesize', 'filesize_approx', 'url', 'http_headers', 'downloader_options',
+)
+
+# Экстракторы, id которых можно получить из ссылки без запроса к сайту
+URL_EXTRACTORS = (YoutubeIE,)
+
+
+def video_key(extractor_key: str, video_id: str) -> str:
+    """Ключ записи: экстрактор + id ролика"""
+    return f"{extractor_key.lower()}:{video_id}"
+
+
+def key_for_url(url: str) -> Optional[str]:
+    """Ключ ролика по ссылке (youtu.be/x и watch?v=x дают один ключ) или None"""
+    for extractor in URL_EXTRACTORS:
+        if extractor.suitable(url):
+            video_id = extractor.get_temp_id(url)
+            if video_id:
+                return video_key(extractor.ie_key(), video_id)
+    return None
+
+
+def trim_info(info: dict) -> dict:
+    """Урезанный info dict: только поля, нужные поиску и скачиванию"""
+    trimmed = {key: info[key] for key in CACHED_INFO_FIELDS if info.get(key) is not None}
+    if 'description' in trimmed:
+        trimmed['description'] = trimmed['description'][:DESCRIPTION_LIMIT]
+    trimmed['formats'] = [
+        {key: fmt[key] for key in CACHED_FORMAT_FIELDS if fmt.get(key) is not None}
+        for fmt in info.get('formats') or []
+    ]
+    return trimmed
+
+
+def strip_stream_urls(info: dict) -> dict:
+    """Метаданные без устаревших ссылок на потоки (для скачивания они уже не годятся)"""
+    info = dict(info)
+    info['formats'] = [
+        {key: value for key, value in fmt.items() if key != 'url'}
+        for fmt in info.get('formats') or []
+    ]
+    return info
+
+
+class MetadataCache:
+    """Кэш метаданных роликов на диске, общий для поиска, проверки и скачивания"""
+
+    DEFAULT_TTL = 30 * 24 * 3600  # Месяц для постоянных полей
+    DEFAULT_MAX_ENTRIES = 20000
+
+    def __init__(self, db_path, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_metadata ("
+            " key TEXT PRIMARY KEY,"
+            " info TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " streams_expire_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        # Ссылки, по которым ключ не вычисляется (не YouTube), - через таблицу соответствий
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_aliases (url TEXT PRIMARY KEY, key TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_video_metadata_accessed ON video_metadata (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM video_metadata").fetchone()[0]
+
+    def _key(self, url: str) -> Optional[str]:
+        """Ключ записи по ссылке (вызывается под блокировкой)"""
+        key = key_for_url(url)
+        if key is None:
+            row = self._conn.execute("SELECT key FROM video_aliases WHERE url = ?", (url,)).fetchone()
+            key = row[0] if row else None
+        return key
+
+    def get(self, url: str, streams: bool = False) -> Optional[dict]:
+        """Метаданные ролика или None
+
+        streams=True - только если ссылки на потоки не истекут в ближайшие
+        EXPIRY_MARGIN секунд (как и в памяти, см. is_fresh), иначе устаревшие
+        ссылки просто убираются из форматов.
+        """
+        now = time.time()
+        with self._lock:
+            key = self._key(url)
+            row = None if key is None else self._conn.execute(
+                "SELECT info, created_at, streams_expire_at FROM video_metadata WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM video_metadata WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._size -= 1
+                self.misses += 1
+                return None
+
+            streams_valid = row[2] - now > EXPIRY_MARGIN
+            if streams and not streams_valid:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE video_metadata SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        info = json.loads(row[0])
+        return info if streams_valid else strip_stream_urls(info)
+
+    def put(self, info: Optional[dict], url: Optional[str] = None):
+        """Сохранение метаданных ролика (url - ссылка, по которой его искали)"""
+        if not info or not info.get('id') or not info.get('extractor_key'):
+            return
+        key = video_key(info['extractor_key'], info['id'])
+        now = time.time()
+        trimmed = trim_info(info)
+        # Ссылки на потоки живут до параметра expire, без него - как в памяти
+        expire_at = stream_expiry(trimmed) or now + RESOLVED_TTL
+        payload = json.dumps(trimmed, ensure_ascii=False)
+
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM video_metadata WHERE key = ?", (key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO video_metadata"
+                " (key, info, created_at, streams_expire_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, now, expire_at, now)
+            )
+            for alias in {url, info.get('webpage_url')}:
+                if alias and key_for_url(alias) is None:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO video_aliases (url, key) VALUES (?, ?)", (alias, key)
+                    )
+            if not existed:
+                self._size += 1
+            self._evict()
+            self._conn.commit()
+
+    def expire_streams(self, url: str):
+        """Ссылки на потоки отвергнуты сервером - постоянные поля остаются"""
+        with self._lock:
+            key = self._key(url)
+            if key is not None:
+                self._conn.execute(
+                    "UPDATE video_metadata SET streams_expire_at = 0 WHERE key = ?", (key,)
+                )
+                self._conn.commit()
+
+    def _evict(self):
+        """Удаление давно не использованных записей сверх лимита (вызывается под блокировкой)"""
+        excess = self._size - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM video_metadata WHERE key IN ("
+            " SELECT key FROM video_metadata ORDER BY accessed_at LIMIT ?)",
+            (excess,)
+        )
+        self._conn.execute(
+            "DELETE FROM video_aliases WHERE key NOT IN (SELECT key FROM video_metadata)"
+        )
+        self._size -= excess
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий в кэш"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_line(self) -> str:
+        """Краткая статистика для таблиц и логов"""
+        return f"{self.hits} попаданий / {self.misses} промахов ({self.hit_rate:.0%})"
+
+    def close(self):
+        """Закрытие соединения с базой"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🗂️ Планирование путей для скачанных книг
+Транслитерация одной таблицей перевода и запомненные имена папок
+авторов и серий: для повторяющихся авторов путь не пересчитывается
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+# Кириллица -> латиница для имен папок
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
+    'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
+    'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
+    'Ф': 'F', 'Х': 'H', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
+    'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya'
+}
+
+# Таблица для str.translate: один проход по строке вместо замены каждой буквы
+TRANSLIT_TABLE = str.maketrans(CYRILLIC_TO_LATIN)
+
+UNSAFE_CHARS_PATTERN = re.compile(r'[^\w\s]')
+SPACES_PATTERN = re.compile(r'\s+')
+DIGITS_PATTERN = re.compile(r'\d')
+SERIES_NAME_PATTERN = re.compile(r'[^0-9]+')
+
+# Сколько разных авторов и названий запоминать
+DIR_NAME_CACHE_SIZE = 65536
+
+
+def transliterate(text: str) -> str:
+    """Транслитерация кириллицы в латиницу"""
+    return text.translate(TRANSLIT_TABLE)
+
+
+@lru_cache(maxsize=DIR_NAME_CACHE_SIZE)
+def author_dir_name(author: str) -> str:
+    """Имя папки автора (латиницей)"""
+    author_safe = UNSAFE_CHARS_PATTERN.sub('', transliterate(author))
+    return SPACES_PATTERN.sub('_', author_safe.strip())
+
+
+@lru_cache(maxsize=DIR_NAME_CACHE_SIZE)
+def series_dir_name(title: str) -> Optional[str]:
+    """Имя папки серии, если в названии есть номер ("Дронго 25" -> "Дронго")"""
+    if not DIGITS_PATTERN.search(title):
+        return None
+    
+    series_match = SERIES_NAME_PATTERN.search(title)
+    if not series_match:
+        return None
+    
+    series_safe = UNSAFE_CHARS_PATTERN.sub('', series_match.group(0).strip())
+    series_safe = SPACES_PATTERN.sub('_', series_safe)
+    # Только если название серии осмысленное
+    return series_safe if len(series_safe) > 3 else None
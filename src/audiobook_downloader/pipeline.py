@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🔀 Конвейер поиска и скачивания
+Поиск источников для следующих книг идет, пока скачиваются текущие
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .scheduler import DownloadScheduler, SchedulerResult
+
+# Маркер конца очереди
+_DONE = object()
+
+
+class ResolveDownloadPipeline:
+    """Двухстадийный конвейер: поиск URL -> ограниченная очередь -> скачивание"""
+
+    def __init__(self, resolve: Callable[[Any], List[str]],
+                 download: Callable[[Any, List[str]], bool],
+                 lookahead: int = 3, max_workers: int = 3,
+                 on_start: Optional[Callable[[Any], None]] = None,
+                 on_done: Optional[Callable[[Any, bool], None]] = None):
+        self.resolve = resolve
+        self.download = download
+        self.lookahead = max(1, lookahead)
+        self.max_workers = max_workers
+        self.on_start = on_start
+        self.on_done = on_done
+
+    def _resolve_all(self, items: Iterable[Any], handoff: queue.Queue, stop: threading.Event):
+        """Стадия поиска: заполняет очередь, опережая скачивание на lookahead книг"""
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                try:
+                    urls = self.resolve(item)
+                except Exception:
+                    urls = []
+                if not self._put(handoff, (item, urls), stop):
+                    return
+        finally:
+            self._put(handoff, _DONE, stop)
+
+    @staticmethod
+    def _put(handoff: queue.Queue, job: Any, stop: threading.Event) -> bool:
+        """Положить задачу в очередь, не зависая после остановки конвейера"""
+        while not stop.is_set():
+            try:
+                handoff.put(job, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _drain(handoff: queue.Queue) -> Iterator[Tuple[Any, List[str]]]:
+        """Чтение найденных источников до маркера конца"""
+        while True:
+            job = handoff.get()
+            if job is _DONE:
+                return
+            yield job
+
+    def run(self, items: Iterable[Any]) -> SchedulerResult:
+        """Запуск конвейера для всех элементов"""
+        handoff: queue.Queue = queue.Queue(maxsize=self.lookahead)
+        stop = threading.Event()
+
+        resolver = threading.Thread(
+            target=self._resolve_all,
+            args=(items, handoff, stop),
+            name="resolver",
+            daemon=True
+        )
+        resolver.start()
+
+        scheduler = DownloadScheduler(
+            lambda job: self.download(*job),
+            max_workers=self.max_workers,
+            on_start=(lambda job: self.on_start(job[0])) if self.on_start else None,
+            on_done=(lambda job, ok: self.on_done(job[0], ok)) if self.on_done else None
+        )
+
+        try:
+            return scheduler.run(self._drain(handoff))
+        finally:
+            stop.set()
+            resolver.join(timeout=1)
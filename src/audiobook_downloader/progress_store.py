@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+💾 Хранилище прогресса скачивания
+SQLite в режиме WAL: запись одной книги - O(1), без перезаписи всего файла,
+и без потери данных при аварийном завершении процесса
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+
+@dataclass
+class ProgressRecord:
+    """Запись о скачанной книге"""
+    book_id: int
+    title: str
+    url: str = ""
+    category: str = ""
+    file_path: str = ""
+    downloaded_at: str = ""
+
+    @classmethod
+    def from_legacy(cls, book_id: int, value: Union[str, dict]) -> 'ProgressRecord':
+        """Запись из старого download_progress.json (строка или словарь)"""
+        if isinstance(value, str):
+            return cls(book_id=book_id, title=value)
+        known = {f.name for f in fields(cls)}
+        data = {key: str(val) for key, val in value.items() if key in known and val is not None}
+        data.pop('book_id', None)
+        data.setdefault('title', '')
+        return cls(book_id=book_id, **data)
+
+
+@dataclass
+class PartialDownload:
+    """Незавершенное скачивание, которое можно продолжить после перезапуска"""
+    book_id: int
+    url: str
+    format_id: str = ""
+    temp_path: str = ""
+    bytes_received: int = 0
+    total_bytes: int = 0
+    updated_at: float = 0.0
+
+
+_COLUMNS = tuple(f.name for f in fields(ProgressRecord))
+_PARTIAL_COLUMNS = tuple(f.name for f in fields(PartialDownload))
+
+
+class ProgressStore(Mapping):
+    """Прогресс скачивания: book_id -> ProgressRecord
+
+    Поддерживает интерфейс словаря только для чтения (``book.id in store``,
+    ``store[book.id]``, ``len(store)``), запись - через ``add``.
+    """
+
+    def __init__(self, db_path, legacy_json: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS downloads ("
+            " book_id INTEGER PRIMARY KEY,"
+            " title TEXT NOT NULL,"
+            " url TEXT NOT NULL DEFAULT '',"
+            " category TEXT NOT NULL DEFAULT '',"
+            " file_path TEXT NOT NULL DEFAULT '',"
+            " downloaded_at TEXT NOT NULL DEFAULT '')"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS partials ("
+            " book_id INTEGER PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " format_id TEXT NOT NULL DEFAULT '',"
+            " temp_path TEXT NOT NULL DEFAULT '',"
+            " bytes_received INTEGER NOT NULL DEFAULT 0,"
+            " total_bytes INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        if legacy_json is not None:
+            self.import_json(legacy_json)
+
+    def import_json(self, json_path: Path) -> int:
+        """Импорт старого download_progress.json (повторно - только если файл менялся)"""
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+
+        stat = json_path.stat()
+        marker = f"{stat.st_size}:{stat.st_mtime_ns}"
+        meta_key = f"imported:{json_path.name}"
+
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (meta_key,)).fetchone()
+            if row and row[0] == marker:
+                return 0
+
+            with open(json_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+
+            records = [ProgressRecord.from_legacy(int(k), v) for k, v in legacy.items()]
+            with self._conn:
+                # Уже записанные в базу книги не перезаписываем
+                self._conn.executemany(
+                    f"INSERT OR IGNORE INTO downloads ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                    [tuple(asdict(record).values()) for record in records]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (meta_key, marker)
+                )
+        return len(records)
+
+    def add(self, record: ProgressRecord):
+        """Сохранить запись о скачанной книге (одна транзакция, без перезаписи файла)"""
+        if not record.downloaded_at:
+            record.downloaded_at = time.strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO downloads ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                tuple(asdict(record).values())
+            )
+            # Книга скачана - незавершенная запись больше не нужна
+            self._conn.execute("DELETE FROM partials WHERE book_id = ?", (record.book_id,))
+
+    def set_partial(self, partial: PartialDownload):
+        """Сохранить состояние незавершенного скачивания"""
+        partial.updated_at = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO partials ({', '.join(_PARTIAL_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_PARTIAL_COLUMNS))})",
+                tuple(asdict(partial).values())
+            )
+
+    def get_partial(self, book_id: int) -> Optional[PartialDownload]:
+        """Незавершенное скачивание книги, если оно есть"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_PARTIAL_COLUMNS)} FROM partials WHERE book_id = ?", (book_id,)
+            ).fetchone()
+        return PartialDownload(*row) if row else None
+
+    def clear_partial(self, book_id: int):
+        """Забыть незавершенное скачивание"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM partials WHERE book_id = ?", (book_id,))
+
+    def get(self, book_id: int, default=None) -> Optional[ProgressRecord]:
+        """Запись по номеру книги (поиск по первичному ключу)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM downloads WHERE book_id = ?", (book_id,)
+            ).fetchone()
+        return ProgressRecord(*row) if row else default
+
+    def __getitem__(self, book_id: int) -> ProgressRecord:
+        record = self.get(book_id)
+        if record is None:
+            raise KeyError(book_id)
+        return record
+
+    def __contains__(self, book_id) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM downloads WHERE book_id = ?", (book_id,)
+            ).fetchone() is not None
+
+    def __iter__(self) -> Iterator[int]:
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute("SELECT book_id FROM downloads ORDER BY book_id")]
+        return iter(ids)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def close(self):
+        """Закрытие базы"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🏆 Ранжирование кандидатов поиска
+Общий для всех загрузчиков движок: токенизация со стеммингом (русский и
+английский), BM25 по названию, каналу и описанию, штрафы за EXCLUDE_TERMS,
+бонусы за SEARCH_FILTERS и соответствие длительности аудиокниге
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .settings import get_setting
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Окончания для легкого стемминга (длинные - первыми)
+RUSSIAN_ENDINGS = tuple(sorted((
+    'иями', 'ями', 'ами', 'ией', 'ием', 'иях', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ом', 'ем', 'ам', 'ям',
+    'ах', 'ях', 'ов', 'ев', 'ью', 'ия', 'ии', 'ию',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True))
+ENGLISH_ENDINGS = ('ings', 'ing', 'ies', 'ed', 'es', 's')
+MIN_STEM = 3
+
+# Служебные слова не участвуют в запросе
+STOP_WORDS = frozenset(('и', 'в', 'во', 'на', 'с', 'со', 'по', 'из', 'к', 'о', 'об', 'от', 'для',
+                        'the', 'a', 'an', 'of', 'and', 'in', 'on', 'to'))
+
+# Веса полей кандидата для BM25 (канал - 'channel', иначе 'uploader')
+FIELD_WEIGHTS = (
+    (('title',), 3.0),
+    (('channel', 'uploader'), 1.5),
+    (('description',), 1.0),
+)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Признаки аудиокниги в названии ролика
+AUDIOBOOK_MARKERS = ('аудиокниг', 'audiobook', 'аудиоспектакл')
+
+# Прибавки и штрафы к итоговому баллу
+MARKER_BONUS = 1.0
+HINT_BONUS = 0.5
+EXCLUDE_PENALTY = 5.0
+DURATION_WEIGHT = 1.5
+
+# Минимальная длительность аудиокниги и обычный диапазон (секунды)
+MIN_DURATION = 1800
+EXPECTED_DURATION = (3 * 3600, 30 * 3600)
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """Основа слова: отбрасываем окончание, оставляя не меньше MIN_STEM букв"""
+    token = token.replace('ё', 'е')
+    if len(token) <= MIN_STEM or token.isdigit():
+        return token
+    endings = ENGLISH_ENDINGS if token.isascii() else RUSSIAN_ENDINGS
+    for ending in endings:
+        if token.endswith(ending) and len(token) - len(ending) >= MIN_STEM:
+            return token[:-len(ending)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Основы слов текста в нижнем регистре"""
+    return list(map(stem, TOKEN_PATTERN.findall(text.lower())))
+
+
+def duration_fit(duration: Optional[float], minimum: float = MIN_DURATION,
+                 expected: Tuple[float, float] = EXPECTED_DURATION) -> Optional[float]:
+    """Соответствие длительности аудиокниге: 1 - обычная, 0..1 - на краях,
+    None - слишком короткая (кандидат отбрасывается), 0 - неизвестна"""
+    if duration is None:
+        return 0.0
+    if duration <= minimum:
+        return None
+    low, high = expected
+    if duration < low:
+        return (duration - minimum) / (low - minimum)
+    if duration > high:
+        return max(0.0, 1.0 - (duration - high) / high)
+    return 1.0
+
+
+@dataclass
+class RankedCandidate:
+    """Кандидат с итоговым баллом и его составляющими"""
+    entry: dict
+    score: float
+    relevance: float
+    duration_fit: float
+    excluded: bool
+
+    @property
+    def url(self) -> str:
+        return self.entry.get('webpage_url') or self.entry.get('url') or ''
+
+
+class RelevanceRanker:
+    """Ранжирование пачки кандидатов одним проходом
+
+    Документная частота считается по всей пачке, поэтому общие для всех
+    кандидатов слова (например, "аудиокнига") почти не влияют на порядок,
+    а редкие слова из названия книги - влияют сильно.
+    """
+
+    def __init__(self, exclude_terms: Optional[Sequence[str]] = None,
+                 hints: Optional[Sequence[str]] = None,
+                 min_duration: float = MIN_DURATION,
+                 expected_duration: Tuple[float, float] = EXPECTED_DURATION):
+        exclude_terms = get_setting('EXCLUDE_TERMS', []) if exclude_terms is None else exclude_terms
+        hints = get_setting('SEARCH_FILTERS', []) if hints is None else hints
+        # Фразы исключений сравниваются по основам слов
+        self.exclude_phrases = [' '.join(tokenize(term)) for term in exclude_terms if term.strip()]
+        self.hints = [hint.lower() for hint in hints if hint.strip()]
+        self.min_duration = min_duration
+        self.expected_duration = expected_duration
+
+    def _fields(self, entry: dict) -> List[Tuple[List[str], float]]:
+        """Токены полей кандидата с весами (в порядке FIELD_WEIGHTS, пустые - пустым списком)"""
+        fields = []
+        for names, weight in FIELD_WEIGHTS:
+            value = next((entry[name] for name in names if entry.get(name)), None)
+            fields.append((tokenize(value) if value else [], weight))
+        return fields
+
+    def rank(self, query: str, candidates: Sequence[dict],
+             drop_irrelevant: bool = True) -> List[RankedCandidate]:
+        """Кандидаты по убыванию балла
+
+        query - автор, название и подзаголовок книги. С drop_irrelevant
+        отбрасываются слишком короткие ролики и кандидаты без единого слова
+        запроса и признака аудиокниги. Совпадения с EXCLUDE_TERMS не
+        отбрасываются, а получают штраф EXCLUDE_PENALTY и уходят в конец.
+        """
+        query_terms = {term for term in tokenize(query) if term not in STOP_WORDS}
+        if not candidates:
+            return []
+
+        # Взвешенные частоты слов запроса и длины документов по всей пачке
+        term_freqs: List[Dict[str, float]] = []
+        lengths: List[float] = []
+        texts: List[str] = []
+        document_freq: Counter = Counter()
+
+        for entry in candidates:
+            fields = self._fields(entry)
+            freqs: Dict[str, float] = {}
+            length = 0.0
+            for tokens, weight in fields:
+                length += len(tokens) * weight
+                for token in query_terms.intersection(tokens):
+                    freqs[token] = tokens.count(token) * weight + freqs.get(token, 0.0)
+            term_freqs.append(freqs)
+            lengths.append(length)
+            document_freq.update(freqs.keys())
+            # Название и описание - для поиска фраз исключений
+            texts.append(' '.join(fields[0][0] + fields[-1][0]))
+
+        count = len(candidates)
+        average_length = (sum(lengths) / count) or 1.0
+        idf = {
+            term: math.log(1.0 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_freq.items()
+        }
+
+        ranked = []
+        for entry, freqs, length, text in zip(candidates, term_freqs, lengths, texts):
+            fit = duration_fit(entry.get('duration'), self.min_duration, self.expected_duration)
+            if fit is None and drop_irrelevant:
+                continue
+
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * length / average_length)
+            relevance = sum(
+                idf[term] * tf * (BM25_K1 + 1.0) / (tf + norm)
+                for term, tf in freqs.items()
+            )
+
+            padded = f" {text} "
+            excluded = any(f" {phrase} " in padded for phrase in self.exclude_phrases)
+            title = (entry.get('title') or '').lower()
+            has_marker = any(marker in title for marker in AUDIOBOOK_MARKERS)
+
+            if drop_irrelevant and not (freqs or has_marker):
+                continue
+
+            score = relevance
+            score += MARKER_BONUS if has_marker else 0.0
+            score += HINT_BONUS * sum(1 for hint in self.hints if hint in title)
+            score += DURATION_WEIGHT * (fit or 0.0)
+            score -= EXCLUDE_PENALTY if excluded else 0.0
+
+            ranked.append(RankedCandidate(entry, round(score, 4), relevance, fit or 0.0, excluded))
+
+        ranked.sort(key=lambda candidate: candidate.score, reverse=True)
+        return ranked
+
+
+_default_ranker: Optional[RelevanceRanker] = None
+_default_ranker_lock = threading.Lock()
+
+
+def get_ranker() -> RelevanceRanker:
+    """Общий ранжировщик процесса (настройки из конфига)"""
+    global _default_ranker
+    with _default_ranker_lock:
+        if _default_ranker is None:
+            _default_ranker = RelevanceRanker()
+        return _default_ranker
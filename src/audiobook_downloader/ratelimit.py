@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🚦 Ограничитель частоты запросов
+Корзины токенов по хосту и типу операции, общие для всех рабочих потоков
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from .settings import get_setting
+
+# Лимиты на случай, если в конфиге нет RATE_LIMITS
+DEFAULT_RATE_LIMITS = {
+    'default': {
+        'search': (1.0, 3),
+        'metadata': (1.0, 3),
+        'download': (0.5, 2),
+    },
+}
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше burst про запас"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """Начисление токенов за прошедшее время (вызывается под блокировкой)"""
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Забронировать токены, вернуть время ожидания до их появления
+
+        Баланс может уйти в минус: следующие запросы встают в очередь
+        за текущим, поэтому порядок обслуживания потоков справедливый.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        """Дождаться токенов"""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    def drain(self, seconds: float):
+        """Задержать выдачу токенов на seconds секунд (пауза после ошибки)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class RateLimiter:
+    """Набор корзин по (хост, операция) с настройками из конфига"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Tuple[float, float]]]] = None):
+        self.limits = limits or get_setting('RATE_LIMITS', DEFAULT_RATE_LIMITS)
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _limit_for(self, host: str, operation: str) -> Tuple[float, float]:
+        """Лимит операции: настройка хоста, иначе общая по умолчанию"""
+        host_limits = self.limits.get(host, {})
+        if operation in host_limits:
+            return host_limits[operation]
+        default_limits = self.limits.get('default', DEFAULT_RATE_LIMITS['default'])
+        return default_limits.get(operation, DEFAULT_RATE_LIMITS['default']['search'])
+
+    def bucket(self, host: str, operation: str) -> TokenBucket:
+        """Корзина для хоста и операции (создается при первом обращении)"""
+        key = (host, operation)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                rate, burst = self._limit_for(host, operation)
+                bucket = TokenBucket(rate, burst)
+                self._buckets[key] = bucket
+            return bucket
+
+    def acquire(self, host: str, operation: str, tokens: float = 1.0):
+        """Дождаться разрешения на операцию с хостом"""
+        self.bucket(host, operation).acquire(tokens)
+
+    def pause(self, host: str, seconds: float, operation: Optional[str] = None):
+        """Приостановить операции с хостом (все или одну) на seconds секунд"""
+        if operation is not None:
+            self.bucket(host, operation).drain(seconds)
+            return
+        operations = set(self.limits.get('default', {})) | set(self.limits.get(host, {}))
+        for name in operations or DEFAULT_RATE_LIMITS['default']:
+            self.bucket(host, name).drain(seconds)
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Общий ограничитель процесса"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
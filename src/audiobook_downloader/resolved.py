@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+📦 Кэш извлеченных метаданных роликов
+Полный info dict, полученный при поиске или проверке длительности,
+переиспользуется при скачивании - без повторного извлечения страницы,
+пока ссылки на потоки не устарели
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# Сколько секунд метаданные считаются свежими
+RESOLVED_TTL = 3600
+
+# Запас до истечения ссылок на потоки (параметр expire у googlevideo)
+EXPIRY_MARGIN = 600
+
+
+def stream_expiry(info: dict) -> Optional[float]:
+    """Ближайший срок истечения ссылок на потоки (unix-время) или None, если он неизвестен"""
+    expiry = None
+    for fmt in info.get('formats') or []:
+        url = fmt.get('url')
+        if not url or 'expire=' not in url:
+            continue
+        values = parse_qs(urlparse(url).query).get('expire')
+        if values and values[0].isdigit():
+            expire = float(values[0])
+            expiry = expire if expiry is None else min(expiry, expire)
+    return expiry
+
+
+def is_fresh(info: Optional[dict], resolved_at: float, now: Optional[float] = None,
+             ttl: float = RESOLVED_TTL, margin: float = EXPIRY_MARGIN) -> bool:
+    """Можно ли скачивать прямо по info dict
+
+    Нужны полные метаданные (список форматов - плоские результаты поиска его
+    не содержат), не старше ttl и со ссылками, которые не истекут в ближайшие
+    margin секунд.
+    """
+    if not info or not info.get('formats'):
+        return False
+    now = time.time() if now is None else now
+    if now - resolved_at > ttl:
+        return False
+    expiry = stream_expiry(info)
+    return expiry is None or expiry - now > margin
+
+
+class ResolvedInfoCache:
+    """Свежие info dict по URL ролика (в памяти, с вытеснением старых записей)"""
+
+    def __init__(self, max_entries: int = 64, ttl: float = RESOLVED_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Tuple[dict, float]]' = OrderedDict()
+
+    def put(self, url: str, info: Optional[dict]):
+        """Запомнить метаданные ролика (неполные не запоминаются)"""
+        if not info or not info.get('formats'):
+            return
+        with self._lock:
+            self._entries[url] = (info, time.time())
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, url: str) -> Optional[dict]:
+        """Свежие метаданные ролика или None (устаревшие сразу забываются)"""
+        with self._lock:
+            item = self._entries.get(url)
+            if item is not None and is_fresh(item[0], item[1], ttl=self.ttl):
+                self._entries.move_to_end(url)
+                self.hits += 1
+                return item[0]
+            self._entries.pop(url, None)
+            self.misses += 1
+            return None
+
+    def discard(self, url: str):
+        """Забыть метаданные (например, ссылки на потоки отвергнуты сервером)"""
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⚡ Планировщик параллельного скачивания
+Пул рабочих потоков с ограничением нагрузки на каждый хост
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+from .ratelimit import RateLimiter, get_rate_limiter
+from .settings import get_setting
+
+# Синонимы хостов, которые обслуживаются одним сервисом
+HOST_ALIASES = {
+    'youtu.be': 'youtube.com',
+    'm.youtube.com': 'youtube.com',
+    'music.youtube.com': 'youtube.com',
+}
+
+# Пределы одновременных операций на случай, если в конфиге нет HOST_CONCURRENCY
+DEFAULT_HOST_CONCURRENCY = {
+    'default': {
+        'search': 6,
+        'metadata': 4,
+        'download': None,
+    },
+}
+
+
+def host_of(url: str) -> str:
+    """Нормализованный хост URL (без www, с учетом синонимов)"""
+    host = (urlparse(url).hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return HOST_ALIASES.get(host, host)
+
+
+class HostPoliteness:
+    """Ограничение параллельных запросов и частоты обращений к одному хосту
+
+    Число одновременных запросов ограничивается семафором на пару (хост,
+    операция): многочасовые скачивания не занимают слоты поиска и
+    метаданных. Частота - общим ограничителем (RateLimiter) по типу операции.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Optional[int]]]] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
+        self.limits = limits or get_setting('HOST_CONCURRENCY', DEFAULT_HOST_CONCURRENCY)
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._lock = threading.Lock()
+        self._semaphores: Dict[Tuple[str, str], Optional[threading.BoundedSemaphore]] = {}
+
+    def limit_for(self, host: str, operation: str) -> Optional[int]:
+        """Предел одновременных операций: настройка хоста, иначе общая (None - без предела)"""
+        host_limits = self.limits.get(host, {})
+        if operation in host_limits:
+            return host_limits[operation]
+        default_limits = self.limits.get('default', DEFAULT_HOST_CONCURRENCY['default'])
+        return default_limits.get(operation, DEFAULT_HOST_CONCURRENCY['default'].get(operation))
+
+    def _semaphore(self, host: str, operation: str) -> Optional[threading.BoundedSemaphore]:
+        """Семафор хоста и операции (создается при первом обращении)"""
+        key = (host, operation)
+        with self._lock:
+            if key not in self._semaphores:
+                limit = self.limit_for(host, operation)
+                self._semaphores[key] = threading.BoundedSemaphore(limit) if limit else None
+            return self._semaphores[key]
+
+    @contextmanager
+    def slot(self, host: str, operation: str = 'search'):
+        """Занять слот хоста на время запроса (operation: search/metadata/download)"""
+        semaphore = self._semaphore(host, operation)
+        if semaphore is None:
+            # Без предела: число одновременных операций задает пул рабочих потоков
+            self.rate_limiter.acquire(host, operation)
+            yield
+            return
+        with semaphore:
+            self.rate_limiter.acquire(host, operation)
+            yield
+
+
+# Маркер конца элементов
+_END = object()
+
+
+@dataclass
+class SchedulerResult:
+    """Итоги работы планировщика"""
+    successful: int = 0
+    failed: int = 0
+
+
+class DownloadScheduler:
+    """Ограниченный пул рабочих потоков для обработки книг"""
+
+    def __init__(self, worker: Callable[[Any], bool], max_workers: int = 3,
+                 on_start: Optional[Callable[[Any], None]] = None,
+                 on_done: Optional[Callable[[Any, bool], None]] = None):
+        self.worker = worker
+        self.max_workers = max(1, max_workers)
+        self.on_start = on_start
+        self.on_done = on_done
+
+    def _run_one(self, item: Any) -> bool:
+        """Обработка одного элемента с перехватом ошибок"""
+        if self.on_start:
+            self.on_start(item)
+        try:
+            return bool(self.worker(item))
+        except Exception:
+            return False
+
+    def run(self, items: Iterable[Any]) -> SchedulerResult:
+        """Обработать все элементы, не более max_workers одновременно
+
+        Следующий элемент берется из items только при свободном рабочем потоке,
+        а итог готового элемента учитывается сразу, в его потоке: источник
+        может долго ждать новых элементов (очередь демона), и итоги
+        завершенных книг не должны ждать вместе с ним.
+        """
+        result = SchedulerResult()
+        items = iter(items)
+        free_workers = threading.BoundedSemaphore(self.max_workers)
+        done_lock = threading.Lock()
+
+        def finish(item: Any, future: Future):
+            try:
+                ok = not future.cancelled() and future.result()
+                # Итоги по одному, как из одного потока
+                with done_lock:
+                    if ok:
+                        result.successful += 1
+                    else:
+                        result.failed += 1
+                    if self.on_done:
+                        self.on_done(item, ok)
+            finally:
+                free_workers.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # Держим в работе не больше задач, чем рабочих потоков
+                free_workers.acquire()
+                item = next(items, _END)
+                if item is _END:
+                    free_workers.release()
+                    break
+                future = executor.submit(self._run_one, item)
+                future.add_done_callback(partial(finish, item))
+
+        return result
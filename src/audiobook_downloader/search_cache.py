@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🗄️ Постоянный кэш результатов поиска
+SQLite-кэш с TTL и вытеснением давно не использованных записей (LRU)
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# Поля результата поиска, которые сохраняются в кэше
+CACHED_ENTRY_FIELDS = ('webpage_url', 'id', 'title', 'duration', 'uploader', 'channel', 'description')
+
+# Описание нужно только для ранжирования - хватает начала
+DESCRIPTION_LIMIT = 500
+
+
+def normalize_query(query: str) -> str:
+    """Нормализация запроса: регистр и пробелы не влияют на ключ кэша"""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+def trim_entry(entry: dict) -> dict:
+    """Оставляем только поля, нужные для отбора кандидатов"""
+    trimmed = {key: entry[key] for key in CACHED_ENTRY_FIELDS if entry.get(key) is not None}
+    if 'description' in trimmed:
+        trimmed['description'] = trimmed['description'][:DESCRIPTION_LIMIT]
+    return trimmed
+
+
+class SearchCache:
+    """Кэш результатов поиска на диске (ключ - нормализованный запрос)"""
+
+    DEFAULT_TTL = 7 * 24 * 3600  # Неделя
+    DEFAULT_MAX_ENTRIES = 50000
+
+    def __init__(self, db_path, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY,"
+            " entries TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache (accessed_at)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(source: str, query: str) -> str:
+        """Ключ записи: источник поиска + нормализованный запрос"""
+        return f"{source}|{normalize_query(query)}"
+
+    def get(self, source: str, query: str) -> Optional[List[dict]]:
+        """Результаты из кэша или None, если записи нет или она устарела"""
+        key = self.make_key(source, query)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entries, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    self._size -= 1
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE search_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(self, source: str, query: str, entries: List[dict]):
+        """Сохранение результатов поиска"""
+        key = self.make_key(source, query)
+        now = time.time()
+        payload = json.dumps([trim_entry(entry) for entry in entries], ensure_ascii=False)
+
+        with self._lock:
+            existed = self._conn.execute(
+                "SELECT 1 FROM search_cache WHERE key = ?", (key,)
+            ).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, entries, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, payload, now, now)
+            )
+            if not existed:
+                self._size += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Удаление давно не использованных записей сверх лимита (вызывается под блокировкой)"""
+        excess = self._size - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM search_cache WHERE key IN ("
+            " SELECT key FROM search_cache ORDER BY accessed_at LIMIT ?)",
+            (excess,)
+        )
+        self._size -= excess
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий в кэш"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats_line(self) -> str:
+        """Краткая статистика для таблиц и логов"""
+        return f"{self.hits} попаданий / {self.misses} промахов ({self.hit_rate:.0%})"
+
+    def close(self):
+        """Закрытие соединения с базой"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧩 Сегментное скачивание больших медиафайлов
+Файл известного размера делится на диапазоны байт, которые скачиваются
+параллельно по нескольким соединениям из общего пула и пишутся на свои
+места в заранее выделенный файл. Ошибка сегмента повторяет только его
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from yt_dlp.downloader import external
+from yt_dlp.downloader.external import ExternalFD
+from yt_dlp.utils import DownloadError
+
+from .breaker import decorrelated_jitter
+from .settings import get_setting
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Имя движка для external_downloader в опциях yt-dlp
+BACKEND_NAME = 'segmented'
+
+DEFAULT_CONNECTIONS = 4
+DEFAULT_SEGMENT_SIZE = 16 * MB
+DEFAULT_RETRIES = 3
+READ_CHUNK = 256 * 1024
+
+ProgressCallback = Callable[[int, int], None]
+
+
+class SegmentedDownloadError(Exception):
+    """Сегмент не удалось скачать за отведенные попытки"""
+
+
+@dataclass(frozen=True)
+class Segment:
+    """Диапазон байт файла (end включительно, как в заголовке Range)"""
+    index: int
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start + 1
+
+
+def plan_segments(total: int, segment_size: int) -> List[Segment]:
+    """Разбиение файла на сегменты по segment_size байт"""
+    return [
+        Segment(index, start, min(start + segment_size, total) - 1)
+        for index, start in enumerate(range(0, total, segment_size))
+    ]
+
+
+if hasattr(os, 'pwrite'):
+    def positional_write(fd: int, data: bytes, offset: int, lock: threading.Lock):
+        """Запись по смещению без общей позиции файла"""
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(fd, view, offset)
+            view, offset = view[written:], offset + written
+else:  # Windows: позиция файла общая - только под блокировкой
+    def positional_write(fd: int, data: bytes, offset: int, lock: threading.Lock):
+        """Запись по смещению (seek + write под блокировкой)"""
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+
+
+class SegmentedDownloader:
+    """Скачивание одного URL по сегментам в несколько соединений
+
+    Готовые сегменты отмечаются в файле <путь>.segments, поэтому после
+    перезапуска докачиваются только недостающие.
+    """
+
+    def __init__(self, connections: int = DEFAULT_CONNECTIONS,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 retries: int = DEFAULT_RETRIES, timeout: float = 30.0,
+                 proxy: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
+        self.connections = max(1, connections)
+        self.segment_size = segment_size
+        self.retries = retries
+        self.timeout = timeout
+        self.segment_retries = 0
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.connections)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            # Прокси из опций yt-dlp (переменные окружения requests учитывает сам)
+            if proxy:
+                session.proxies.update({'http': proxy, 'https': proxy})
+        self.session = session
+
+    @classmethod
+    def from_settings(cls, **overrides) -> 'SegmentedDownloader':
+        """Загрузчик с настройками SEGMENTED_DOWNLOAD из конфига"""
+        settings = get_setting('SEGMENTED_DOWNLOAD', {})
+        options = {
+            'connections': settings.get('connections', DEFAULT_CONNECTIONS),
+            'segment_size': int(settings.get('segment_size_mb', DEFAULT_SEGMENT_SIZE // MB) * MB),
+            'retries': settings.get('retries', DEFAULT_RETRIES),
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def probe(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[int, bool]:
+        """Размер файла и поддержка Range (запрос первого байта)"""
+        response = self.session.get(url, headers=dict(headers or {}, Range='bytes=0-0'),
+                                    stream=True, timeout=self.timeout)
+        try:
+            response.raise_for_status()
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[1]
+                return (int(total), True) if total.isdigit() else (0, False)
+            return int(response.headers.get('Content-Length') or 0), False
+        finally:
+            response.close()
+
+    def _fetch_segment(self, url: str, headers: Dict[str, str], segment: Segment, fd: int,
+                       write_lock: threading.Lock, on_bytes: Callable[[int], None]):
+        """Скачивание одного сегмента с повторами (повторяется только он)"""
+        delay = 0.0
+        for attempt in range(self.retries + 1):
+            received = 0
+            try:
+                range_headers = dict(headers, Range=f"bytes={segment.start}-{segment.end}")
+                with self.session.get(url, headers=range_headers, stream=True,
+                                      timeout=self.timeout) as response:
+                    if response.status_code != 206:
+                        raise SegmentedDownloadError(
+                            f"сервер не вернул диапазон (HTTP {response.status_code})")
+                    for chunk in response.iter_content(READ_CHUNK):
+                        if received + len(chunk) > segment.size:
+                            raise SegmentedDownloadError("сервер вернул лишние байты")
+                        positional_write(fd, chunk, segment.start + received, write_lock)
+                        received += len(chunk)
+                        on_bytes(len(chunk))
+                if received != segment.size:
+                    raise SegmentedDownloadError(
+                        f"сегмент {segment.index}: получено {received} из {segment.size} байт")
+                return
+            except (requests.RequestException, SegmentedDownloadError) as e:
+                on_bytes(-received)  # Сегмент будет скачан заново
+                if attempt == self.retries:
+                    raise SegmentedDownloadError(f"сегмент {segment.index}: {e}") from e
+                self.segment_retries += 1
+                delay = decorrelated_jitter(delay, 0.5, 10.0)
+                time.sleep(delay)
+
+    def _fetch_whole(self, url: str, headers: Dict[str, str], path: str,
+                     progress: Optional[ProgressCallback]) -> int:
+        """Обычное скачивание одним запросом (сервер не поддерживает Range)"""
+        received = 0
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            total = int(response.headers.get('Content-Length') or 0)
+            with open(path, 'wb') as f:
+                for chunk in response.iter_content(READ_CHUNK):
+                    f.write(chunk)
+                    received += len(chunk)
+                    if progress:
+                        progress(received, total)
+        if total and received != total:
+            raise SegmentedDownloadError(f"получено {received} из {total} байт")
+        return received
+
+    def download(self, url: str, path: str, headers: Optional[Dict[str, str]] = None,
+                 total: Optional[int] = None, progress: Optional[ProgressCallback] = None) -> int:
+        """Скачать url в path, вернуть размер файла
+
+        total - размер из метаданных (иначе он запрашивается у сервера);
+        progress(получено, всего) вызывается по мере записи - по одному вызову
+        за раз, из какого бы потока сегмента он ни шел.
+        """
+        headers = dict(headers or {})
+        supports_ranges = True
+        if not total:
+            total, supports_ranges = self.probe(url, headers)
+        # Без Range или для файла меньше двух сегментов - одним запросом
+        if not supports_ranges or not total or total < 2 * self.segment_size:
+            return self._fetch_whole(url, headers, path, progress)
+
+        segments = plan_segments(total, self.segment_size)
+        journal_path = f"{path}.segments"
+        done = self._completed_segments(path, journal_path, total)
+
+        lock = threading.Lock()
+        write_lock = threading.Lock()
+        progress_lock = threading.Lock()
+        state = {'received': sum(segment.size for segment in segments if segment.index in done)}
+
+        def on_bytes(count: int):
+            # Хуки yt-dlp не рассчитаны на параллельные вызовы - сериализуем
+            with progress_lock:
+                state['received'] += count
+                if progress and count > 0:
+                    progress(state['received'], total)
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0))
+        try:
+            # Место под весь файл выделяется сразу: сегменты пишутся на свои смещения
+            if os.fstat(fd).st_size != total:
+                os.ftruncate(fd, total)
+            with open(journal_path, 'a', encoding='utf-8') as journal, \
+                 ThreadPoolExecutor(max_workers=self.connections) as executor:
+
+                def fetch(segment: Segment):
+                    self._fetch_segment(url, headers, segment, fd, write_lock, on_bytes)
+                    with lock:
+                        journal.write(f"{segment.index}\n")
+                        journal.flush()
+
+                futures = [executor.submit(fetch, segment) for segment in segments if segment.index not in done]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            os.close(fd)
+
+        os.remove(journal_path)
+        return total
+
+    @staticmethod
+    def _completed_segments(path: str, journal_path: str, total: int) -> Set[int]:
+        """Сегменты, скачанные до перезапуска (если файл того же размера)"""
+        if not (os.path.exists(path) and os.path.exists(journal_path)):
+            return set()
+        if os.path.getsize(path) != total:
+            return set()
+        with open(journal_path, encoding='utf-8') as journal:
+            return {int(line) for line in journal if line.strip().isdigit()}
+
+
+class SegmentedFD(ExternalFD):
+    """Движок скачивания yt-dlp: external_downloader={'http': 'segmented'}
+
+    Работает в том же процессе (внешняя программа не нужна); yt-dlp сам
+    переименовывает временный файл и вызывает хуки завершения.
+    """
+
+    SUPPORTED_PROTOCOLS = ('http', 'https')
+
+    @classmethod
+    def get_basename(cls):
+        return BACKEND_NAME
+
+    @classmethod
+    def available(cls, path=None):
+        return True
+
+    def _network_options(self, url: str, info_dict: dict) -> Tuple[Dict[str, str], dict]:
+        """Заголовки и параметры соединения из опций yt-dlp: прокси, cookies, таймаут"""
+        headers = dict(info_dict.get('http_headers') or {})
+        cookie = self.ydl.cookiejar.get_cookie_header(url)
+        if cookie:
+            headers['Cookie'] = cookie
+        options = {'proxy': self.params.get('proxy')}
+        if self.params.get('socket_timeout'):
+            options['timeout'] = float(self.params['socket_timeout'])
+        return headers, options
+
+    def _call_downloader(self, tmpfilename, info_dict):
+        headers, options = self._network_options(info_dict['url'], info_dict)
+        downloader = SegmentedDownloader.from_settings(**options)
+        total = info_dict.get('filesize') or 0
+        started = time.time()
+
+        def progress(received: int, expected: int):
+            self._hook_progress({
+                'status': 'downloading',
+                'downloaded_bytes': received,
+                'total_bytes': expected or None,
+                'tmpfilename': tmpfilename,
+                'filename': self.undo_temp_name(tmpfilename),
+                'elapsed': time.time() - started,
+            }, info_dict)
+
+        try:
+            downloader.download(info_dict['url'], tmpfilename, headers, total=total, progress=progress)
+        except (requests.RequestException, SegmentedDownloadError, OSError) as e:
+            raise DownloadError(f"[{BACKEND_NAME}] {e}") from e
+        return 0
+
+
+def register_backend() -> bool:
+    """Сделать движок доступным по имени в external_downloader
+
+    Открытого способа добавить движок в yt-dlp нет: имя вносится в его
+    таблицу внешних загрузчиков. Если устройство таблицы изменилось, движок
+    не регистрируется и остается встроенный.
+    """
+    registry = getattr(external, '_BY_NAME', None)
+    if not isinstance(registry, dict) or not callable(getattr(external, 'get_external_downloader', None)):
+        logger.warning("Эта версия yt-dlp не позволяет подключить сегментный движок - используется встроенный")
+        return False
+    registry.setdefault(BACKEND_NAME, SegmentedFD)
+    return external.get_external_downloader(BACKEND_NAME) is SegmentedFD
+
+
+def backend_options(backend: Optional[str] = None) -> Dict[str, object]:
+    """Опции yt-dlp для движка скачивания медиафайлов (MEDIA_BACKEND из конфига)"""
+    backend = backend or get_setting('MEDIA_BACKEND', 'native')
+    if backend != BACKEND_NAME or not register_backend():
+        return {}
+    return {'external_downloader': {'http': BACKEND_NAME}}
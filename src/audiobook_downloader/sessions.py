@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+♻️ Пул сессий yt-dlp
+Долгоживущие экземпляры YoutubeDL, сгруппированные по профилю опций
+"""
+
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import yt_dlp
+
+# Хуки yt-dlp хранятся не в params, а в собственных списках экземпляра
+HOOK_LISTS = {
+    'progress_hooks': ('add_progress_hook', '_progress_hooks'),
+    'post_hooks': ('add_post_hook', '_post_hooks'),
+}
+
+# Ключ сохраненного селектора формата среди подмененных параметров
+FORMAT_SELECTOR = '__format_selector__'
+
+
+def profile_key(opts: Dict[str, Any]) -> str:
+    """Ключ профиля: одинаковые опции - один и тот же набор сессий"""
+    return json.dumps(opts, sort_keys=True, ensure_ascii=False, default=repr)
+
+
+class YDLSessionPool:
+    """Потокобезопасный пул экземпляров YoutubeDL
+
+    Экземпляр выдается в монопольное пользование на время блока ``with``
+    и затем возвращается в пул, поэтому соединения, cookie и загруженные
+    экстракторы переиспользуются между книгами и рабочими потоками.
+    """
+
+    def __init__(self, max_idle_per_profile: int = 8,
+                 factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        self.max_idle_per_profile = max_idle_per_profile
+        self.factory = factory or yt_dlp.YoutubeDL
+        self.created = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._idle: Dict[str, List[Any]] = defaultdict(list)
+
+    def _checkout(self, key: str, opts: Dict[str, Any]):
+        """Взять свободный экземпляр профиля или создать новый"""
+        with self._lock:
+            idle = self._idle[key]
+            if idle:
+                self.reused += 1
+                return idle.pop()
+            self.created += 1
+        return self.factory(dict(opts))
+
+    def _checkin(self, key: str, ydl):
+        """Вернуть экземпляр в пул (лишние закрываются)"""
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.max_idle_per_profile:
+                idle.append(ydl)
+                return
+        ydl.close()
+
+    @staticmethod
+    def _apply_overrides(ydl, overrides: Dict[str, Any]) -> Dict[str, Any]:
+        """Временная подмена параметров экземпляра (например, outtmpl книги)"""
+        saved = {}
+        for name, value in overrides.items():
+            if name in HOOK_LISTS:
+                add_hook = getattr(ydl, HOOK_LISTS[name][0])
+                for hook in value:
+                    add_hook(hook)
+                saved[name] = list(value)
+                continue
+            saved[name] = ydl.params.get(name)
+            if name == 'outtmpl' and not isinstance(value, dict):
+                # yt-dlp хранит шаблоны словарем - меняем только основной
+                value = dict(ydl.params.get('outtmpl') or {}, default=value)
+            ydl.params[name] = value
+            if name == 'format':
+                # Селектор формата yt-dlp собирает в __init__ по params['format'] -
+                # одна подмена параметра его не меняет
+                saved[FORMAT_SELECTOR] = ydl.format_selector
+                ydl.format_selector = YDLSessionPool._format_selector(ydl, value)
+        return saved
+
+    @staticmethod
+    def _format_selector(ydl, value):
+        """Селектор формата, как его собирает YoutubeDL.__init__"""
+        if value in (None, '-') or callable(value):
+            return value
+        return ydl.build_format_selector(value)
+
+    @staticmethod
+    def _restore(ydl, saved: Dict[str, Any]):
+        """Восстановление параметров после использования"""
+        for name, value in saved.items():
+            if name in HOOK_LISTS:
+                hooks = getattr(ydl, HOOK_LISTS[name][1])
+                for hook in value:
+                    hooks.remove(hook)
+                continue
+            if name == FORMAT_SELECTOR:
+                ydl.format_selector = value
+                continue
+            if value is None:
+                ydl.params.pop(name, None)
+            else:
+                ydl.params[name] = value
+
+    @contextmanager
+    def session(self, opts: Dict[str, Any], **overrides):
+        """Экземпляр YoutubeDL для профиля opts на время блока with
+
+        overrides - параметры, которые меняются от книги к книге и не
+        должны порождать отдельный профиль (outtmpl и т.п.)
+        """
+        key = profile_key(opts)
+        ydl = self._checkout(key, opts)
+        saved = self._apply_overrides(ydl, overrides)
+        try:
+            yield ydl
+        finally:
+            self._restore(ydl, saved)
+            self._checkin(key, ydl)
+
+    def close(self):
+        """Закрыть все свободные экземпляры"""
+        with self._lock:
+            idle = [ydl for sessions in self._idle.values() for ydl in sessions]
+            self._idle.clear()
+        for ydl in idle:
+            ydl.close()
+
+
+_default_pool: Optional[YDLSessionPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> YDLSessionPool:
+    """Общий пул сессий процесса"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = YDLSessionPool()
+        return _default_pool
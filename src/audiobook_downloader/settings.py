@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+⚙️ Доступ к конфигурации src/config/downloader_config.py
+Конфиг загружается по пути к файлу, поэтому работает при любом способе
+импорта пакета (audiobook_downloader или src.audiobook_downloader)
+"""
+
+import importlib.util
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+CONFIG_PATH = Path(__file__).parent.parent / "config" / "downloader_config.py"
+
+
+@lru_cache(maxsize=None)
+def load_config() -> ModuleType:
+    """Модуль конфигурации (загружается один раз)"""
+    spec = importlib.util.spec_from_file_location("downloader_config", CONFIG_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_setting(name: str, default: Any = None) -> Any:
+    """Значение настройки или default, если ее нет в конфиге"""
+    try:
+        return getattr(load_config(), name, default)
+    except (OSError, ImportError):
+        return default
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🎛️ Стадия перекодирования
+Скачивание сохраняет исходный аудиопоток, а перекодирование (или только
+перепаковка в аудиоконтейнер) идет отдельно в пуле процессов по числу ядер:
+сеть и процессор работают одновременно, а не по очереди. Что делать с
+файлом, определяет профиль результата (OUTPUT_PROFILES в конфиге)
+"""
+
+import multiprocessing
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from .settings import get_setting
+
+# Кодировщик ffmpeg для расширения результата
+ENCODERS = {
+    'mp3': 'libmp3lame',
+    'm4a': 'aac',
+    'opus': 'libopus',
+}
+
+# Формат (muxer) ffmpeg для расширения результата
+MUXERS = {
+    'mp3': 'mp3',
+    'm4a': 'ipod',
+    'opus': 'opus',
+    'ogg': 'ogg',
+    'mka': 'matroska',
+}
+
+# Аудиокодек исходного файла по расширению (так сохраняет потоки yt-dlp)
+SOURCE_CODECS = {
+    'm4a': 'aac',
+    'mp4': 'aac',
+    'webm': 'opus',
+    'opus': 'opus',
+    'ogg': 'vorbis',
+    'mp3': 'mp3',
+}
+
+# Видеоконтейнеры и аудиоконтейнер, в который их поток перепаковывается без перекодирования
+REMUX_TARGETS = {
+    'webm': 'opus',
+    'mp4': 'm4a',
+    'mkv': 'mka',
+}
+
+TRANSCODE = 'transcode'
+COPY = 'copy'
+
+DEFAULT_CODEC = 'mp3'
+DEFAULT_QUALITY = '192'
+DEFAULT_PROFILE = 'mp3'
+
+
+def file_ext(path: str) -> str:
+    """Расширение файла без точки, в нижнем регистре"""
+    return os.path.splitext(path)[1].lstrip('.').lower()
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    """Профиль результата: перекодировать всегда или сохранять исходный поток
+
+    mode=transcode - результат всегда codec/quality (прежнее поведение с MP3).
+    mode=copy - исходный поток сохраняется, видеоконтейнер перепаковывается в
+    аудио; перекодирование в codec - только если кодек не входит в accept
+    (кодеки, которые воспроизводит устройство; пустой - любые).
+    """
+    name: str = DEFAULT_PROFILE
+    mode: str = TRANSCODE
+    codec: str = DEFAULT_CODEC
+    quality: str = DEFAULT_QUALITY  # Битрейт, кбит/с
+    accept: Tuple[str, ...] = ()
+    format: str = 'bestaudio/best'  # Выбор потока yt-dlp
+
+    @classmethod
+    def from_settings(cls, name: Optional[str] = None) -> 'OutputProfile':
+        """Профиль из OUTPUT_PROFILES конфига (по умолчанию - OUTPUT_PROFILE)"""
+        name = name or get_setting('OUTPUT_PROFILE', DEFAULT_PROFILE)
+        profiles = get_setting('OUTPUT_PROFILES', {})
+        if name not in profiles:
+            if name == DEFAULT_PROFILE:
+                return cls()
+            raise ValueError(f"Неизвестный профиль результата: {name} (есть: {', '.join(profiles)})")
+        settings = dict(profiles[name])
+        settings['accept'] = tuple(settings.get('accept', ()))
+        settings['quality'] = str(settings.get('quality', DEFAULT_QUALITY))
+        return cls(name=name, **settings)
+
+
+@dataclass
+class TranscodeJob:
+    """Исходный файл, который нужно перекодировать"""
+    source: str
+    target: str
+    codec: str = DEFAULT_CODEC  # Расширение результата
+    quality: str = DEFAULT_QUALITY  # Битрейт, кбит/с
+    keep_source: bool = False
+    copy: bool = False  # Только перепаковка потока, без перекодирования
+
+
+@dataclass
+class TranscodeResult:
+    """Итог перекодирования одного файла"""
+    job: TranscodeJob
+    ok: bool
+    seconds: float = 0.0
+    error: str = ""
+
+
+def ffmpeg_command(job: TranscodeJob, output: str) -> List[str]:
+    """Команда ffmpeg: только аудио, заданный битрейт (или копия потока), запись в output"""
+    if job.copy:
+        codec_args = ['-codec:a', 'copy']
+    else:
+        codec_args = ['-codec:a', ENCODERS[job.codec], '-b:a', f"{job.quality}k"]
+    return [
+        'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y',
+        '-i', job.source, '-vn', *codec_args, '-f', MUXERS[job.codec], output,
+    ]
+
+
+def plan_output(source: str, target_stem: str, profile: OutputProfile) -> Optional[TranscodeJob]:
+    """Что сделать со скачанным файлом по профилю (None - файл уже готов)"""
+    ext = file_ext(source)
+    if profile.mode == COPY:
+        accepted = not profile.accept or SOURCE_CODECS.get(ext) in profile.accept
+        if accepted:
+            remux_ext = REMUX_TARGETS.get(ext)
+            if remux_ext is None:
+                return None
+            return TranscodeJob(source, f"{target_stem}.{remux_ext}", remux_ext, copy=True)
+    elif ext == profile.codec:
+        return None
+    # Устройство не воспроизводит исходный кодек - перекодируем
+    return TranscodeJob(source, f"{target_stem}.{profile.codec}", profile.codec, profile.quality)
+
+
+def transcode_file(job: TranscodeJob) -> TranscodeResult:
+    """Перекодирование одного файла (выполняется в процессе пула)
+
+    Результат пишется во временный файл и переименовывается только после
+    успешного завершения - недописанный MP3 не примут за готовую книгу.
+    """
+    start = time.perf_counter()
+    partial = f"{job.target}.part"
+    try:
+        completed = subprocess.run(ffmpeg_command(job, partial), capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip()[-500:] or f"ffmpeg: код {completed.returncode}")
+        os.replace(partial, job.target)
+        if not job.keep_source:
+            os.remove(job.source)
+        return TranscodeResult(job, True, time.perf_counter() - start)
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        return TranscodeResult(job, False, time.perf_counter() - start, str(e))
+
+
+class TranscodeStage:
+    """Пул процессов перекодирования с ограниченной очередью
+
+    submit() вызывается рабочими потоками скачивания. Когда перекодирование
+    отстает и очередь заполнена, submit() ждет - скачивание приостанавливается,
+    а не копит на диске несжатые файлы.
+    """
+
+    def __init__(self, workers: int = 0, backlog: int = 0,
+                 profile: Optional[OutputProfile] = None,
+                 runner: Callable[[TranscodeJob], TranscodeResult] = transcode_file):
+        self.workers = workers or os.cpu_count() or 1
+        self.backlog = backlog or 2 * self.workers
+        self.profile = profile or OutputProfile()
+        self.runner = runner
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # Выполняются + ждут очереди: не больше workers + backlog
+        self._slots = threading.BoundedSemaphore(self.workers + self.backlog)
+        self._active = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def from_settings(cls, profile: Optional[str] = None) -> 'TranscodeStage':
+        """Стадия с настройками TRANSCODE и профилем результата из конфига"""
+        settings = get_setting('TRANSCODE', {})
+        return cls(workers=settings.get('workers', 0), backlog=settings.get('backlog', 0),
+                   profile=OutputProfile.from_settings(profile))
+
+    def plan(self, source: str, target_stem: str) -> Optional[TranscodeJob]:
+        """Задание для скачанного файла по профилю стадии (None - файл уже готов)"""
+        return plan_output(source, target_stem, self.profile)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Пул процессов (создается при первом файле)
+
+        Процессы запускаются через spawn: рабочие потоки скачивания держат
+        блокировки, которые fork скопировал бы в дочерний процесс.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def submit(self, job: TranscodeJob,
+               on_done: Optional[Callable[[TranscodeResult], None]] = None) -> Future:
+        """Поставить файл в очередь (ждет, если очередь заполнена)"""
+        self._slots.acquire()
+        with self._lock:
+            self._active += 1
+        try:
+            future = self._pool().submit(self.runner, job)
+        except Exception:
+            with self._idle:
+                self._active -= 1
+                self._idle.notify_all()
+            self._slots.release()
+            raise
+
+        def finished(done: Future):
+            try:
+                result = done.result()
+            except Exception as e:
+                result = TranscodeResult(job, False, error=str(e))
+            with self._lock:
+                self.busy_seconds += result.seconds
+                if result.ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._slots.release()
+            try:
+                if on_done is not None:
+                    on_done(result)
+            finally:
+                # Файл считается обработанным только после on_done (записи прогресса)
+                with self._idle:
+                    self._active -= 1
+                    self._idle.notify_all()
+
+        future.add_done_callback(finished)
+        return future
+
+    @property
+    def queued(self) -> int:
+        """Файлов в работе и в очереди"""
+        with self._lock:
+            return self._active
+
+    def drain(self):
+        """Дождаться перекодирования всех поставленных файлов"""
+        with self._idle:
+            self._idle.wait_for(lambda: self._active == 0)
+
+    def stats_line(self) -> str:
+        """Краткая статистика для таблиц и логов"""
+        return (f"{self.completed} готово / {self.failed} ошибок "
+                f"({self.busy_seconds:.0f}с, процессов: {self.workers}, профиль: {self.profile.name})")
+
+    def close(self):
+        """Дождаться очереди и остановить пул"""
+        self.drain()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -6,18 +6,14 @@
 Настройки обходных путей для YouTube и альтернативных источников
 """
 
-# Конфигурация yt-dlp для обхода блокировок YouTube с MP3 конвертацией
+# Конфигурация yt-dlp для обхода блокировок YouTube
+# (в MP3 перекодирует отдельная стадия, см. TRANSCODE)
 YDL_CONFIG = {
     'format': 'bestaudio/best',
     'ignoreerrors': True,
     'no_warnings': False,  # Включаем предупреждения для отладки
     'noplaylist': True,
     'extract_flat': False,
-    'postprocessors': [{
-        'key': 'FFmpegExtractAudio',
-        'preferredcodec': 'mp3',
-        'preferredquality': '192',
-    }],
     'writeinfojson': False,
     'writethumbnail': False,
     
@@ -32,7 +28,7 @@ YDL_CONFIG = {
     # Дополнительные опции для стабильности
     'retries': 3,
     'socket_timeout': 30,
-    'http_chunk_size': 1048576,  # 1MB chunks
+    'http_chunk_size': 1048576,  # 1MB chunks (встроенный движок, см. MEDIA_BACKEND)
 }
 
 # Альтернативные поисковые запросы
@@ -78,3 +74,139 @@ EXCLUDE_TERMS = [
     'отрывок',
     'фрагмент'
 ]
+
+# Лимиты частоты запросов (общие для всех рабочих потоков)
+# Операции: search - поисковый запрос, metadata - извлечение метаданных ролика,
+# download - старт скачивания медиафайла.
+# Значение: (запросов в секунду, максимальный всплеск)
+RATE_LIMITS = {
+    'default': {
+        'search': (1.0, 3),
+        'metadata': (1.0, 3),
+        'download': (0.5, 2),
+    },
+    # Google быстро показывает капчу - не чаще одного запроса в 2 секунды
+    'google.com': {
+        'search': (0.5, 1),
+    },
+}
+
+# Пределы одновременных операций с одним хостом (по типу операции)
+# Слот скачивания занят все время загрузки, поэтому у скачиваний свой предел
+# и они не вытесняют поиск. None - без предела: одновременных скачиваний не
+# больше, чем рабочих потоков, а их старт сдерживает RATE_LIMITS['download']
+HOST_CONCURRENCY = {
+    'default': {
+        'search': 6,
+        'metadata': 4,
+        'download': None,
+    },
+}
+
+# Правила сортировки книг по папкам категорий
+# Папка = "<регион>_<жанр>". Регион и жанр ищутся в заголовке категории (## ...),
+# при их отсутствии - по списку известных авторов и по названию книги.
+# Порядок ключей задает приоритет: первый найденный регион/жанр побеждает.
+CATEGORY_RULES = {
+    'regions': {
+        'foreign': ['зарубежная', 'зарубеж', 'foreign'],
+        'russian': ['российская', 'русская', 'russian'],
+    },
+    'genres': {
+        'fantasy': ['фантастика', 'фэнтези', 'мистика', 'ужасы', 'фанфики', 'fantasy'],
+        'detective': ['детектив', 'триллер', 'боевик', 'detective', 'thriller'],
+    },
+    'authors': {
+        'foreign_fantasy': [
+            'герберт', 'толкин', 'мартин', 'роулинг', 'кинг', 'лавкрафт',
+            'азимов', 'кларк', 'хайнлайн', 'дик', 'брэдбери', 'ле гуин',
+        ],
+        'foreign_detective': [
+            'кристи', 'дойль', 'стаут', 'чандлер', 'макдональд', 'леонард',
+            'коннелли', 'чайлд', 'харрис', 'гришэм', 'фолетт',
+        ],
+    },
+    'default_region': 'russian',
+    'default_genre': 'fantasy',
+}
+
+# Перекодирование скачанного аудиопотока (пул процессов, отдельно от скачивания)
+# workers - число процессов (0 - по числу ядер);
+# backlog - сколько скачанных файлов может ждать кодировщика, прежде чем
+# скачивание приостановится (0 - два на процесс)
+TRANSCODE = {
+    'workers': 0,
+    'backlog': 0,
+}
+
+# Профили результата (выбираются на запуск, по умолчанию - OUTPUT_PROFILE)
+# mode: 'transcode' - всегда перекодировать в codec/quality (кбит/с);
+#       'copy' - сохранить исходный поток без перекодирования (webm перепаковывается
+#       в .opus, m4a остается как есть). Если задан accept - кодеки, которые
+#       воспроизводит устройство, - остальные перекодируются в codec/quality.
+# format - какой поток выбирает yt-dlp
+OUTPUT_PROFILES = {
+    'mp3': {
+        'mode': 'transcode',
+        'codec': 'mp3',
+        'quality': '192',
+    },
+    'native': {
+        'mode': 'copy',
+        'format': 'bestaudio/best',
+    },
+    # Плееры без Opus: AAC из m4a сохраняется, остальное - в MP3
+    'aac_player': {
+        'mode': 'copy',
+        'accept': ['aac', 'mp3'],
+        'codec': 'mp3',
+        'quality': '192',
+        'format': 'bestaudio[ext=m4a]/bestaudio/best',
+    },
+}
+OUTPUT_PROFILE = 'mp3'
+
+# Движок скачивания медиафайлов:
+# 'native' - встроенный в yt-dlp (одно соединение);
+# 'segmented' - файл известного размера делится на диапазоны байт, которые
+# качаются параллельно (обходит ограничение скорости на одно соединение);
+# прокси, cookies и socket_timeout берутся из опций yt-dlp
+MEDIA_BACKEND = 'native'
+
+# Настройки сегментного движка
+SEGMENTED_DOWNLOAD = {
+    'connections': 4,       # Параллельных соединений на файл
+    'segment_size_mb': 16,  # Размер сегмента
+    'retries': 3,           # Повторов одного сегмента
+}
+
+# Общий лимит скорости скачивания на все параллельные загрузки
+# (0 - без лимита). Полоса делится поровну, доля загрузки, которая ее не
+# выбирает, отдается остальным; приоритетные книги получают priority_weight долей
+BANDWIDTH = {
+    'bytes_per_sec': 0,
+    'priority_weight': 3.0,
+    # Окна по времени суток (первое подходящее), например днем - скромнее:
+    # {'from': '09:00', 'to': '23:00', 'bytes_per_sec': 2 * 1024 * 1024},
+    'schedule': [],
+}
+
+# Допуск книг по свободному месту: книга резервирует оценку своего размера
+# и места под перекодирование; если после резерва на диске останется меньше
+# min_free_mb, очередь ждет освобождения места вместо ошибок скачивания
+DISK_SPACE = {
+    'min_free_mb': 1024,
+    'unknown_size_mb': 300,  # Резерв книги без метаданных о размере
+    'poll_seconds': 30,      # Как часто перепроверять диск во время паузы
+}
+
+# Фоновый режим (демон): постоянная очередь заданий и HTTP API только на
+# локальном адресе. У демона своя папка данных (относительно корня проекта):
+# номера книг в нем - номера заданий, а не строк списка
+DAEMON = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'data_dir': 'downloads/daemon',
+    'workers': 3,
+    'lookahead': 3,
+}
@@ -59,6 +59,7 @@ check_gui_dependencies()
 
 try:
     from src.audiobook_downloader import AudiobookParser, AudiobookDownloader, BookInfo
+    from src.audiobook_downloader.client import DaemonClient, DaemonError
 except ImportError as e:
     print(f"❌ Ошибка импорта: {e}")
     print("📁 Убедитесь что пакет audiobook_downloader доступен")
@@ -177,17 +178,21 @@ class AudiobookGUI:
         self.stop_btn = ttk.Button(control_frame, text="⏹️ Остановить", command=self.stop_download, state='disabled')
         self.stop_btn.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
         
+        # Фоновый режим: скачивает демон, окно можно закрыть
+        ttk.Button(control_frame, text="📨 В очередь демона", command=self.send_to_daemon).grid(
+            row=4, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        
         # Прогресс
-        ttk.Label(control_frame, text="Прогресс:").grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(10, 5))
+        ttk.Label(control_frame, text="Прогресс:").grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=(10, 5))
         self.progress_var = tk.StringVar(value="Готов к работе")
-        ttk.Label(control_frame, textvariable=self.progress_var, style='Info.TLabel').grid(row=5, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(control_frame, textvariable=self.progress_var, style='Info.TLabel').grid(row=6, column=0, columnspan=2, sticky=tk.W)
         
         self.progress_bar = ttk.Progressbar(control_frame, mode='determinate')
-        self.progress_bar.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 10))
+        self.progress_bar.grid(row=7, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 10))
         
         # Статистика
         self.stats_var = tk.StringVar(value="Статистика появится здесь")
-        ttk.Label(control_frame, textvariable=self.stats_var, style='Info.TLabel').grid(row=7, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(control_frame, textvariable=self.stats_var, style='Info.TLabel').grid(row=8, column=0, columnspan=2, sticky=tk.W)
         
         # Панель логов
         log_frame = ttk.LabelFrame(main_frame, text="📝 Логи", padding="5")
@@ -242,6 +247,34 @@ class AudiobookGUI:
             self.log(f"❌ Ошибка загрузки: {e}")
             messagebox.showerror("Ошибка", f"Ошибка загрузки файла: {e}")
             
+    def _filtered_books(self) -> List[BookInfo]:
+        """Книги по полям «Начать с книги» и «Количество книг»"""
+        start_from = int(self.start_var.get()) if self.start_var.get() else 1
+        limit = int(self.limit_var.get()) if self.limit_var.get() else None
+        
+        filtered_books = [book for book in self.books if book.id >= start_from]
+        if limit:
+            filtered_books = filtered_books[:limit]
+        return filtered_books
+    
+    def send_to_daemon(self):
+        """Постановка книг в очередь демона (скачивание идет в фоновом режиме)"""
+        if not self.books:
+            messagebox.showwarning("Предупреждение", "Сначала загрузите список книг!")
+            return
+        
+        try:
+            added = DaemonClient().enqueue_books(self._filtered_books())
+        except ValueError:
+            messagebox.showerror("Ошибка", "Неверные числовые значения!")
+            return
+        except DaemonError as e:
+            messagebox.showerror("Демон недоступен", f"{e}\n\nЗапустите: python launchers/daemon.py")
+            return
+        
+        self.log(f"📨 В очередь демона поставлено новых книг: {len(added)}")
+        messagebox.showinfo("Готово", f"Новых заданий в очереди демона: {len(added)}")
+            
     def start_download(self):
         """Начало скачивания"""
         if not self.books:
@@ -249,13 +282,8 @@ class AudiobookGUI:
             return
             
         try:
-            start_from = int(self.start_var.get()) if self.start_var.get() else 1
-            limit = int(self.limit_var.get()) if self.limit_var.get() else None
-            
             # Фильтрация книг
-            filtered_books = [book for book in self.books if book.id >= start_from]
-            if limit:
-                filtered_books = filtered_books[:limit]
+            filtered_books = self._filtered_books()
                 
             if not filtered_books:
                 messagebox.showwarning("Предупреждение", "Нет книг для скачивания!")
@@ -307,6 +335,9 @@ class AudiobookGUI:
             except Exception as e:
                 failed += 1
                 self.queue.put(('error', f"{book.full_title}: {e}"))
+        
+        # Книги готовы после перекодирования
+        self.downloader.transcoder.drain()
                 
         # Завершение
         self.queue.put(('complete', successful, failed))
@@ -355,6 +386,8 @@ class AudiobookGUI:
             self.progress_var.set("Завершено")
             self.stats_var.set(f"✅ Успешно: {successful} | ❌ Ошибок: {failed}")
             self.log(f"🎉 Скачивание завершено! Успешно: {successful}, Ошибок: {failed}")
+            if self.downloader:
+                self.log(f"🗃️ Кэш метаданных: {self.downloader.metadata.stats_line()}")
             messagebox.showinfo("Готово", f"Скачивание завершено!\nУспешно: {successful}\nОшибок: {failed}")
             
     def log(self, message: str):
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🎧 Audiobook Downloader - Daemon Client
+Консольный клиент фонового режима
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в путь
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+def main():
+    """Главная функция клиента демона"""
+    try:
+        from src.audiobook_downloader.client import main as client_main
+        return client_main()
+    except ImportError as e:
+        print(f"❌ Ошибка импорта: {e}")
+        return 1
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
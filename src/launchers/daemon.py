@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🎧 Audiobook Downloader - Daemon
+Фоновый режим: постоянная очередь заданий и локальный HTTP API
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую папку в путь
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+def main():
+    """Главная функция фонового режима"""
+    try:
+        from src.audiobook_downloader.daemon import main as daemon_main
+        return daemon_main()
+    except ImportError as e:
+        print(f"❌ Ошибка импорта: {e}")
+        return 1
+    except Exception as e:
+        print(f"❌ Ошибка: {e}")
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,6 @@
 """
 
 import sys
-import time
 from pathlib import Path
 
 # Добавляем пути для импорта
@@ -14,6 +13,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from audiobook_downloader.core import AudiobookDownloader, BookInfo
+    from audiobook_downloader.scheduler import host_of
     from utils.youtube_handler import YouTubeErrorHandler, ImprovedSearcher, create_improved_ydl_options
     from config.downloader_config import YDL_CONFIG
     import yt_dlp
@@ -32,7 +32,8 @@ class RobustAudiobookDownloader(AudiobookDownloader):
     def __init__(self, download_dir: str = "downloads"):
         super().__init__(download_dir)
         self.error_handler = YouTubeErrorHandler()
-        self.searcher = ImprovedSearcher()
+        self.searcher = ImprovedSearcher(cache=self.search_cache,
+                                         rate_limiter=self.politeness.rate_limiter)
         
     def download_book_robust(self, book: BookInfo) -> bool:
         """Улучшенная загрузка книги с обработкой ошибок"""
@@ -62,13 +63,10 @@ class RobustAudiobookDownloader(AudiobookDownloader):
             for i, url in enumerate(urls, 1):
                 console.print(f"[blue]🔗 Попытка {i}/{len(urls)}: {url[:60]}...[/blue]")
                 
+                # Паузы между попытками выдерживает ограничитель частоты (RATE_LIMITS)
                 if self.download_from_url_robust(url, book):
                     console.print(f"[green]✅ Успешно скачано: {book.full_title}[/green]")
                     return True
-                
-                # Пауза между попытками
-                if i < len(urls):
-                    time.sleep(3)
             
             console.print(f"[red]❌ Не удалось скачать: {book.full_title}[/red]")
             return False
@@ -79,75 +77,110 @@ class RobustAudiobookDownloader(AudiobookDownloader):
     
     def download_from_url_robust(self, url: str, book: BookInfo) -> bool:
         """Улучшенная загрузка с URL с обработкой ошибок"""
-        target_dir = self._get_category_dir(book.category)
+        target_dir = self._get_category_dir(book.category, book.author, book.title)
         
         # Создаем красивое имя файла
-        safe_title = self._create_safe_filename(book)
+        safe_title = self._create_beautiful_filename(book)
         output_file = target_dir / f"{safe_title}.%(ext)s"
         
-        # Создаем улучшенные опции для yt-dlp
-        ydl_opts = create_improved_ydl_options(target_dir)
-        ydl_opts['outtmpl'] = str(output_file)
+        # Создаем улучшенные опции для yt-dlp (профиль не зависит от книги)
+        ydl_opts = create_improved_ydl_options(self.download_dir)
+        host = host_of(url)
+        downloaded = []
         
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
                 console.print(f"[dim]   🔄 Попытка {attempt + 1}/{max_attempts}[/dim]")
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    # Получаем информацию о видео
-                    info = ydl.extract_info(url, download=False)
-                    
-                    if not info:
-                        console.print("[red]   ❌ Не удалось получить информацию о видео[/red]")
-                        continue
-                    
-                    # Проверяем длительность
-                    duration = info.get('duration', 0)
-                    if duration < 1800:  # Меньше 30 минут
-                        console.print(f"[yellow]   ⚠️ Видео слишком короткое ({duration//60} мин)[/yellow]")
-                        return False
-                    
-                    console.print(f"[green]   ⏱️ Длительность: {duration//3600}ч {(duration%3600)//60}м[/green]")
-                    
-                    # Скачиваем
-                    ydl.download([url])
-                    
-                    # Сохраняем прогресс
-                    self.downloaded_books[book.id] = book.full_title
-                    self._save_progress()
-                    
-                    console.print(f"[green]   ✅ Файл сохранен в {target_dir}[/green]")
-                    return True
-                    
+                # Информация о видео: из поиска, если она еще свежая, иначе - одно извлечение
+                info = self._stored_info(url)
+                
+                # Место под файл и результат перекодирования - до начала скачивания
+                reservation = self._reserve_space(book, self._size_info(url, info), None)
+                try:
+                    # ignoreerrors=False: ошибки нужны для распознавания блокировок.
+                    # Доля общей полосы и резерв места - как в core.download_from_url
+                    with self.bandwidth.stream(book.full_title, priority=book.id in self.priority_ids) as stream, \
+                         self.politeness.slot(host, 'download'), \
+                         self.sessions.session(ydl_opts, outtmpl=str(output_file), ignoreerrors=False,
+                                               post_hooks=[downloaded.append],
+                                               progress_hooks=[stream.hook, reservation.hook]) as ydl:
+                        # Если хост заблокирован - ждем пробного периода, а не тратим попытки.
+                        # Разрешение берется в слоте, прямо перед запросом (как в core)
+                        if self.error_handler.breakers.is_open(host):
+                            wait = self.error_handler.breakers.retry_after(host)
+                            console.print(f"[yellow]   🔌 {host} временно заблокирован, пауза {wait:.0f}с[/yellow]")
+                        self.error_handler.wait_for_host(url)
+                        
+                        if info is None:
+                            info = ydl.extract_info(url, download=False)
+                            self._remember_info(url, info)
+                        
+                        if not info:
+                            console.print("[red]   ❌ Не удалось получить информацию о видео[/red]")
+                            self.error_handler.release(url)
+                            reservation.release()
+                            continue
+                        
+                        # Проверяем длительность
+                        duration = info.get('duration') or 0
+                        if duration < 1800:  # Меньше 30 минут
+                            console.print(f"[yellow]   ⚠️ Видео слишком короткое ({duration//60} мин)[/yellow]")
+                            self.error_handler.release(url)
+                            reservation.release()
+                            return False
+                        
+                        console.print(f"[green]   ⏱️ Длительность: {duration//3600}ч {(duration%3600)//60}м[/green]")
+                        
+                        # Скачиваем по уже полученной информации, без повторного извлечения.
+                        # Хост проверен только настоящим скачиванием: сохраненная информация
+                        # запросов не делала и выключатель замыкать не может
+                        self._download_info(ydl, url, info)
+                        self.error_handler.record_success(url)
+                        self.resolved.discard(url)
+                        
+                        # Сохраняем прогресс (MP3 делает стадия перекодирования)
+                        source = downloaded[-1] if downloaded else ydl.prepare_filename(info)
+                        self._finish_download(book, url, source, target_dir / safe_title, reservation)
+                        
+                        console.print(f"[green]   ✅ Файл сохранен в {target_dir}[/green]")
+                        return True
+                except BaseException:
+                    reservation.release()
+                    raise
+                
             except yt_dlp.utils.DownloadError as e:
                 error_msg = str(e)
                 console.print(f"[red]   ❌ Ошибка загрузки: {error_msg[:100]}...[/red]")
                 
+                # Блокировки хоста видят все потоки через общий выключатель
+                self.error_handler.record_error(url, error_msg)
+                
                 # Проверяем, связано ли с блокировкой YouTube
                 if self.error_handler.is_youtube_blocked(error_msg):
                     console.print("[yellow]   🚫 Обнаружена блокировка YouTube[/yellow]")
                     
                     if self.error_handler.should_retry(url, "youtube_block"):
-                        delay = self.error_handler.get_retry_delay(attempt)
+                        delay = self.error_handler.get_retry_delay(attempt, key=url)
                         console.print(f"[dim]   ⏳ Ожидание {delay:.1f}с перед повтором...[/dim]")
-                        time.sleep(delay)
+                        # Пауза распространяется на все потоки, работающие с этим хостом
+                        self.politeness.rate_limiter.pause(host, delay)
                         continue
                     else:
                         console.print("[red]   🛑 Превышено количество попыток для этого URL[/red]")
                         return False
                 else:
-                    # Другая ошибка - пробуем еще раз
+                    # Другая ошибка - пробуем еще раз (темп задает ограничитель)
                     if attempt < max_attempts - 1:
-                        time.sleep(2)
                         continue
                     else:
                         return False
                         
             except Exception as e:
                 console.print(f"[red]   💥 Неожиданная ошибка: {e}[/red]")
+                self.error_handler.release(url)
                 if attempt < max_attempts - 1:
-                    time.sleep(2)
                     continue
                 else:
                     return False
@@ -227,6 +260,11 @@ def main():
             else:
                 console.print("[red]❌ Книга с таким номером не найдена[/red]")
         
+        downloader.transcoder.close()
+        console.print(f"[dim]🎛️ Перекодирование: {downloader.transcoder.stats_line()}[/dim]")
+        console.print(f"[dim]🗄️ Кэш поиска: {downloader.search_cache.stats_line()}[/dim]")
+        console.print(f"[dim]🗃️ Кэш метаданных: {downloader.metadata.stats_line()}[/dim]")
+        
     except KeyboardInterrupt:
         console.print("\n[yellow]🛑 Остановлено пользователем[/yellow]")
     except Exception as e:
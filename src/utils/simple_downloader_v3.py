@@ -12,8 +12,16 @@ from pathlib import Path
 from typing import List, Optional
 from dataclasses import dataclass
 
+# Добавляем пути для импорта
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 try:
     import yt_dlp
+    from audiobook_downloader.books import BookListParser
+    from audiobook_downloader.ranking import get_ranker
+    from audiobook_downloader.segmented import backend_options
+    from audiobook_downloader.sessions import get_session_pool
+    from audiobook_downloader.transcode import TranscodeStage
     from rich.console import Console
     from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
     from rich.panel import Panel
@@ -49,54 +57,33 @@ class SimpleDownloader:
         os.makedirs(self.download_dir, exist_ok=True)
         os.makedirs(self.mp3_dir, exist_ok=True)
         
-        # Настройки yt-dlp для MP3
+        # Перекодирование в пуле процессов, пока скачивается следующая книга
+        self.transcoder = TranscodeStage.from_settings()
+        
+        # Настройки yt-dlp: исходный аудиопоток, результат задает профиль стадии перекодирования
         self.ydl_opts = {
-            'format': 'bestaudio/best',
+            'format': self.transcoder.profile.format,
             'outtmpl': os.path.join(self.mp3_dir, '%(uploader)s-%(title)s.%(ext)s'),
             'noplaylist': True,
             'extract_flat': False,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
+            **backend_options(),
         }
+        
+        # Общий пул сессий yt-dlp
+        self.sessions = get_session_pool()
+        
+        # Общее ранжирование кандидатов поиска
+        self.ranker = get_ranker()
     
     def load_books(self) -> List[Book]:
         """Загрузка списка книг"""
         books = []
-        current_category = ""
         
         try:
-            with open(self.books_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    
-                    # Пропускаем комментарии и пустые строки
-                    if not line or line.startswith('#'):
-                        continue
-                    
-                    # Определяем категорию
-                    if line.startswith('##'):
-                        current_category = line.replace('##', '').strip()
-                        continue
-                    
-                    # Парсим книгу - поддержка разных типов тире
-                    # Нормализуем тире (заменяем длинное тире на обычное)
-                    normalized_line = line.replace('—', ' - ').replace('–', ' - ')
-                    
-                    if ' - ' in normalized_line:
-                        parts = normalized_line.split(' - ', 1)
-                        if len(parts) == 2:
-                            author = parts[0].strip()
-                            title = parts[1].strip()
-                            
-                            # Обрабатываем запятые в названиях (формат "Серия N, Подзаголовок")
-                            if ',' in title:
-                                title_parts = title.split(',', 1)
-                                title = f"{title_parts[0].strip()}: {title_parts[1].strip()}"
-                            
-                            books.append(Book(author=author, title=title, category=current_category))
+            # Общий потоковый парсер (тот же, что в основной версии)
+            for info in BookListParser(self.books_file).iter_books():
+                title = f"{info.title}: {info.subtitle}" if info.subtitle else info.title
+                books.append(Book(author=info.author, title=title, category=info.category))
                     
         except FileNotFoundError:
             console.print(f"[red]❌ Файл {self.books_file} не найден[/red]")
@@ -119,25 +106,22 @@ class SimpleDownloader:
             try:
                 console.print(f"[dim]🔍 Поиск: {query.split(':')[1][:50]}...[/dim]")
                 
-                with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+                with self.sessions.session({'quiet': True, 'no_warnings': True}) as ydl:
                     search_results = ydl.extract_info(query, download=False)
                     
-                    if 'entries' in search_results and search_results['entries']:
-                        for entry in search_results['entries']:
-                            if entry and 'webpage_url' in entry:
-                                duration = entry.get('duration', 0)
-                                title = entry.get('title', '').lower()
-                                
-                                # Фильтруем по длительности (больше 30 минут)
-                                if duration and duration > 1800:
-                                    # Проверяем релевантность
-                                    author_words = book.author.lower().split()
-                                    if any(word in title for word in author_words if len(word) > 2):
-                                        urls.append(entry['webpage_url'])
-                                        console.print(f"[green]   ✅ Найдено: {entry.get('title', '')[:60]}...[/green]")
-                                        
-                                        if len(urls) >= 2:  # Ограничиваем количество
-                                            break
+                entries = [
+                    entry for entry in (search_results or {}).get('entries') or []
+                    if entry and entry.get('webpage_url') and entry.get('duration')
+                    and entry['webpage_url'] not in urls
+                ]
+                
+                # Общее ранжирование: длительность, слова книги, исключения из конфига
+                for candidate in self.ranker.rank(f"{book.author} {book.title}", entries):
+                    urls.append(candidate.url)
+                    console.print(f"[green]   ✅ Найдено: {candidate.entry.get('title', '')[:60]}...[/green]")
+                    
+                    if len(urls) >= 2:  # Ограничиваем количество
+                        break
                 
                 if len(urls) >= 2:
                     break
@@ -161,26 +145,20 @@ class SimpleDownloader:
         # Создаем красивое имя файла
         safe_author = re.sub(r'[^\w\s-]', '', book.author).strip()
         safe_title = re.sub(r'[^\w\s-]', '', book.title).strip()
-        filename = f"{safe_author}-{safe_title}.%(ext)s"
-        
-        # Настройки для конкретной книги с MP3 конвертацией
-        download_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(self.mp3_dir, filename),
-            'noplaylist': True,
-            'extract_flat': False,
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-        }
+        filename = f"{safe_author}-{safe_title}"
+        downloaded = []
         
-        # Скачиваем первый найденный результат
+        # Скачиваем первый найденный результат (свой шаблон имени)
         try:
-            with yt_dlp.YoutubeDL(download_opts) as ydl:
+            with self.sessions.session(self.ydl_opts, outtmpl=os.path.join(self.mp3_dir, f"{filename}.%(ext)s"),
+                                       post_hooks=[downloaded.append]) as ydl:
                 ydl.download([urls[0]])
             
+            # Перекодирование идет в фоне, поток сразу берется за следующую книгу
+            job = self.transcoder.plan(downloaded[-1], os.path.join(self.mp3_dir, filename)) if downloaded else None
+            if job is not None:
+                self.transcoder.submit(job, on_done=self._report_transcode)
+            
             console.print(f"[green]✅ Успешно скачано: {book.author} - {book.title}[/green]")
             return True
             
@@ -189,6 +167,15 @@ class SimpleDownloader:
             logger.error(f"Ошибка скачивания {book.title}: {e}")
             return False
     
+    def _report_transcode(self, result):
+        """Итог перекодирования файла"""
+        if result.ok:
+            action = "Перепаковано" if result.job.copy else "Перекодировано"
+            console.print(f"[green]🎛️ {action}: {os.path.basename(result.job.target)}[/green]")
+        else:
+            console.print(f"[red]❌ Ошибка перекодирования: {result.error[:100]}[/red]")
+            logger.error(f"Ошибка перекодирования {result.job.source}: {result.error}")
+    
     def download_books(self, books: List[Book]):
         """Скачивание списка книг"""
         if not books:
@@ -214,7 +201,10 @@ class SimpleDownloader:
                 
                 progress.advance(task)
         
+        # Дожидаемся перекодирования последних книг
+        self.transcoder.close()
         console.print(f"\n🎉 Завершено! Успешно: {successful}/{total}")
+        console.print(f"[dim]🎛️ Перекодирование: {self.transcoder.stats_line()}[/dim]")
     
     def run(self):
         """Основной цикл"""
@@ -5,56 +5,117 @@
 🔧 Утилиты для работы с YouTube и обходом блокировок
 """
 
-import time
-import random
+import sys
+import threading
 import requests
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from pathlib import Path
+from urllib.parse import unquote
 import logging
 
+# Добавляем пути для импорта
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from audiobook_downloader.breaker import (
+    HOST_BLOCK_INDICATORS, VIDEO_BLOCK_INDICATORS, decorrelated_jitter,
+    get_circuit_breakers, is_host_block_error
+)
+from audiobook_downloader.ranking import get_ranker
+from audiobook_downloader.ratelimit import get_rate_limiter
+from audiobook_downloader.scheduler import host_of
+from audiobook_downloader.segmented import backend_options
+
 class YouTubeErrorHandler:
-    """Класс для обработки ошибок YouTube и поиска обходных путей"""
+    """Класс для обработки ошибок YouTube и поиска обходных путей
+    
+    Блокировки, обнаруженные любым экземпляром, попадают в общий для процесса
+    выключатель хоста (audiobook_downloader.breaker), а счетчики повторов по
+    URL хранятся в ограниченном LRU-словаре.
+    """
     
-    def __init__(self):
-        self.failed_attempts = {}
+    # Признаки блокировки (в нижнем регистре, вычисляются один раз)
+    BLOCKING_INDICATORS = HOST_BLOCK_INDICATORS + VIDEO_BLOCK_INDICATORS
+    
+    def __init__(self, breakers=None, max_tracked: int = 1024):
+        self.failed_attempts = OrderedDict()
+        self.max_tracked = max_tracked
         self.max_retries = 3
         self.base_delay = 2
+        self.max_delay = 30
+        self.breakers = breakers or get_circuit_breakers()
+        self._last_delay = {}
+        self._lock = threading.Lock()
         
     def should_retry(self, url: str, error_type: str) -> bool:
         """Определяет, стоит ли повторить попытку"""
         key = f"{url}_{error_type}"
-        current_attempts = self.failed_attempts.get(key, 0)
         
-        if current_attempts >= self.max_retries:
-            return False
+        with self._lock:
+            current_attempts = self.failed_attempts.pop(key, 0)
+            if current_attempts >= self.max_retries:
+                self.failed_attempts[key] = current_attempts
+                allowed = False
+            else:
+                self.failed_attempts[key] = current_attempts + 1
+                allowed = True
             
-        self.failed_attempts[key] = current_attempts + 1
-        return True
+            # Ограничиваем размер: вытесняем давно не встречавшиеся URL
+            while len(self.failed_attempts) > self.max_tracked:
+                self.failed_attempts.popitem(last=False)
+        
+        # Пока хост заблокирован, попытки не тратим
+        return allowed and not self.breakers.is_open(host_of(url))
     
-    def get_retry_delay(self, attempt: int) -> float:
-        """Получить задержку перед повтором с экспоненциальным бэкоффом"""
-        delay = self.base_delay * (2 ** attempt) + random.uniform(0, 1)
-        return min(delay, 30)  # Максимум 30 секунд
+    def get_retry_delay(self, attempt: int, key: str = '') -> float:
+        """Задержка перед повтором: экспоненциальный рост с «decorrelated jitter»"""
+        with self._lock:
+            previous = self._last_delay.pop(key, 0.0) if attempt else 0.0
+            delay = decorrelated_jitter(previous, self.base_delay, self.max_delay)
+            self._last_delay[key] = delay
+            while len(self._last_delay) > self.max_tracked:
+                self._last_delay.pop(next(iter(self._last_delay)))
+        return delay
     
     def is_youtube_blocked(self, error_msg: str) -> bool:
         """Проверка, связана ли ошибка с блокировкой YouTube"""
-        blocking_indicators = [
-            'HTTP Error 403',
-            'HTTP Error 429',
-            'Sign in to confirm',
-            'Video unavailable',
-            'Private video',
-            'age-restricted',
-            'SABR streaming'
-        ]
+        message = error_msg.lower()
+        return any(indicator in message for indicator in self.BLOCKING_INDICATORS)
+    
+    def record_error(self, url: str, error_msg: str):
+        """Сообщить выключателю хоста об ошибке загрузки
         
-        return any(indicator.lower() in error_msg.lower() for indicator in blocking_indicators)
+        Блокировка хоста размыкает выключатель; остальные ошибки (ролик
+        удален, приватный и т.п.) означают, что хост отвечает.
+        """
+        if is_host_block_error(error_msg):
+            self.breakers.record_failure(host_of(url))
+        else:
+            self.breakers.record_success(host_of(url))
+    
+    def record_success(self, url: str):
+        """Сообщить выключателю, что хост отвечает"""
+        self.breakers.record_success(host_of(url))
+    
+    def wait_for_host(self, url: str):
+        """Дождаться, пока выключатель хоста разрешит запрос"""
+        self.breakers.wait_until_allowed(host_of(url))
+    
+    def release(self, url: str):
+        """Попытка завершилась ошибкой, не связанной с хостом"""
+        self.breakers.release(host_of(url))
 
 class ImprovedSearcher:
     """Улучшенный поисковик с множественными стратегиями"""
     
-    def __init__(self):
+    def __init__(self, cache=None, rate_limiter=None):
         self.error_handler = YouTubeErrorHandler()
+        # Необязательный постоянный кэш (audiobook_downloader.search_cache.SearchCache)
+        self.cache = cache
+        # Темп запросов к Google задает общий ограничитель (RATE_LIMITS['google.com'])
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # Общее с основным загрузчиком ранжирование кандидатов
+        self.ranker = get_ranker()
         
     def search_with_fallbacks(self, book_info: dict, max_results: int = 10) -> List[str]:
         """Поиск с резервными стратегиями"""
@@ -71,17 +132,26 @@ class ImprovedSearcher:
             try:
                 print(f"🔍 Поиск {i+1}/{len(search_queries)}: {query[:50]}...")
                 
-                # Пробуем разные варианты API
-                try:
-                    # Новый API (только обязательные параметры)
-                    results = list(search(query, num_results=max_results, sleep_interval=2))
-                except TypeError:
+                cached = self.cache.get('google', query) if self.cache else None
+                if cached is not None:
+                    results = [entry['webpage_url'] for entry in cached]
+                else:
+                    self.rate_limiter.acquire('google.com', 'search')
+                    
+                    # Пробуем разные варианты API
                     try:
-                        # Старый API
-                        results = list(search(query, num=max_results, stop=max_results, pause=2))
+                        # Новый API (только обязательные параметры)
+                        results = list(search(query, num_results=max_results, sleep_interval=0))
                     except TypeError:
-                        # Самый простой вариант
-                        results = list(search(query))[:max_results]
+                        try:
+                            # Старый API
+                            results = list(search(query, num=max_results, stop=max_results, pause=0))
+                        except TypeError:
+                            # Самый простой вариант
+                            results = list(search(query))[:max_results]
+                    
+                    if self.cache:
+                        self.cache.put('google', query, [{'webpage_url': url} for url in results])
                 
                 # Фильтруем результаты
                 filtered_results = self._filter_results(results, book_info)
@@ -92,9 +162,8 @@ class ImprovedSearcher:
                     
             except Exception as e:
                 print(f"⚠️ Ошибка поиска: {e}")
-                time.sleep(3)  # Пауза перед следующей попыткой
-                continue
-                time.sleep(3)  # Пауза перед следующей попыткой
+                # Пауза перед следующей попыткой
+                self.rate_limiter.pause('google.com', 3, 'search')
                 continue
         
         # Удаляем дубликаты, сохраняя порядок
@@ -139,32 +208,17 @@ class ImprovedSearcher:
         return queries
     
     def _filter_results(self, results: List[str], book_info: dict) -> List[str]:
-        """Фильтрация результатов по релевантности"""
-        filtered = []
-        author = book_info.get('author', '').lower()
-        title = book_info.get('title', '').lower()
-        
-        for url in results:
-            # Проверяем, что URL содержит ключевые слова
-            url_lower = url.lower()
-            
-            # Приоритет YouTube и другим надежным источникам
-            trusted_sources = ['youtube.com', 'youtu.be', 'vk.com', 'ok.ru']
-            is_trusted = any(source in url_lower for source in trusted_sources)
-            
-            # Проверяем релевантность
-            has_author = any(word in url_lower for word in author.split())
-            has_title = any(word in url_lower for word in title.split())
-            has_audiobook = any(word in url_lower for word in ['аудиокнига', 'audiobook', 'audio'])
-            
-            # Исключаем плохие результаты
-            exclude_terms = ['краткое', 'пересказ', 'анонс', 'трейлер']
-            is_excluded = any(term in url_lower for term in exclude_terms)
-            
-            if is_trusted and (has_author or has_title) and has_audiobook and not is_excluded:
-                filtered.append(url)
+        """Фильтрация результатов по релевантности (общее ранжирование по тексту ссылки)"""
+        # Приоритет YouTube и другим надежным источникам
+        trusted_sources = ['youtube.com', 'youtu.be', 'vk.com', 'ok.ru']
+        candidates = [
+            {'webpage_url': url, 'title': unquote(url).replace('-', ' ').replace('_', ' ')}
+            for url in results
+            if any(source in url.lower() for source in trusted_sources)
+        ]
         
-        return filtered
+        query = f"{book_info.get('author', '')} {book_info.get('title', '')}"
+        return [candidate.url for candidate in self.ranker.rank(query, candidates)]
 
 def create_improved_ydl_options(output_path: Path) -> Dict[str, Any]:
     """Создание улучшенных опций для yt-dlp с обходом блокировок"""
@@ -191,10 +245,12 @@ def create_improved_ydl_options(output_path: Path) -> Dict[str, Any]:
             }
         },
         
-        # Настройки сети
+        # Настройки сети (http_chunk_size - для встроенного движка yt-dlp;
+        # сегментный движок MEDIA_BACKEND качает несколькими соединениями)
         'retries': 5,
         'socket_timeout': 60,
         'http_chunk_size': 1048576,
+        **backend_options(),
         
         # User-Agent для обхода блокировок
         'http_headers': {
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты асинхронного движка
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.async_engine import (
+    DOWNLOADED, DOWNLOADING, FAILED, TRANSCODING, AsyncAudiobookDownloader
+)
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.core import AudiobookDownloader
+
+MB = 1024 * 1024
+
+
+def test_many_books_few_threads(tmp_path):
+    """Сотни книг в очереди обслуживаются фиксированными пулами, события приходят по порядку"""
+    downloader = AudiobookDownloader(str(tmp_path / "downloads"))
+    threads = set()
+
+    def resolve_book(book):
+        return [f"https://youtu.be/{book.id}"]
+
+    def download_resolved(book, urls):
+        threads.add(threading.current_thread().name)
+        for hook in downloader._listener_hooks(book):
+            hook({'status': 'downloading', 'downloaded_bytes': 2 * MB, 'total_bytes': 4 * MB})
+        time.sleep(0.001)
+        if book.id % 10 == 0:
+            return False
+        downloader._notify_completed(book, True)  # Перекодировать нечего - файл на месте
+        return True
+
+    downloader.resolve_book = resolve_book
+    downloader.download_resolved = download_resolved
+    books = [BookInfo(id=i, author=f"Автор {i}", title=f"Книга номер {i}") for i in range(1, 201)]
+
+    async def run():
+        events = []
+        async with AsyncAudiobookDownloader(max_workers=3, downloader=downloader) as engine:
+
+            async def collect():
+                async for event in engine.events():
+                    events.append(event)
+
+            collector = asyncio.create_task(collect())
+            await asyncio.sleep(0)
+            results = await engine.download_books(books)
+        await collector
+        return results, events
+
+    results, events = asyncio.run(run())
+
+    assert len(results) == 200
+    assert sum(results.values()) == 180
+    assert len(threads) <= 3
+    stages = [event.stage for event in events if event.book_id == 7]
+    assert stages[-3:] == [DOWNLOADING, DOWNLOADING, DOWNLOADED]
+    assert next(event for event in events if event.book_id == 7 and event.downloaded_bytes).total_bytes == 4 * MB
+    assert [event.stage for event in events if event.book_id == 10][-1] == FAILED
+    assert downloader.progress_listeners == []
+
+
+def test_downloaded_only_after_transcode(tmp_path):
+    """DOWNLOADED - после перекодирования; пока оно идет, поток скачивания свободен"""
+    downloader = AudiobookDownloader(str(tmp_path / "downloads"))
+    transcoding = []
+    started = []
+
+    def download_resolved(book, urls):
+        started.append(book.id)
+        # Перекодирование завершится позже, в другом потоке (как пул процессов)
+        transcoding.append(threading.Timer(0.3, downloader._notify_completed, (book, book.id == 1)))
+        transcoding[-1].start()
+        return True
+
+    downloader.resolve_book = lambda book: [f"https://youtu.be/{book.id}"]
+    downloader.download_resolved = download_resolved
+    books = [BookInfo(id=i, author="Автор", title=f"Книга {i}") for i in (1, 2)]
+
+    async def run():
+        events = []
+        async with AsyncAudiobookDownloader(max_workers=1, lookahead=1, downloader=downloader) as engine:
+
+            async def collect():
+                async for event in engine.events():
+                    events.append(event)
+
+            collector = asyncio.create_task(collect())
+            await asyncio.sleep(0)
+            results = await engine.download_books(books)
+            assert downloader.search_executor is engine._query_pool
+        await collector
+        return results, events
+
+    started_at = time.monotonic()
+    results, events = asyncio.run(run())
+
+    assert results == {1: True, 2: False}  # Ошибка перекодирования - книга не скачана
+    assert time.monotonic() - started_at < 0.55  # Перекодирования шли одновременно
+    assert [e.stage for e in events if e.book_id == 1][-2:] == [TRANSCODING, DOWNLOADED]
+    assert [e.stage for e in events if e.book_id == 2][-2:] == [TRANSCODING, FAILED]
+    assert downloader.completion_listeners == [] and downloader.search_executor is None
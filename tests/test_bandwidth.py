@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты общего лимита скорости скачивания
+"""
+
+import io
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from rich.console import Console
+from rich.progress import Progress
+
+from audiobook_downloader.bandwidth import MIN_SHARE, BandwidthGovernor, allocate, budget_at
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.core import BandwidthColumn, DownloadRows
+
+MB = 1024 * 1024
+
+
+class FakeClock:
+    """Часы, которые идут только во время пауз"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def test_allocate_fair_and_redistributed():
+    """Поровну между голодными, недобор медленной загрузки достается остальным"""
+    assert allocate(300, [1, 1, 1], [None, None, None]) == [100, 100, 100]
+    assert allocate(300, [1, 1, 1], [30, None, None]) == [30, 135, 135]
+    assert allocate(400, [3, 1], [None, None]) == [300, 100]  # Приоритетная - 3 доли
+
+
+def test_budget_schedule_wraps_midnight():
+    """Ночное окно действует по обе стороны полуночи, вне окон - лимит по умолчанию"""
+    schedule = [{'from': '23:00', 'to': '07:00', 'bytes_per_sec': 0}]
+    assert budget_at(MB, schedule, datetime(2024, 1, 1, 23, 30)) == 0
+    assert budget_at(MB, schedule, datetime(2024, 1, 1, 6, 59)) == 0
+    assert budget_at(MB, schedule, datetime(2024, 1, 1, 12, 0)) == MB
+
+
+def test_streams_paced_to_their_shares():
+    """Загрузки не обгоняют общий лимит, приоритетная получает большую долю"""
+    clock = FakeClock()
+    governor = BandwidthGovernor(bytes_per_sec=4 * MB, priority_weight=3.0,
+                                 clock=clock, sleep=clock.sleep)
+    with governor.stream('обычная') as normal, governor.stream('важная', priority=True) as urgent:
+        assert governor.allocations() == {'обычная': MB, 'важная': 3 * MB}
+        for _ in range(40):
+            urgent.consume(MB // 4)
+        # Простаивающая обычная загрузка отдает свою долю, остается минимум на разгон
+        assert 10 / 4 - 0.5 <= clock.now < 10 / 3  # Не быстрее общего лимита с запасом на рывок
+        assert governor.allocations()['обычная'] == MIN_SHARE
+        assert governor.allocations()['важная'] == 4 * MB - MIN_SHARE
+    assert governor.allocations() == {}
+
+
+def test_unlimited_budget_never_sleeps():
+    """Без лимита загрузки не ждут"""
+    clock = FakeClock()
+    governor = BandwidthGovernor(clock=clock, sleep=clock.sleep)
+    with governor.stream('книга') as stream:
+        stream.hook({'status': 'downloading', 'tmpfilename': 'a.part', 'downloaded_bytes': 100 * MB})
+    assert clock.now == 0.0
+    assert 'без лимита' in governor.summary()
+
+
+def test_download_rows_show_allocated_share():
+    """У каждого скачивания своя строка с выделенной ему долей, у общей - итог и лимит"""
+    governor = BandwidthGovernor(bytes_per_sec=4 * MB)
+    column = BandwidthColumn(governor)
+    progress = Progress(console=Console(file=io.StringIO()))
+    overall = progress.add_task("Скачивание...", total=2)
+    rows = DownloadRows(progress)
+    book = BookInfo(id=1, author="Автор", title="Книга")
+
+    with governor.stream(book.full_title):
+        rows.hook(book, {'status': 'downloading', 'downloaded_bytes': MB, 'total_bytes': 10 * MB})
+        row = progress.tasks[-1]
+        assert (row.completed, row.total) == (MB, 10 * MB)
+        assert column.render(row).plain == "доля 4.0 МБ/с"
+        assert "из 4.0 МБ/с" in column.render(progress.tasks[overall]).plain
+
+    rows.remove(book)
+    assert [task.id for task in progress.tasks] == [overall]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты потокового парсера списка книг
+"""
+
+import sys
+import types
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo, BookListParser, parse_book_line, prepare_books
+
+BOOKS = """# Комментарий
+## ФАНТАСТИКА
+1. Роберт Хайнлайн - Звёздный десант | Чтец: Иван Петров (2024)
+Орсон Скотт Кард — Игра Эндера 1, Игра Эндера
+Жан-Кристоф Гранже – Багровые реки
+
+## ДЕТЕКТИВЫ
+Строка без тире
+Михаил Март — «Настоящий детектив»
+"""
+
+
+def test_line_formats():
+    """Номерованный и простой форматы, подзаголовок после запятой"""
+    book = parse_book_line("1. Роберт Хайнлайн - Звёздный десант | Чтец: Иван Петров (2024)")
+    assert (book.id, book.author, book.title) == (1, "Роберт Хайнлайн", "Звёздный десант")
+    assert (book.narrator, book.year) == ("Иван Петров", "2024")
+
+    book = parse_book_line("Орсон Скотт Кард — Игра Эндера 1, Игра Эндера")
+    assert (book.author, book.title, book.subtitle) == ("Орсон Скотт Кард", "Игра Эндера 1", "Игра Эндера")
+    assert book.id == parse_book_line("Орсон Скотт Кард — Игра Эндера 1, Игра Эндера").id  # ID стабилен
+
+    # Дефис в имени автора не считается разделителем
+    assert parse_book_line("Жан-Кристоф Гранже – Багровые реки").author == "Жан-Кристоф Гранже"
+    assert parse_book_line("Строка без тире") is None
+
+
+def test_streaming_categories_and_errors(tmp_path):
+    """Книги отдаются лениво, категории учитываются, ошибки собираются в отчет"""
+    books_file = tmp_path / "books.txt"
+    books_file.write_text(BOOKS, encoding="utf-8")
+
+    parser = BookListParser(books_file)
+    books = parser.iter_books()
+    assert isinstance(books, types.GeneratorType)
+
+    books = list(books)
+    assert [book.category for book in books] == ["ФАНТАСТИКА"] * 3 + ["ДЕТЕКТИВЫ"]
+    assert parser.error_count == 1
+    assert parser.errors == [(8, "Строка без тире")]
+
+
+def test_book_info_cached_forms():
+    """Запись без __dict__, производные формы считаются один раз"""
+    book = BookInfo(id=1, author="Урсула К. Ле Гуин", title="«Волшебник Земноморья» 1",
+                    subtitle="Волшебник Земноморья")
+    assert not hasattr(book, "__dict__")
+    assert book.search_query == "Урсула К Ле Гуин Волшебник Земноморья 1 аудиокнига"
+    assert book.search_query is book.search_query
+    assert book.alternative_search_queries[0] == book.search_query
+    assert book.filename == "Урсула-К.-Ле-Гуин-Волшебник-Земноморья-1-Волшебник-Земноморья"
+
+    # Кэш не участвует в сравнении и repr
+    assert book == BookInfo(id=1, author=book.author, title=book.title, subtitle=book.subtitle)
+    assert "_derived" not in repr(book)
+
+
+def test_prepare_books():
+    """Пакетная подготовка заполняет кэш всех книг"""
+    books = prepare_books(BookInfo(id=n, author="Автор", title=f"Книга {n}") for n in range(3))
+    assert [book._derived is not None for book in books] == [True] * 3
+    assert books[2].full_title == "Автор - Книга 2"
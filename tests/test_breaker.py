@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты выключателя хостов (circuit breaker)
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreakerRegistry, is_host_block_error
+)
+from audiobook_downloader.core import AudiobookDownloader
+from audiobook_downloader.ratelimit import RateLimiter
+from audiobook_downloader.scheduler import HostPoliteness
+from utils.robust_downloader import RobustAudiobookDownloader
+
+
+def test_block_classification():
+    """Блокировку хоста отличаем от недоступности ролика"""
+    assert is_host_block_error("ERROR: HTTP Error 429: Too Many Requests")
+    assert is_host_block_error("Sign in to confirm you're not a bot")
+    assert not is_host_block_error("ERROR: Private video")
+
+
+def test_open_half_open_close_cycle():
+    """Порог ошибок размыкает, после паузы - одна проба, успех замыкает"""
+    breakers = CircuitBreakerRegistry(failure_threshold=2, base_cooldown=0.05, max_cooldown=0.05)
+    host = 'youtube.com'
+
+    breakers.record_failure(host)
+    assert breakers.state(host) == CLOSED
+    breakers.record_failure(host)
+    assert breakers.state(host) == OPEN
+    assert not breakers.allow(host)
+    assert breakers.state('vk.com') == CLOSED  # Другие хосты не затронуты
+
+    assert breakers.wait_until_allowed(host, timeout=1)
+    assert breakers.state(host) == HALF_OPEN
+    assert not breakers.allow(host)  # Вторая проба не допускается
+
+    breakers.record_success(host)
+    assert breakers.state(host) == CLOSED
+    assert breakers.allow(host)
+
+
+def test_failed_probe_reopens():
+    """Неудачная проба снова размыкает выключатель"""
+    breakers = CircuitBreakerRegistry(failure_threshold=1, base_cooldown=0.05, max_cooldown=0.05)
+    breakers.record_failure('youtube.com')
+    time.sleep(0.06)
+
+    assert breakers.allow('youtube.com')
+    breakers.record_failure('youtube.com')
+    assert breakers.state('youtube.com') == OPEN
+    assert not breakers.wait_until_allowed('youtube.com', timeout=0.01)
+
+
+def test_probe_released_when_download_fails_before_request(tmp_path):
+    """Ошибка подготовки скачивания не занимает пробу half-open: хост не зависает"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    downloader.breakers = CircuitBreakerRegistry(failure_threshold=1, base_cooldown=0.05, max_cooldown=0.05)
+    downloader.breakers.record_failure('youtube.com')
+    time.sleep(0.06)
+
+    def no_space(*args):
+        raise OSError("диск недоступен")
+
+    downloader._reserve_space = no_space
+    book = BookInfo(id=1, author="Автор", title="Книга")
+    assert not downloader.download_from_url("https://youtu.be/abc", book, info={'id': 'abc'})
+    assert downloader.breakers.allow('youtube.com')  # Проба по-прежнему свободна
+
+
+def half_open(downloader, host: str = 'youtube.com') -> CircuitBreakerRegistry:
+    """Выключатель хоста, готовый к пробному запросу"""
+    breakers = CircuitBreakerRegistry(failure_threshold=1, base_cooldown=0.05, max_cooldown=0.05)
+    breakers.record_failure(host)
+    time.sleep(0.06)
+    downloader.breakers = breakers
+    return breakers
+
+
+def test_search_waiting_for_slot_does_not_hold_probe(tmp_path):
+    """Поиск в очереди за слотом хоста не занимает пробу half-open"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    breakers = half_open(downloader)
+    rate = {'default': {'search': (1000.0, 100)}}
+    downloader.politeness = HostPoliteness({'default': {'search': 1}}, rate_limiter=RateLimiter(rate))
+    cancelled = threading.Event()
+    book = BookInfo(id=1, author="Автор", title="Книга")
+
+    with downloader.politeness.slot('youtube.com', 'search'):
+        thread = threading.Thread(target=downloader._run_search_query,
+                                  args=("ytsearch3:Автор Книга", book, cancelled))
+        thread.start()
+        time.sleep(0.1)  # Запрос ждет слота
+        assert breakers.allow('youtube.com')  # Проба свободна
+        breakers.release('youtube.com')
+        cancelled.set()  # Запрос не нужен - в сеть не идем
+    thread.join(timeout=2)
+    assert not thread.is_alive() and breakers.state('youtube.com') == HALF_OPEN
+
+
+def test_robust_cache_hit_does_not_close_breaker(tmp_path):
+    """Сохраненная информация без запроса к хосту не замыкает выключатель"""
+    downloader = RobustAudiobookDownloader(str(tmp_path))
+    downloader.error_handler.breakers = half_open(downloader)
+    url = "https://www.youtube.com/watch?v=stored00000"
+    downloader._stored_info = lambda url: {'id': 'stored00000', 'duration': 7200}
+
+    def broken_download(ydl, url, info):
+        raise OSError("диск недоступен")
+
+    downloader._download_info = broken_download
+    assert not downloader.download_from_url_robust(url, BookInfo(id=1, author="Автор", title="Книга"))
+    assert downloader.error_handler.breakers.state('youtube.com') == HALF_OPEN
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты классификатора категорий
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.classifier import CategoryClassifier, DEFAULT_CATEGORY_RULES
+
+RULES = dict(DEFAULT_CATEGORY_RULES, authors={
+    'foreign_fantasy': ['кинг', 'дик', 'ле гуин'],
+    'foreign_detective': ['кристи'],
+})
+
+
+def test_category_header_rules():
+    """Заголовок категории: прежние правила и их приоритет"""
+    classifier = CategoryClassifier(RULES)
+    assert classifier.classify("ЗАРУБЕЖНАЯ ФАНТАСТИКА").label == "foreign_fantasy"
+    assert classifier.classify("Зарубежные детективы").label == "foreign_detective"
+    assert classifier.classify("РОССИЙСКАЯ ФАНТАСТИКА").label == "russian_fantasy"
+    assert classifier.classify("Русская проза: триллеры").label == "russian_detective"
+    assert classifier.classify("Зарубежная фантастика и детективы") == ("foreign_fantasy", 1.0, "category")
+
+
+def test_authors_title_and_confidence():
+    """Без заголовка решают известные авторы, затем название"""
+    classifier = CategoryClassifier(RULES)
+    assert classifier.classify("", "Стивен Кинг", "Оно") == ("foreign_fantasy", 0.8, "author")
+    assert classifier.classify("ДЕТЕКТИВЫ", "Агата Кристи", "").label == "foreign_detective"
+    assert classifier.classify("", "Дикий Кот", "").reason == "default"  # Только целые слова
+    assert classifier.classify("ДЕТЕКТИВЫ", "Михаил Март", "") == ("russian_detective", 0.6, "category")
+    assert classifier.classify("", "Михаил Март", "Настоящий детектив").confidence == 0.4
+    assert classifier.classify() == ("russian_fantasy", 0.1, "default")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты фонового режима: HTTP API демона и клиент
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.client import DaemonClient, DaemonError
+from audiobook_downloader.core import AudiobookDownloader
+from audiobook_downloader.daemon import DownloadDaemon
+
+
+def wait_for(condition, timeout: float = 5.0):
+    """Ожидание условия (конвейер демона работает в своих потоках)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def make_daemon(data_dir: Path, gate: threading.Event, downloaded: list) -> DownloadDaemon:
+    downloader = AudiobookDownloader(str(data_dir))
+
+    def download_resolved(book, urls):
+        gate.wait(5)
+        # Хуки прогресса, как при настоящем скачивании (отмена прерывает отсюда)
+        for hook in downloader._listener_hooks(book):
+            hook({'status': 'downloading', 'downloaded_bytes': 1})
+        downloaded.append(book.title)
+        downloader._notify_completed(book, True)
+        return True
+
+    downloader.resolve_book = lambda book: [f"https://youtu.be/{book.id}"]
+    downloader.download_resolved = download_resolved
+    return DownloadDaemon(data_dir, port=0, max_workers=1, lookahead=1, downloader=downloader)
+
+
+def test_enqueue_status_priority_cancel(tmp_path):
+    """Книги из строк и файла проходят очередь по приоритету, отмененная не скачивается"""
+    gate = threading.Event()
+    downloaded = []
+    daemon = make_daemon(tmp_path / "daemon", gate, downloaded)
+    daemon.start()
+    try:
+        client = DaemonClient(daemon.url)
+        first = client.enqueue_lines(["Автор - Первая"])['added'][0]
+        assert wait_for(lambda: client.job(first)['status'] == 'running')
+
+        books_file = tmp_path / "books.txt"
+        books_file.write_text("## Фантастика\nАвтор - Вторая\nАвтор - Третья\nАвтор - Четвертая\n",
+                              encoding='utf-8')
+        # Файл разбирается в фоне: ответ приходит сразу, задания - по мере разбора
+        assert client.enqueue_file(books_file)['accepted']
+        assert wait_for(lambda: len(client.jobs()) == 4)
+        second, third, fourth = (job['job_id'] for job in sorted(client.jobs(), key=lambda job: job['job_id'])[1:])
+        assert daemon.enqueue_file(str(books_file)) == []  # Повторная постановка не дублирует
+        assert client.enqueue_lines(["не книга"])['rejected'] == ["не книга"]
+        with pytest.raises(DaemonError):
+            client.enqueue_file(tmp_path / "нет.txt")
+
+        client.set_priority(fourth, 10)
+        client.cancel(third)
+        with pytest.raises(DaemonError, match="нет такого"):
+            client.cancel(9999)
+        with pytest.raises(DaemonError, match="в работе"):
+            client.set_priority(first, 5)  # Приоритет меняется только у ждущих заданий
+
+        gate.set()
+        assert wait_for(lambda: client.status()['jobs']['done'] == 3)
+        # Вторая могла уйти в поиск наперед вместе с первой, до смены приоритета
+        assert downloaded[0] == "Первая" and set(downloaded[1:]) == {"Вторая", "Четвертая"}
+        assert client.job(third)['status'] == 'cancelled'
+        assert client.job(second)['source'] == "books.txt"
+    finally:
+        gate.set()
+        daemon.stop()
+
+
+def test_running_job_cancelled_and_queue_survives_restart(tmp_path):
+    """Отмена прерывает скачивание в работе; после перезапуска очередь продолжается"""
+    gate = threading.Event()
+    downloaded = []
+    daemon = make_daemon(tmp_path / "daemon", gate, downloaded)
+    daemon.start()
+    client = DaemonClient(daemon.url)
+    running = client.enqueue_lines(["Автор - Долгая"])['added'][0]
+    assert wait_for(lambda: client.job(running)['status'] == 'running')
+    client.cancel(running)
+    gate.set()
+    assert wait_for(lambda: not client.status()['running'])
+    assert downloaded == []  # Хук прогресса прервал скачивание
+
+    # Остановка с книгами в очереди: новые задания больше не берутся
+    daemon._stop.set()
+    waiting = daemon.enqueue_lines(["Автор - После перезапуска"])[0]
+    daemon.stop()
+
+    gate = threading.Event()
+    gate.set()
+    restarted = make_daemon(tmp_path / "daemon", gate, downloaded)
+    restarted.start()
+    try:
+        client = DaemonClient(restarted.url)
+        assert wait_for(lambda: client.job(waiting[0])['status'] == 'done')
+        assert downloaded == ["После перезапуска"]
+    finally:
+        restarted.stop()
+
+
+def test_new_job_starts_while_download_in_flight(tmp_path):
+    """Книга, поставленная во время долгого скачивания, берется свободным потоком сразу"""
+    downloader = AudiobookDownloader(str(tmp_path / "daemon"))
+    long_download = threading.Event()
+    downloaded = []
+
+    def download_resolved(book, urls):
+        if book.title == "Долгая":
+            long_download.wait(5)
+        downloaded.append(book.title)
+        downloader._notify_completed(book, True)
+        return True
+
+    downloader.resolve_book = lambda book: [f"https://youtu.be/{book.id}"]
+    downloader.download_resolved = download_resolved
+    daemon = DownloadDaemon(tmp_path / "daemon", port=0, max_workers=2, lookahead=1, downloader=downloader)
+    daemon.start()
+    try:
+        client = DaemonClient(daemon.url)
+        running = client.enqueue_lines(["Автор - Долгая"])['added'][0]
+        assert wait_for(lambda: client.job(running)['status'] == 'running')
+
+        quick = client.enqueue_lines(["Автор - Быстрая"])['added'][0]
+        assert wait_for(lambda: client.job(quick)['status'] == 'done', timeout=2)
+        assert downloaded == ["Быстрая"] and client.job(running)['status'] == 'running'
+    finally:
+        long_download.set()
+        daemon.stop()
+
+
+def test_job_done_only_after_transcode(tmp_path):
+    """Задание завершается по итоговому файлу: пока идет перекодирование - в работе,
+    ошибка перекодирования - неудача"""
+    downloader = AudiobookDownloader(str(tmp_path / "daemon"))
+    transcoding = []
+
+    def download_resolved(book, urls):
+        transcoding.append(book)  # Медиафайл скачан, перекодирование в очереди
+        return True
+
+    downloader.resolve_book = lambda book: [f"https://youtu.be/{book.id}"]
+    downloader.download_resolved = download_resolved
+    daemon = DownloadDaemon(tmp_path / "daemon", port=0, max_workers=2, lookahead=1, downloader=downloader)
+    daemon.start()
+    try:
+        client = DaemonClient(daemon.url)
+        good, bad = client.enqueue_lines(["Автор - Первая", "Автор - Вторая"])['added']
+        assert wait_for(lambda: len(transcoding) == 2)
+        time.sleep(0.1)
+        assert {client.job(good)['status'], client.job(bad)['status']} == {'running'}
+
+        for book in transcoding:
+            downloader._notify_completed(book, book.id == good)
+        assert wait_for(lambda: client.job(bad)['status'] == 'failed')
+        assert client.job(good)['status'] == 'done'
+    finally:
+        daemon.stop()
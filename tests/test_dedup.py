@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты поиска дубликатов в списке книг
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import parse_book_line
+from audiobook_downloader.dedup import deduplicate_books, minhash, normalize_key, trigrams
+
+LINES = [
+    "Орсон Скотт Кард — Игра Эндера 1, Игра Эндера",
+    "Дэн Симмонс — Гиперион 1",
+    "Орсон Скотт Кард - Игра Эндера Часть 01, Игра Эндера",
+    "Orson Skott Kard - Igra Endera 1, Igra Endera",
+    "Дэн Симмонс — Гиперион 2",
+    "Михаил Булгаков — Мастер и Маргарита",
+    "Михаил Булгаков — «Мастер и Маргарит»",
+]
+
+
+def test_exact_and_near_duplicates():
+    """Варианты написания объединяются, тома серии - нет"""
+    books = [parse_book_line(line) for line in LINES]
+    result = deduplicate_books(books)
+
+    assert [book.title for book in result.books] == [
+        "Игра Эндера 1", "Гиперион 1", "Гиперион 2", "Мастер и Маргарита"
+    ]
+    assert result.removed == 3
+
+    ender, master = result.groups
+    assert ender.kept is books[0] and ender.duplicates == [books[2], books[3]]
+    assert ender.exact
+    assert master.duplicates == [books[6]] and not master.exact
+
+
+def test_no_duplicates():
+    """Список без дубликатов не меняется"""
+    books = [parse_book_line(line) for line in LINES[:2]]
+    result = deduplicate_books(books)
+    assert result.books == books and result.groups == []
+
+
+def test_signature_independent_of_hash_seed():
+    """Сигнатуры (а значит, и корзины LSH) одинаковы в любом процессе"""
+    src = str(Path(__file__).parent.parent / "src")
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]);"
+        "from audiobook_downloader.dedup import minhash, trigrams;"
+        "print(minhash(trigrams(sys.argv[2])))"
+    )
+    key = normalize_key(parse_book_line(LINES[5]))
+    signatures = {
+        subprocess.run([sys.executable, "-c", code, src, key], capture_output=True, text=True, check=True,
+                       env={**os.environ, 'PYTHONHASHSEED': seed}).stdout.strip()
+        for seed in ("0", "39", "151", "258", "299")
+    }
+    assert signatures == {str(minhash(trigrams(key)))}
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты допуска скачиваний по свободному месту
+"""
+
+import sys
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.bandwidth import BandwidthStream
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.core import AudiobookDownloader
+from audiobook_downloader.diskspace import DiskAdmission, estimate_download_size, estimate_output_size
+from audiobook_downloader.transcode import COPY, OutputProfile
+from utils.robust_downloader import RobustAudiobookDownloader
+
+MB = 1024 * 1024
+Usage = namedtuple('Usage', 'total used free')
+
+INFO = {
+    'duration': 3600,
+    'formats': [
+        {'format_id': '140', 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a', 'abr': 128, 'filesize': 58 * MB},
+        {'format_id': '251', 'ext': 'webm', 'vcodec': 'none', 'acodec': 'opus', 'abr': 160},
+        {'format_id': '18', 'ext': 'mp4', 'vcodec': 'avc1', 'acodec': 'mp4a', 'tbr': 500},
+    ],
+}
+
+
+def test_estimates_from_filesize_or_bitrate():
+    """Размер из filesize, без него - длительность на битрейт; без метаданных - неизвестен"""
+    assert estimate_download_size(INFO, '140') == 58 * MB
+    assert estimate_download_size(INFO) == 3600 * 160 * 1000 // 8  # Лучший аудиопоток - 251
+    assert estimate_download_size(None) is None
+
+
+def test_output_estimate_follows_profile():
+    """Перекодирование - по битрейту профиля, перепаковка - размер исходника, готовый файл - 0"""
+    mp3 = OutputProfile()
+    assert estimate_output_size(INFO, 58 * MB, mp3, '140') == 3600 * 192 * 1000 // 8
+    native = OutputProfile(name='native', mode=COPY)
+    assert estimate_output_size(INFO, 58 * MB, native, '140') == 0
+    assert estimate_output_size(INFO, 20 * MB, native) == 20 * MB  # webm -> opus
+
+
+def test_admission_waits_for_released_space():
+    """Книга, которой не хватает места, ждет, пока другая не освободит резерв"""
+    admission = DiskAdmission('.', min_free=100 * MB, poll_seconds=5,
+                              usage=lambda path: Usage(0, 0, 400 * MB))
+    first = admission.admit('первая', 200 * MB)
+    paused = []
+    admitted = threading.Event()
+
+    def second():
+        admission.admit('вторая', 150 * MB, on_wait=lambda free, need: paused.append(need))
+        admitted.set()
+
+    thread = threading.Thread(target=second)
+    thread.start()
+    time.sleep(0.1)
+    assert not admitted.is_set() and paused == [150 * MB]
+
+    first.release()
+    assert admitted.wait(1)
+    thread.join()
+    assert admission.reservations() == {'вторая': 150 * MB}
+    assert admission.pauses == 1
+
+
+def test_written_bytes_shrink_reservation():
+    """Записанные байты уже учтены диском - резерв скачивания уменьшается"""
+    admission = DiskAdmission('.', min_free=0, usage=lambda path: Usage(0, 0, 10 ** 12))
+    reservation = admission.admit('книга', 100 * MB, transcode=50 * MB)
+    reservation.hook({'status': 'downloading', 'downloaded_bytes': 30 * MB})
+    assert reservation.outstanding == 120 * MB
+    reservation.downloaded()
+    assert reservation.outstanding == 50 * MB
+    reservation.release()
+    assert admission.reserved() == 0
+
+
+def test_flat_search_duration_used_for_estimate(tmp_path):
+    """После плоского поиска полных метаданных нет - размер оценивается по длительности из выдачи"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    book = BookInfo(id=1, author="Михаил Булгаков", title="Мастер и Маргарита")
+    downloader._run_search_query = lambda query, book, cancelled: [
+        {'webpage_url': "https://www.youtube.com/watch?v=flat", 'duration': 36000,
+         'title': "Булгаков - Мастер и Маргарита. Аудиокнига"}
+    ]
+    url, = downloader.search_youtube(book)
+
+    info = downloader._size_info(url, None)
+    assert estimate_download_size(info) == 36000 * 128 * 1000 // 8
+    assert estimate_download_size(downloader._size_info("https://youtu.be/unknown0000", None)) is None
+
+
+def test_robust_download_reserves_space_and_bandwidth(tmp_path):
+    """Улучшенный загрузчик тоже резервирует место и качает в доле общей полосы"""
+    downloader = RobustAudiobookDownloader(str(tmp_path))
+    url = "https://www.youtube.com/watch?v=robust00000"
+    downloader._stored_info = lambda url: {'id': 'robust00000', 'title': 'Книга', 'ext': 'm4a',
+                                           'duration': 7200, 'formats': []}
+    reserved, hooks, finished = [], [], []
+    reserve_space = downloader._reserve_space
+
+    def tracking_reserve(book, info, format_id):
+        reservation = reserve_space(book, info, format_id)
+        reserved.append((info['duration'], reservation))
+        return reservation
+
+    def fake_download(ydl, url, info):
+        hooks.extend(getattr(hook, '__self__', None) for hook in ydl._progress_hooks)
+
+    downloader._reserve_space = tracking_reserve
+    downloader._download_info = fake_download
+    downloader._finish_download = lambda *args: finished.append(args[-1])
+    assert downloader.download_from_url_robust(url, BookInfo(id=1, author="Автор", title="Книга"))
+
+    (duration, reservation), = reserved
+    assert duration == 7200 and finished == [reservation]
+    assert reservation in hooks and any(isinstance(owner, BandwidthStream) for owner in hooks)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты постоянной очереди заданий
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.jobqueue import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def book(title: str) -> BookInfo:
+    return BookInfo(id=0, author="Автор", title=title)
+
+
+def test_priority_order_and_no_duplicates(tmp_path):
+    """Сначала высокий приоритет, затем порядок постановки; повтор книги не дублируется"""
+    queue = JobQueue(tmp_path / "jobs.db")
+    first, second = queue.enqueue([book("Первая"), book("Вторая")])
+    urgent, = queue.enqueue([book("Срочная")], priority=5)
+    assert queue.enqueue([book("Первая")]) == []
+
+    assert queue.claim().job_id == urgent
+    assert queue.set_priority(second, 1)
+    job = queue.claim()
+    assert (job.job_id, job.status, job.to_book().title) == (second, RUNNING, "Вторая")
+    assert queue.claim().job_id == first
+    assert queue.claim() is None
+
+
+def test_cancel_finish_and_requeue(tmp_path):
+    """Отмененное в работе задание остается отмененным; неудачное и отмененное ставятся заново"""
+    queue = JobQueue(tmp_path / "jobs.db")
+    done_id, cancelled_id = queue.enqueue([book("Готовая"), book("Отмененная")])
+    queue.claim()
+    queue.claim()
+    queue.finish(done_id, True)
+    assert queue.cancel(cancelled_id)
+    queue.finish(cancelled_id, False)
+    assert not queue.cancel(done_id)
+    assert not queue.set_priority(done_id, 5)  # Завершенному заданию приоритет не нужен
+    assert queue.counts() == {QUEUED: 0, RUNNING: 0, DONE: 1, FAILED: 0, CANCELLED: 1}
+
+    assert queue.enqueue([book("Готовая"), book("Отмененная")]) == [cancelled_id]
+    assert queue.status_of(cancelled_id) == QUEUED
+
+
+def test_restart_keeps_queue(tmp_path):
+    """После перезапуска очередь на месте, прерванные задания возвращаются в нее"""
+    queue = JobQueue(tmp_path / "jobs.db")
+    ids = queue.enqueue([book(f"Книга {i}") for i in range(5)])
+    queue.claim()
+    queue.close()
+
+    queue = JobQueue(tmp_path / "jobs.db")
+    assert queue.recover() == 1
+    assert [job.job_id for job in queue.jobs(QUEUED)] == ids
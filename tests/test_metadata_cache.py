@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты постоянного кэша метаданных роликов
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.metadata_cache import MetadataCache, key_for_url
+
+
+def make_info(expire: float) -> dict:
+    """Полные метаданные ролика YouTube с подписанной ссылкой на поток"""
+    return {
+        'id': 'dQw4w9WgXcQ', 'extractor': 'youtube', 'extractor_key': 'Youtube',
+        'title': 'Аудиокнига', 'duration': 7200, 'channel': 'Чтец',
+        'webpage_url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+        'automatic_captions': {'ru': ['много лишнего']},
+        'formats': [{'format_id': '140', 'ext': 'm4a', 'filesize': 115_000_000, 'acodec': 'mp4a',
+                     'vcodec': 'none', 'fragments': [{'url': 'x'}],
+                     'url': f'https://rr1.googlevideo.com/videoplayback?expire={int(expire)}&itag=140'}],
+    }
+
+
+def test_shared_key_and_trimming(tmp_path):
+    """Разные ссылки на ролик - одна запись, лишние поля не сохраняются"""
+    assert key_for_url("https://youtu.be/dQw4w9WgXcQ") == "youtube:dQw4w9WgXcQ"
+
+    cache = MetadataCache(tmp_path / "metadata.db")
+    cache.put(make_info(time.time() + 6 * 3600), "https://youtu.be/dQw4w9WgXcQ")
+    cache.close()
+
+    cache = MetadataCache(tmp_path / "metadata.db")
+    info = cache.get("https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10", streams=True)
+    assert info['duration'] == 7200 and 'automatic_captions' not in info
+    fmt, = info['formats']
+    assert fmt['filesize'] == 115_000_000 and 'expire=' in fmt['url'] and 'fragments' not in fmt
+    assert cache.get("https://youtu.be/unknown00000") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_streams(tmp_path):
+    """Истекшие ссылки на потоки не выдаются для скачивания, постоянные поля - выдаются"""
+    cache = MetadataCache(tmp_path / "metadata.db")
+    cache.put(make_info(time.time() - 60))
+    url = "https://youtu.be/dQw4w9WgXcQ"
+
+    assert cache.get(url, streams=True) is None
+    info = cache.get(url)
+    assert info['title'] == 'Аудиокнига' and 'url' not in info['formats'][0]
+    assert info['formats'][0]['filesize'] == 115_000_000
+
+    # Ссылки истекают раньше, чем успеет пройти скачивание: запас как у is_fresh
+    cache.put(make_info(time.time() + 120))
+    assert cache.get(url, streams=True) is None
+
+    # Ссылки отвергнуты сервером раньше срока
+    cache.put(make_info(time.time() + 6 * 3600))
+    cache.expire_streams(url)
+    assert cache.get(url, streams=True) is None and cache.get(url) is not None
+
+    # Не YouTube: запись находится по сохраненной ссылке
+    other = dict(make_info(time.time() + 3600), extractor_key='Generic', id='book',
+                 webpage_url='https://example.com/book')
+    cache.put(other, "https://example.com/book?ref=1")
+    assert cache.get("https://example.com/book?ref=1")['id'] == 'book'
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты планирования путей
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.paths import author_dir_name, series_dir_name, transliterate
+
+
+def test_transliteration():
+    """Одна таблица перевода, многобуквенные замены и удаление знаков"""
+    assert transliterate("Щука и Ёж, съел") == "Schuka i Yozh, sel"
+    assert author_dir_name("Жан-Кристоф Гранже") == "ZhanKristof_Granzhe"
+    assert author_dir_name("Урсула К. Ле Гуин") == "Ursula_K_Le_Guin"
+
+
+def test_series_dir_name_is_memoized():
+    """Папка серии только для названий с номером, результат запоминается"""
+    series_dir_name.cache_clear()
+    assert series_dir_name("Дронго 25") == "Дронго"
+    assert series_dir_name("Дронго 26") == "Дронго"
+    assert series_dir_name("Багровые реки") is None
+    assert series_dir_name("Щит 1") is None  # Слишком короткое название серии
+
+    series_dir_name("Дронго 25")
+    assert series_dir_name.cache_info().hits == 1
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты конвейера «поиск -> скачивание»
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.pipeline import ResolveDownloadPipeline
+
+
+def test_resolve_runs_at_most_lookahead_ahead():
+    """Пока скачивания стоят, поиск опережает их не больше чем на lookahead книг"""
+    resolved = []
+    release = threading.Event()
+
+    def resolve(n):
+        resolved.append(n)
+        return [f"https://youtu.be/{n}"]
+
+    pipeline = ResolveDownloadPipeline(resolve, lambda n, urls: release.wait(2),
+                                       lookahead=2, max_workers=1)
+    thread = threading.Thread(target=pipeline.run, args=(range(20),))
+    thread.start()
+    time.sleep(0.2)
+    # Одна книга качается, две ждут в очереди, еще одна найдена и ждет места
+    assert len(resolved) == 1 + 2 + 1
+    release.set()
+    thread.join(timeout=5)
+    assert not thread.is_alive() and resolved == list(range(20))
+
+
+def test_handoff_order_and_urls():
+    """Скачивание получает книги в порядке поиска и с их источниками"""
+    downloaded = []
+
+    def resolve(n):
+        if n == 2:
+            raise RuntimeError("поиск не удался")
+        return [f"https://youtu.be/{n}"]
+
+    def download(n, urls):
+        downloaded.append((n, urls))
+        return bool(urls)
+
+    started, done = [], []
+    pipeline = ResolveDownloadPipeline(resolve, download, lookahead=1, max_workers=1,
+                                       on_start=started.append,
+                                       on_done=lambda n, ok: done.append((n, ok)))
+    result = pipeline.run(range(4))
+
+    # Ошибка поиска не останавливает конвейер: книга приходит без источников
+    assert downloaded == [(0, ["https://youtu.be/0"]), (1, ["https://youtu.be/1"]),
+                          (2, []), (3, ["https://youtu.be/3"])]
+    assert started == [0, 1, 2, 3]
+    assert done == [(0, True), (1, True), (2, False), (3, True)]
+    assert (result.successful, result.failed) == (3, 1)
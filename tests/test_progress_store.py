@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты хранилища прогресса скачивания
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.progress_store import PartialDownload, ProgressRecord, ProgressStore
+
+
+def test_add_and_lookup(tmp_path):
+    """Записи доступны по номеру книги и переживают переоткрытие базы"""
+    store = ProgressStore(tmp_path / "progress.db")
+    store.add(ProgressRecord(book_id=7, title="Автор - Книга", url="https://youtu.be/x"))
+    store.close()
+
+    store = ProgressStore(tmp_path / "progress.db")
+    assert 7 in store
+    assert 8 not in store
+    assert store[7].url == "https://youtu.be/x"
+    assert store[7].downloaded_at  # Время проставляется автоматически
+    assert list(store) == [7]
+
+
+def test_legacy_json_import(tmp_path):
+    """Старый JSON (словари из core и строки из robust) импортируется в единую схему"""
+    legacy = tmp_path / "download_progress.json"
+    legacy.write_text(json.dumps({
+        "1": {"title": "Книга 1", "url": "https://youtu.be/a", "category": "Фантастика",
+              "file_path": "/tmp/1.mp3", "downloaded_at": "2025-08-10 12:00:00"},
+        "2": "Книга 2",
+    }, ensure_ascii=False), encoding="utf-8")
+
+    store = ProgressStore(tmp_path / "progress.db", legacy_json=legacy)
+    assert len(store) == 2
+    assert store[1].category == "Фантастика"
+    assert store[2] == ProgressRecord(book_id=2, title="Книга 2")
+
+    # Повторное открытие не импортирует файл заново и не затирает новые записи
+    store.add(ProgressRecord(book_id=2, title="Книга 2", url="https://youtu.be/b"))
+    store.close()
+    store = ProgressStore(tmp_path / "progress.db", legacy_json=legacy)
+    assert store[2].url == "https://youtu.be/b"
+
+
+def test_partial_download_lifecycle(tmp_path):
+    """Незавершенное скачивание переживает перезапуск и удаляется после успеха"""
+    store = ProgressStore(tmp_path / "progress.db")
+    store.set_partial(PartialDownload(book_id=3, url="https://youtu.be/y", format_id="140",
+                                      temp_path="/tmp/book.m4a.part", bytes_received=1024,
+                                      total_bytes=4096))
+    store.close()
+
+    store = ProgressStore(tmp_path / "progress.db")
+    partial = store.get_partial(3)
+    assert partial.format_id == "140"
+    assert (partial.bytes_received, partial.total_bytes) == (1024, 4096)
+    assert 3 not in store  # Незавершенное скачивание - еще не скачанная книга
+
+    store.add(ProgressRecord(book_id=3, title="Книга", url=partial.url))
+    assert store.get_partial(3) is None
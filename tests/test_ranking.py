@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты ранжирования кандидатов поиска
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.ranking import RelevanceRanker, stem, tokenize
+
+QUERY = "Михаил Булгаков Мастер и Маргарита"
+
+
+def test_tokenize_and_stem():
+    """Основы слов совпадают для разных форм"""
+    assert stem("маргариты") == stem("маргарита")
+    assert stem("audiobooks") == "audiobook"
+    assert tokenize("Мастер и Маргарита — аудиокнига!") == ["мастер", "и", "маргарит", "аудиокниг"]
+
+
+def test_ranking_order_and_filters():
+    """Полная аудиокнига выше, исключения - в конце со штрафом, короткие ролики отбрасываются"""
+    ranker = RelevanceRanker(exclude_terms=["краткое содержание", "трейлер"], hints=["полн"])
+    candidates = [
+        {'webpage_url': 'film', 'title': 'Мастер и Маргарита (фильм)', 'duration': 9000},
+        {'webpage_url': 'summary', 'title': 'Мастер и Маргарита: краткое содержание', 'duration': 4000},
+        {'webpage_url': 'book', 'title': 'Булгаков. Мастер и Маргарита. Аудиокнига полностью',
+         'channel': 'Аудиокниги', 'duration': 50000},
+        {'webpage_url': 'short', 'title': 'Мастер и Маргарита аудиокнига', 'duration': 600},
+        {'webpage_url': 'other', 'title': 'Котики', 'duration': 9000},
+    ]
+
+    ranked = ranker.rank(QUERY, candidates)
+    assert [candidate.url for candidate in ranked] == ['book', 'film', 'summary']
+    assert ranked[0].score > ranked[1].score
+    summary = ranked[-1]
+    assert summary.excluded and summary.score < summary.relevance
+    assert ranked[0].duration_fit == 1.0
+
+    everything = ranker.rank(QUERY, candidates, drop_irrelevant=False)
+    assert len(everything) == len(candidates)
+    assert not next(c for c in everything if c.url == 'film').excluded
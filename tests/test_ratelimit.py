@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты ограничителя частоты запросов
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.ratelimit import RateLimiter, TokenBucket
+
+LIMITS = {
+    'default': {'search': (20.0, 2), 'download': (100.0, 1)},
+    'google.com': {'search': (10.0, 1)},
+}
+
+
+def test_bucket_burst_then_rate():
+    """Запас выдается сразу, дальше - с заданной частотой"""
+    bucket = TokenBucket(rate=20.0, burst=2)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    assert abs(bucket.reserve() - 0.05) < 0.01
+    assert abs(bucket.reserve() - 0.10) < 0.01  # Очередь за предыдущим запросом
+
+
+def test_host_and_operation_limits():
+    """Хост и операция получают свои корзины, лимиты берутся из настроек"""
+    limiter = RateLimiter(LIMITS)
+
+    assert limiter.bucket('google.com', 'search').rate == 10.0
+    assert limiter.bucket('youtube.com', 'search').rate == 20.0
+    assert limiter.bucket('youtube.com', 'download').rate == 100.0
+    assert limiter.bucket('youtube.com', 'search') is limiter.bucket('youtube.com', 'search')
+
+
+def test_pause_delays_all_operations_of_host():
+    """Пауза хоста задерживает его операции, но не трогает другие хосты"""
+    limiter = RateLimiter(LIMITS)
+    limiter.pause('youtube.com', 0.05)
+
+    start = time.monotonic()
+    limiter.acquire('youtube.com', 'download')
+    assert time.monotonic() - start >= 0.04
+
+    start = time.monotonic()
+    limiter.acquire('vk.com', 'download')
+    assert time.monotonic() - start < 0.02
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты кэша извлеченных метаданных роликов
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yt_dlp
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.core import AudiobookDownloader
+from audiobook_downloader.resolved import ResolvedInfoCache, is_fresh, stream_expiry
+
+
+def make_info(url: str, expire: float = 0) -> dict:
+    """Полные метаданные ролика с одним потоком"""
+    if expire:
+        url += f"?expire={int(expire)}&itag=140"
+    return {
+        'id': 'book', 'title': 'Книга', 'extractor': 'generic', 'extractor_key': 'Generic',
+        'webpage_url': 'https://example.com/book', 'duration': 7200,
+        'formats': [{'format_id': 'audio', 'url': url, 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a'}],
+    }
+
+
+def test_freshness():
+    """Плоские, старые и почти истекшие метаданные для скачивания не годятся"""
+    now = time.time()
+    assert is_fresh(make_info("https://cdn/a", expire=now + 6 * 3600), now, now=now)
+    assert stream_expiry(make_info("https://cdn/a", expire=now + 60)) == int(now + 60)
+    assert not is_fresh(make_info("https://cdn/a", expire=now + 60), now, now=now)
+    assert not is_fresh(make_info("https://cdn/a"), now - 2 * 3600, now=now)
+    assert not is_fresh({'id': 'flat', 'duration': 7200}, now, now=now)
+
+    cache = ResolvedInfoCache(max_entries=2)
+    cache.put("https://youtu.be/flat", {'id': 'flat'})
+    assert cache.get("https://youtu.be/flat") is None
+    for name in "abc":
+        cache.put(f"https://youtu.be/{name}", make_info("https://cdn/a"))
+    assert len(cache) == 2 and cache.get("https://youtu.be/a") is None
+    assert cache.get("https://youtu.be/c")["id"] == "book"
+
+
+def test_download_from_resolved_info(tmp_path):
+    """Скачивание по сохраненному info dict идет без повторного извлечения"""
+    source = tmp_path / "stream.m4a"
+    source.write_bytes(b"audio" * 1000)
+    info = make_info(source.as_uri())
+
+    ydl = yt_dlp.YoutubeDL({'quiet': True, 'enable_file_urls': True,
+                            'outtmpl': str(tmp_path / "out" / "%(title)s.%(ext)s")})
+    refetched = []
+    ydl.download = refetched.extend  # Повторное извлечение страницы
+    downloader = AudiobookDownloader(str(tmp_path / "downloads"))
+
+    downloader._download_info(ydl, info['webpage_url'], info)
+    assert (tmp_path / "out" / "Книга.m4a").read_bytes() == source.read_bytes()
+    assert 'requested_downloads' not in info  # Исходный словарь не изменился
+    assert refetched == []
+
+    # Ссылка на поток отвергнута - метаданные забываются, ролик скачивается заново
+    (tmp_path / "out" / "Книга.m4a").unlink()
+    downloader.resolved.put(info['webpage_url'], info)
+    downloader._download_info(ydl, info['webpage_url'], make_info((tmp_path / "gone.m4a").as_uri()))
+    assert refetched == [info['webpage_url']]
+    assert len(downloader.resolved) == 0
+
+
+def test_broken_stored_info_falls_back_to_extraction(tmp_path):
+    """Урезанный словарь без нужного поля - не ошибка ролика, а новое извлечение"""
+    ydl = yt_dlp.YoutubeDL({'quiet': True, 'outtmpl': str(tmp_path / "%(title)s.%(ext)s")})
+    refetched = []
+    ydl.download = refetched.extend
+
+    def broken(info, download):
+        raise KeyError('url')
+
+    ydl.process_ie_result = broken
+    downloader = AudiobookDownloader(str(tmp_path / "downloads"))
+    info = make_info("https://cdn/a")
+    downloader.resolved.put(info['webpage_url'], info)
+
+    downloader._download_info(ydl, info['webpage_url'], info)
+    assert refetched == [info['webpage_url']]
+    assert len(downloader.resolved) == 0
+
+
+@pytest.mark.parametrize('error', [
+    yt_dlp.utils.DownloadError("ERROR: HTTP Error 429: Too Many Requests"),
+    yt_dlp.utils.DownloadCancelled("Задание 1 отменено"),
+])
+def test_host_block_and_cancel_not_refetched(tmp_path, error):
+    """Блокировка хоста и отмена не ведут к немедленному новому извлечению"""
+    ydl = yt_dlp.YoutubeDL({'quiet': True, 'outtmpl': str(tmp_path / "%(title)s.%(ext)s")})
+    refetched = []
+    ydl.download = refetched.extend
+
+    def blocked(info, download):
+        raise error
+
+    ydl.process_ie_result = blocked
+    downloader = AudiobookDownloader(str(tmp_path / "downloads"))
+    info = make_info("https://cdn/a")
+
+    with pytest.raises(type(error)):
+        downloader._download_info(ydl, info['webpage_url'], info)
+    assert refetched == []
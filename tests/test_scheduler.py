@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты планировщика параллельного скачивания
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.ratelimit import RateLimiter
+from audiobook_downloader.scheduler import DownloadScheduler, HostPoliteness, host_of
+
+RATE_LIMITS = {'default': {'search': (1000.0, 100), 'metadata': (1000.0, 100), 'download': (1000.0, 100)}}
+
+
+def test_host_of_aliases():
+    """www и синонимы сводятся к одному хосту"""
+    assert host_of("https://www.youtube.com/watch?v=1") == "youtube.com"
+    assert host_of("https://youtu.be/1") == "youtube.com"
+    assert host_of("https://example.org/a") == "example.org"
+
+
+def test_downloads_do_not_take_search_slots():
+    """Скачивания в работе не занимают слоты поиска; пределы - по хосту и операции"""
+    politeness = HostPoliteness({'default': {'search': 2, 'download': 1},
+                                 'example.org': {'search': 1}},
+                                rate_limiter=RateLimiter(RATE_LIMITS))
+    assert politeness.limit_for('example.org', 'search') == 1
+    assert politeness.limit_for('example.org', 'download') == 1
+
+    with politeness.slot('youtube.com', 'download'):
+        # Скачивание держит свой слот - поиск с тем же хостом идет без ожидания
+        with politeness.slot('youtube.com', 'search'), politeness.slot('youtube.com', 'search'):
+            pass
+        # Второе скачивание упирается в предел
+        assert not politeness._semaphore('youtube.com', 'download').acquire(blocking=False)
+
+
+def test_unlimited_operation_only_rate_limited():
+    """Операция без предела (None) не ограничивает число одновременных запросов"""
+    politeness = HostPoliteness({'default': {'download': None}}, rate_limiter=RateLimiter(RATE_LIMITS))
+    entered = threading.Barrier(5, timeout=2)
+
+    def download():
+        with politeness.slot('youtube.com', 'download'):
+            entered.wait()  # Все пять внутри слота одновременно
+
+    threads = [threading.Thread(target=download) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not entered.broken
+
+
+def test_scheduler_bounds_workers_and_counts_results():
+    """Не больше max_workers одновременно; ошибка рабочего - неудача, а не падение"""
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def worker(n):
+        with lock:
+            active.append(n)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.remove(n)
+        if n == 3:
+            raise RuntimeError("сбой скачивания")
+        return n % 2 == 0
+
+    done = []
+    scheduler = DownloadScheduler(worker, max_workers=2, on_done=lambda n, ok: done.append((n, ok)))
+    result = scheduler.run(range(8))
+
+    assert max(peak) == 2
+    assert (result.successful, result.failed) == (4, 4)
+    assert sorted(done) == [(n, n % 2 == 0) for n in range(8)]
+
+
+def test_scheduler_pulls_items_lazily():
+    """Следующий элемент берется из источника только при свободном рабочем потоке"""
+    pulled = []
+    release = threading.Event()
+
+    def items():
+        for n in range(6):
+            pulled.append(n)
+            yield n
+
+    scheduler = DownloadScheduler(lambda n: release.wait(2), max_workers=2)
+    thread = threading.Thread(target=scheduler.run, args=(items(),))
+    thread.start()
+    time.sleep(0.1)
+    # Оба потока заняты: третий элемент из источника еще не взят
+    assert pulled == [0, 1]
+    release.set()
+    thread.join(timeout=2)
+    assert not thread.is_alive() and pulled == list(range(6))
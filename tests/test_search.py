@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты параллельного поиска на YouTube
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.core import AudiobookDownloader
+
+BOOK = BookInfo(id=1, author="Михаил Булгаков", title="Мастер и Маргарита")
+
+
+def entry(video_id: str, duration=36000, title="Булгаков - Мастер и Маргарита. Аудиокнига") -> dict:
+    return {'webpage_url': f"https://www.youtube.com/watch?v={video_id}", 'title': title, 'duration': duration}
+
+
+def test_early_stop_cancels_remaining_queries(tmp_path):
+    """Первый запрос дал достаточно кандидатов - остальные не ждем и отменяем"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    first_query = BOOK.alternative_search_queries[0]
+    fast = {
+        f"ytsearch3:{first_query}": [entry(f"a{i}") for i in range(3)] + [entry("short", duration=600)],
+        f"ytsearch2:{first_query} полная версия": [entry("b1"), entry("b2"), entry("a0")],
+    }
+    saw_cancel = []
+
+    def run_search_query(query, book, cancelled):
+        if query in fast:
+            return fast[query]
+        # Медленные запросы: их результат не нужен, ждем отмены
+        saw_cancel.append(cancelled.wait(5))
+        return [entry("late")]
+
+    downloader._run_search_query = run_search_query
+    # Два самых приоритетных запроса сразу дают 5 кандидатов
+    results = []
+    thread = threading.Thread(target=lambda: results.append(downloader.search_youtube(BOOK, max_results=5)))
+    thread.start()
+    thread.join(timeout=3)
+
+    assert not thread.is_alive()
+    urls, = results
+    assert len(urls) == 5 and not any(url.endswith(("late", "short")) for url in urls)
+    # Четыре медленных запроса увидели отмену, а не дождались своего таймаута
+    deadline = time.monotonic() + 2
+    while len(saw_cancel) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saw_cancel == [True] * 4
+
+
+def test_excluded_candidates_do_not_stop_search(tmp_path):
+    """Кандидаты со штрафом за EXCLUDE_TERMS не считаются надежными: поиск продолжается"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    summaries = [entry(f"s{i}", title="Мастер и Маргарита: краткое содержание") for i in range(5)]
+    downloader._run_search_query = lambda query, book, cancelled: (
+        summaries if query.startswith("ytsearch3:") else [entry(query.replace(' ', '_'))]
+    )
+
+    urls = downloader.search_youtube(BOOK, max_results=5)
+    assert len(urls) == 5
+    # Полные книги из других запросов обходят пересказы
+    assert not any("=s" in url for url in urls[:3])
+
+
+def test_queries_run_in_parallel_and_merge(tmp_path):
+    """Запросы идут одновременно; результаты сливаются без повторов, сбой запроса не мешает"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    search_queries = [query for alternative in BOOK.alternative_search_queries[:3]
+                      for query in (f"ytsearch3:{alternative}", f"ytsearch2:{alternative} полная версия")]
+    all_started = threading.Barrier(len(search_queries), timeout=2)
+
+    def run_search_query(query, book, cancelled):
+        all_started.wait()  # Последовательный поиск здесь бы не прошел
+        index = search_queries.index(query)
+        if index == 1:
+            raise RuntimeError("HTTP Error 500")
+        return [entry("shared"), entry(f"q{index}")]
+
+    downloader._run_search_query = run_search_query
+    urls = downloader.search_youtube(BOOK, max_results=10)
+
+    assert not all_started.broken
+    assert sorted(url.rsplit("=", 1)[1] for url in urls) == ["q0", "q2", "q3", "q4", "q5", "shared"]
+
+
+def test_details_fetched_only_for_flat_entries(tmp_path):
+    """Полные метаданные запрашиваются только без длительности; короткие ролики отсеиваются"""
+    downloader = AudiobookDownloader(str(tmp_path))
+    flat = [entry("known"), entry("long", duration=None), entry("short", duration=None),
+            entry("gone", duration=None)]
+    downloader._run_search_query = lambda query, book, cancelled: flat
+    details = {"long": {'title': "Мастер и Маргарита", 'duration': 40000},
+               "short": {'title': "Мастер и Маргарита", 'duration': 900}}
+    fetched = []
+
+    def fetch_video_details(url):
+        fetched.append(url.rsplit("=", 1)[1])
+        return details.get(fetched[-1])
+
+    downloader.fetch_video_details = fetch_video_details
+    urls = downloader.search_youtube(BOOK, max_results=5)
+
+    assert sorted(fetched) == ["gone", "long", "short"]
+    assert sorted(url.rsplit("=", 1)[1] for url in urls) == ["known", "long"]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты постоянного кэша результатов поиска
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.search_cache import SearchCache
+
+ENTRY = {'webpage_url': 'https://www.youtube.com/watch?v=abc', 'title': 'Аудиокнига', 'duration': 7200}
+
+
+def test_normalized_key_and_stats(tmp_path):
+    """Запрос нормализуется, попадания и промахи считаются"""
+    cache = SearchCache(tmp_path / "cache.db")
+
+    assert cache.get('youtube', 'ytsearch3:Автор  Книга') is None
+    cache.put('youtube', 'ytsearch3:Автор  Книга', [dict(ENTRY, formats=[1, 2, 3])])
+
+    entries = cache.get('youtube', '  YTSEARCH3:автор книга ')
+    assert entries == [ENTRY]  # Лишние поля не сохраняются
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_persistence_and_ttl(tmp_path):
+    """Записи переживают перезапуск и устаревают по TTL"""
+    db_path = tmp_path / "cache.db"
+    cache = SearchCache(db_path)
+    cache.put('google', 'запрос', [ENTRY])
+    cache.close()
+
+    reopened = SearchCache(db_path)
+    assert reopened.get('google', 'запрос') == [ENTRY]
+    assert reopened.get('youtube', 'запрос') is None  # Источник входит в ключ
+
+    reopened.ttl = 0.01
+    time.sleep(0.02)
+    assert reopened.get('google', 'запрос') is None
+    assert len(reopened) == 0
+
+
+def test_lru_eviction(tmp_path):
+    """При превышении лимита вытесняются давно не использованные записи"""
+    cache = SearchCache(tmp_path / "cache.db", max_entries=2)
+    cache.put('youtube', 'a', [ENTRY])
+    time.sleep(0.01)
+    cache.put('youtube', 'b', [ENTRY])
+    time.sleep(0.01)
+    cache.get('youtube', 'a')  # 'a' становится свежее 'b'
+    time.sleep(0.01)
+    cache.put('youtube', 'c', [ENTRY])
+
+    assert len(cache) == 2
+    assert cache.get('youtube', 'b') is None
+    assert cache.get('youtube', 'a') is not None
+    assert cache.get('youtube', 'c') is not None
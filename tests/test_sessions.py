@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты пула сессий yt-dlp
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from yt_dlp.utils import DEFAULT_OUTTMPL
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.sessions import YDLSessionPool
+
+OPTS = {'quiet': True, 'format': 'bestaudio/best'}
+
+
+def test_overrides_restored_and_session_reused():
+    """Параметры книги действуют только внутри with; экземпляр возвращается в пул"""
+    pool = YDLSessionPool()
+    hook = lambda info: None
+
+    with pool.session(OPTS, outtmpl="/books/a/%(title)s.%(ext)s", ignoreerrors=False,
+                      post_hooks=[hook]) as ydl:
+        assert ydl.params['outtmpl']['default'] == "/books/a/%(title)s.%(ext)s"
+        assert ydl.params['ignoreerrors'] is False
+        assert hook in ydl._post_hooks
+        first = ydl
+
+    # После блока - снова параметры профиля
+    assert 'ignoreerrors' not in first.params and hook not in first._post_hooks
+    assert first.params['outtmpl'] == DEFAULT_OUTTMPL
+
+    # Тот же профиль - тот же экземпляр, со своими параметрами следующей книги
+    with pool.session(dict(OPTS), outtmpl="/books/b/%(title)s.%(ext)s") as ydl:
+        assert ydl is first
+        assert ydl.params['outtmpl']['default'] == "/books/b/%(title)s.%(ext)s"
+    # Другие опции - другой профиль
+    with pool.session(dict(OPTS, format='worst')) as ydl:
+        assert ydl is not first
+    assert (pool.created, pool.reused) == (2, 1)
+    pool.close()
+
+
+def test_overrides_restored_after_error():
+    """Ошибка внутри with не оставляет в экземпляре параметры и хуки книги"""
+    pool = YDLSessionPool()
+    hook = lambda d: None
+
+    with pytest.raises(RuntimeError):
+        with pool.session(OPTS, ratelimit=1024, progress_hooks=[hook]) as ydl:
+            raise RuntimeError("обрыв скачивания")
+
+    with pool.session(OPTS) as reused:
+        assert reused is ydl
+        assert 'ratelimit' not in reused.params and hook not in reused._progress_hooks
+    pool.close()
+
+
+def video_info() -> dict:
+    """Ролик с двумя аудиопотоками: 251 лучше по битрейту"""
+    return {
+        'id': 'book', 'title': 'Книга', 'extractor': 'generic', 'extractor_key': 'Generic',
+        'webpage_url': 'https://example.com/book',
+        'formats': [
+            {'format_id': '140', 'url': 'https://cdn/140', 'ext': 'm4a', 'acodec': 'mp4a', 'vcodec': 'none', 'abr': 128},
+            {'format_id': '251', 'url': 'https://cdn/251', 'ext': 'webm', 'acodec': 'opus', 'vcodec': 'none', 'abr': 160},
+        ],
+    }
+
+
+def test_format_override_selects_that_format():
+    """Подмена format в сессии из пула меняет выбор потока (продолжение .part-файла)"""
+    pool = YDLSessionPool()
+
+    with pool.session(OPTS, format='140') as ydl:
+        assert ydl.process_ie_result(video_info(), download=False)['format_id'] == '140'
+
+    # После возврата в пул - снова формат профиля
+    with pool.session(OPTS) as reused:
+        assert reused is ydl
+        assert reused.params['format'] == 'bestaudio/best'
+        assert reused.process_ie_result(video_info(), download=False)['format_id'] == '251'
+    pool.close()
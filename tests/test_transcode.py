@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+🧪 Тесты стадии перекодирования
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к исходному коду
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from audiobook_downloader.books import BookInfo
+from audiobook_downloader.core import AudiobookDownloader
+from audiobook_downloader.transcode import OutputProfile, TranscodeStage, ffmpeg_command, plan_output
+
+
+def test_failed_jobs_are_reported(tmp_path):
+    """Ошибка кодировщика не роняет стадию: итог приходит в on_done, мусора не остается"""
+    stage = TranscodeStage(workers=1, backlog=1)
+    source = tmp_path / "book.webm"
+    source.write_bytes(b"not audio")
+    job = stage.plan(str(source), str(tmp_path / "book"))
+    assert job.target.endswith("book.mp3") and not job.copy
+    assert stage.plan(job.target, str(tmp_path / "book")) is None
+    assert ffmpeg_command(job, "out.part")[-3:] == ['-f', 'mp3', 'out.part']
+
+    results = []
+    for _ in range(3):  # Больше, чем workers + backlog: submit дожидается места в очереди
+        stage.submit(job, on_done=results.append)
+    stage.close()
+
+    assert [result.ok for result in results] == [False] * 3
+    assert stage.failed == 3 and stage.queued == 0
+    assert source.exists() and not list(tmp_path.glob("*.part"))
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="нужен ffmpeg")
+def test_transcode_to_mp3(tmp_path):
+    """Исходный поток перекодируется в MP3 и удаляется"""
+    source = tmp_path / "book.m4a"
+    subprocess.run(["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "sine=duration=2",
+                    "-codec:a", "aac", str(source)], check=True)
+
+    stage = TranscodeStage(workers=2)
+    results = []
+    stage.submit(stage.plan(str(source), str(tmp_path / "book")), on_done=results.append)
+    stage.close()
+
+    assert results[0].ok and (tmp_path / "book.mp3").stat().st_size > 0
+    assert not source.exists()
+
+
+def test_output_profiles():
+    """Режим copy не перекодирует: m4a остается, webm перепаковывается, остальное - по устройству"""
+    assert OutputProfile.from_settings().mode == 'transcode'
+    native = OutputProfile.from_settings('native')
+    player = OutputProfile.from_settings('aac_player')
+
+    assert plan_output("/d/book.m4a", "/d/book", native) is None
+    remux = plan_output("/d/book.webm", "/d/book", native)
+    assert remux.copy and remux.target == "/d/book.opus"
+    assert "copy" in ffmpeg_command(remux, "out.part") and "-b:a" not in ffmpeg_command(remux, "out.part")
+
+    # Плеер без Opus: AAC сохраняется, Opus перекодируется в MP3
+    assert plan_output("/d/book.m4a", "/d/book", player) is None
+    transcode = plan_output("/d/book.webm", "/d/book", player)
+    assert not transcode.copy and transcode.target == "/d/book.mp3"
+
+    with pytest.raises(ValueError):
+        OutputProfile.from_settings('нет такого')
+
+
+def test_failed_transcode_not_counted_as_success(tmp_path):
+    """Итоги download_books - по итоговым файлам: скачанная, но не перекодированная книга - неудача"""
+    downloader = AudiobookDownloader(str(tmp_path / "downloads"))
+    books = [BookInfo(id=1, author="Автор", title="Готовая"), BookInfo(id=2, author="Автор", title="Битая")]
+
+    def download_resolved(book, urls):
+        # Первая скачана сразу в итоговом формате, вторая - поток, который не перекодируется
+        source = tmp_path / (f"{book.id}.mp3" if book.id == 1 else f"{book.id}.webm")
+        source.write_bytes(b"not audio")
+        downloader._finish_download(book, urls[0], str(source), tmp_path / str(book.id))
+        return True
+
+    downloader.resolve_book = lambda book: [f"https://youtu.be/{book.id}"]
+    downloader.download_resolved = download_resolved
+    result = downloader.download_books(books)
+
+    assert (result.successful, result.failed) == (1, 1)
+    assert not downloader.completion_listeners